@@ -2,11 +2,13 @@
 
 # Do imports
 import os
-import time
 import copy
+import time
+import contextlib
 import numpy as np
 import collections as cl
-from selenium import webdriver
+from functools import partial
+from urllib.parse import urlsplit
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -21,14 +23,75 @@ from input_arguments import (
     search_query_url as        S_SEARCH_QUERY_URL,
     hack_mode as               S_HACK_MODE,
     generate_report as         B_GENERATE_REPORT,
+    fetch_final_price as       B_FETCH_FINAL_PRICE,
+    browser_workers as         I_BROWSER_WORKERS,
+    browser_tabs as            I_BROWSER_TABS,
+    cache_file as              S_CACHE_FILE,
+    distance_mode as           S_DISTANCE_MODE,
+    maps_refine_top as         I_MAPS_REFINE_TOP,
+    distance_matrix_url as     S_DISTANCE_MATRIX_URL,
+    distance_matrix_api_key as S_DISTANCE_MATRIX_API_KEY,
+    browser_profile as         S_BROWSER_PROFILE,
+    extraction_mode as         S_EXTRACTION_MODE,
+    network_api_confirmed as   B_NETWORK_API_CONFIRMED,
+    overlap_stages as          B_OVERLAP_STAGES,
+    checkpoint_dir as          S_CHECKPOINT_DIR,
+    metrics_dir as             S_METRICS_DIR,
+    trace_dir as               S_TRACE_DIR,
+    batch_query_file as        S_BATCH_QUERY_FILE,
+    batch_date_ranges as       D_BATCH_DATE_RANGES,
 )
 from additional_functions import generate_report_pdf
+from batch_queries import get_batch_search_query_urls, get_batch_report_name, get_query_summary, write_batch_summary, format_batch_summary
+from attribute_matching import get_attribute_matches_sparse
+from driver_pool import DriverPool, TabPool
+from browser_profile import S_BROWSER_BINARY_PATH, S_DRIVER_EXECUTABLE_PATH, create_driver
+from detail_cache import DetailCache, get_hotel_cache_key
+from decoding_index import DecodingIndex
+from checkpoint import Checkpoint, get_checkpoint_key
+from hotel_records import HotelComparisonAttributes, HotelAdditionalAttributes, HotelRecord, DecodedHotelRecord
+from geographic import (
+    S_MAPS_DIRECTIONS_URL,
+    S_DISTANCE_MATRIX_URL,
+    GeocodeCache,
+    HaversineDistanceProvider,
+    DistanceMatrixProvider,
+)
+from pipeline import run_pipeline
+from network_capture import get_api_responses, parse_api_hotel_results
+from metrics import Metrics
+from driver_tracer import DriverTracer
+from waiting import PageNotReadyError, WaitTimeoutError, retry_until, wait_for_dom_ready, wait_for_network_idle, add_wait_observer, remove_wait_observer
+from page_parsing import (
+    S_HOTEL_CARDS_SCRIPT,
+    parse_hotel_card_fields,
+    parse_search_results_page,
+    parse_hotrate_detail_page,
+    parse_hotrate_checkout_page,
+    parse_normal_detail_page,
+)
 
 
 class HackingHotwire:
 
 
-    def __init__(self, s_report_name='report.pdf', d_hotel_filter=None, s_geographic_goto_address=None):
+    def __init__(self, s_report_name='report.pdf', d_hotel_filter=None, s_geographic_goto_address=None, s_extraction_mode='script', i_browser_workers=1, i_browser_tabs=1, s_cache_file=None, s_distance_mode='maps', i_maps_refine_top=0,
+                 s_distance_matrix_url=S_DISTANCE_MATRIX_URL, s_distance_matrix_api_key=None, s_browser_profile='full',
+                 b_overlap_stages=True, s_checkpoint_dir=None, s_metrics_dir=None,
+                 s_trace_dir=None, s_browser_binary_path=S_BROWSER_BINARY_PATH, s_driver_executable_path=S_DRIVER_EXECUTABLE_PATH,
+                 s_maps_directions_url=S_MAPS_DIRECTIONS_URL, b_network_api_confirmed=False):
+
+        # Check that extraction mode is valid
+        assert s_extraction_mode in ['script', 'webdriver', 'page_source', 'network'], \
+            '\nError:\ts_extraction_mode expected to be in [\'script\', \'webdriver\', \'page_source\', \'network\']'
+        assert i_browser_workers >= 1, \
+            '\nError:\ti_browser_workers expected to be in [1, inf)'
+        assert s_distance_mode in ['maps', 'haversine', 'distance_matrix'], \
+            '\nError:\ts_distance_mode expected to be in [\'maps\', \'haversine\', \'distance_matrix\']'
+        assert s_browser_profile in ['full', 'lean'], \
+            '\nError:\ts_browser_profile expected to be in [\'full\', \'lean\']'
+        assert (i_browser_tabs >= 1) and ((i_browser_tabs == 1) or (i_browser_workers == 1)), \
+            '\nError:\ti_browser_tabs expected to be in [1, inf), and i_browser_workers must be 1 if i_browser_tabs is greater than 1'
 
         # Check that keys for hotel filters are valid
         if d_hotel_filter is not None:
@@ -47,295 +110,531 @@ class HackingHotwire:
                 assert (d_hotel_filter['f_geographic_distance'] >= 0.0) and (s_geographic_goto_address is not None), \
                     '\nError:\tf_geographic_distance filter value expected to be in [0.0, inf), and s_geographic_goto_address must not be None'
 
+        # Read search results API responses only once their fields are confirmed against live traffic, as the paths in network_capture.py are not yet
+        if (s_extraction_mode == 'network') and (not b_network_api_confirmed):
+            print('Warning:\tsearch results API fields not confirmed, extracting with \'script\' instead of \'network\'')
+            s_extraction_mode = 'script'
+
         # Define instance variables
         self.s_report_name = s_report_name
         self.d_hotel_filter = d_hotel_filter if d_hotel_filter is None else cl.defaultdict(lambda: None, d_hotel_filter)
         self.s_geographic_goto_address = s_geographic_goto_address
+        self.s_extraction_mode = s_extraction_mode
+        self.s_browser_profile = s_browser_profile
+        self.s_browser_binary_path = s_browser_binary_path
+        self.s_driver_executable_path = s_driver_executable_path
+        self.s_maps_directions_url = s_maps_directions_url
+        self.b_overlap_stages = b_overlap_stages
+        self.d_fetch_plan = self.get_fetch_plan()
+        self.o_detail_cache = None if s_cache_file is None else DetailCache(s_cache_file)
+        self.o_decoding_index = None if s_cache_file is None else DecodingIndex(s_cache_file)
+        self.i_maps_refine_top = i_maps_refine_top
+        self.o_geocode_cache = GeocodeCache(s_cache_file)
+        self.s_checkpoint_dir = s_checkpoint_dir
+        self.o_checkpoint = None
+        self.s_metrics_dir = s_metrics_dir
+        self.o_metrics = Metrics()
+        self.s_trace_dir = s_trace_dir
+        self.o_tracer = None if s_trace_dir is None else DriverTracer()
+
+        # Initialize distance provider, google maps directions are used directly if there is none
+        if s_distance_mode == 'haversine':
+            self.o_distance_provider = HaversineDistanceProvider(self.o_geocode_cache)
+        elif s_distance_mode == 'distance_matrix':
+            self.o_distance_provider = DistanceMatrixProvider(s_distance_matrix_url, s_distance_matrix_api_key)
+        else:
+            self.o_distance_provider = None
+
+        # Initialize driver and worker pool, which is either several tabs in one browser or several browsers,
+        # logging network traffic only on the main driver, which is the one that reads search results API responses
+        o_driver_main = self._create_driver(b_capture_network=s_extraction_mode == 'network')
+        self.o_driver_capturing = o_driver_main if s_extraction_mode == 'network' else None
+        if i_browser_tabs > 1:
+            self.o_driver_pool = TabPool(o_driver_main, i_browser_tabs)
+        else:
+            self.o_driver_pool = DriverPool(self._create_driver, o_driver_main, i_browser_workers)
+
+        # Define metadata template data structures, which are slotted records that read and write like dicts
+        self.d_hotel_comparison_attributes_template = HotelComparisonAttributes()
+        self.d_hotel_additional_attributes_template = HotelAdditionalAttributes()
+
+
+    @property
+    def o_driver(self):
+
+        # Return the driver owned by the calling worker thread
+        return self.o_driver_pool.get_driver()
+
+
+    def close(self):
+
+        # Close browser sessions and caches
+        self.o_driver_pool.close()
+        self.o_driver.close()
+        if self.o_detail_cache is not None:
+            self.o_detail_cache.close()
+        if self.o_decoding_index is not None:
+            self.o_decoding_index.close()
+        self.o_geocode_cache.close()
+        if self.o_distance_provider is not None:
+            self.o_distance_provider.close()
 
-        # Set webdriver parameters
-        o_option = webdriver.ChromeOptions()
-        o_option.binary_location = 'browser\Win_948375_chrome-win\chrome-win\chrome.exe'
-        o_option.add_experimental_option('excludeSwitches', ['enable-automation'])
-        o_option.add_experimental_option('useAutomationExtension', False)
-        o_option.add_argument('--disable-blink-features=AutomationControlled')
-
-        # Initialize driver
-        self.o_driver = webdriver.Chrome(executable_path='browser\chromedriver_win32\chromedriver', options=o_option)
-        self.o_driver.implicitly_wait(10)
-        self.o_driver.maximize_window()
-
-        # Define metadata template data structures
-        self.d_hotel_comparison_attributes_template = {
-            'f_hotel_class': None,
-            's_distance': None,
-            'f_guest_rating': None,
-            'i_reviews_total': None,
-            'ls_amenities': None,
-            'i_list_price': None,
-            's_condition_rating': None,
-            's_service_rating': None,
-            's_cleanliness_rating': None,
-        }
-        self.d_hotel_additional_attributes_template = {
-            's_hotel_name': None,
-            'i_sale_price': None,
-            'f_final_price': None,
-            'f_savings_pct': None,
-            's_hotel_address': None,
-            'f_geographic_distance': None,
-            's_geographic_url': None,
-        }
 
+    def _create_driver(self, b_capture_network=False):
 
-    def _open_page(self, s_url, s_error_page_text=None, i_wait_extra=None):
+        # Return a new driver with the configured browser profile, tracing its commands if asked
+        o_driver = create_driver(self.s_browser_profile, self.s_browser_binary_path, self.s_driver_executable_path, b_capture_network=b_capture_network)
+        if self.o_tracer is not None:
+            self.o_tracer.attach(o_driver)
+        return o_driver
 
-        # Open webpage and retry if error page loads
-        while True:
-            try:
+
+    def _open_page(self, s_url, s_error_page_text=None, b_wait_network_idle=False):
+
+        # Drop network events the main driver logged on earlier pages, as only those of the search results page are read
+        self._clear_api_responses()
+
+        # Open webpage and retry if error page loads, reusing a page already loaded in the background once
+        f_started_at = time.perf_counter()
+        d_state = {'b_prefetched': self.o_driver_pool.claim_prefetched_page(s_url)}
+        def fo_open_page():
+            if not d_state['b_prefetched']:
                 self.o_driver.get(s_url)
-                if s_error_page_text is not None:
-                    s_page_text = self.o_driver.find_element(By.TAG_NAME, 'body').text
-                    if s_page_text == s_error_page_text:
-                        continue
-                    else:
-                        break
-                else:
-                    break
-            except:
-                time.sleep(1)
-                continue
-        if i_wait_extra is not None:
-            time.sleep(i_wait_extra)
+            d_state['b_prefetched'] = False
+            if (s_error_page_text is not None) and (self.o_driver.find_element(By.TAG_NAME, 'body').text == s_error_page_text):
+                raise PageNotReadyError('error page loaded')
+        retry_until(fo_open_page, 'open_page')
+
+        # Wait for the page to finish loading, and for its requests to settle if asked
+        wait_for_dom_ready(self.o_driver)
+        if b_wait_network_idle:
+            wait_for_network_idle(self.o_driver)
+        self.o_metrics.observe('page_load_seconds', urlsplit(s_url).netloc, time.perf_counter() - f_started_at)
+
+
+    def _clear_api_responses(self, b_wait_network_idle=False):
+
+        # Drop network events logged so far by the main driver, first letting responses of a search in progress arrive if asked
+        if (self.o_driver_capturing is not None) and (self.o_driver is self.o_driver_capturing):
+            if b_wait_network_idle:
+                wait_for_network_idle(self.o_driver)
+            self.o_driver_capturing.get_log('performance')
+
+
+    def _get_showing_count(self):
+
+        # Read how many hotels are showing, out of how many in total
+        s_showing_info = self.o_driver.find_element(By.CLASS_NAME, 'showing-results-count').text
+        i_showing_nth = int(s_showing_info.split('- ')[1].split(' out')[0])
+        i_showing_total = int(s_showing_info.split(' ')[-1])
+        return i_showing_nth, i_showing_total
+
+
+    def _click_show_more(self):
+
+        # Click to load next batck
+        self.o_driver.execute_script('window.scrollTo(0, document.body.scrollHeight);')
+        self.o_driver.find_element(By.CLASS_NAME, 'show-more-results__button').click()
+
+
+    def _load_next_hotels(self):
+
+        # Check if all hotels are showing, otherwise request the next batch
+        i_showing_nth, i_showing_total = self._get_showing_count()
+        if i_showing_nth == i_showing_total:
+            return True
+        self._click_show_more()
+        return False
 
 
     def load_all_hotels(self):
 
         # Load all hotels available
-        while True:
-            try:
+        while not retry_until(self._load_next_hotels, 'load_hotel_batch'):
+            continue
+        self.o_driver.execute_script('window.scrollTo(0, document.body.scrollHeight);')
 
-                # Check if all hotels are showing
-                s_showing_info = self.o_driver.find_element(By.CLASS_NAME, 'showing-results-count').text
-                i_showing_nth = int(s_showing_info.split('- ')[1].split(' out')[0])
-                i_showing_total = int(s_showing_info.split(' ')[-1])
-                if i_showing_nth == i_showing_total:
-                    break
 
-                # Click to load next batck
-                self.o_driver.execute_script('window.scrollTo(0, document.body.scrollHeight);')
-                self.o_driver.find_element(By.CLASS_NAME, 'show-more-results__button').click()
-            except:
-                time.sleep(1)
-                continue
-        self.o_driver.execute_script('window.scrollTo(0, document.body.scrollHeight);')
+    def _get_hotrate_ratings(self):
 
+        # Read hotrate hotel ratings from the open page
+        if self.s_extraction_mode == 'page_source':
+            d_hotel_ratings = parse_hotrate_detail_page(self.o_driver.page_source)
+            if d_hotel_ratings['s_condition_rating'] is None:
+                raise ValueError('hotrate hotel ratings not loaded')
+            return d_hotel_ratings['s_condition_rating'], d_hotel_ratings['s_service_rating'], d_hotel_ratings['s_cleanliness_rating']
+        lo_guest_ratings = self.o_driver.find_elements(By.CLASS_NAME, 'GuestRatingProgressBar__counter')
+        return lo_guest_ratings[0].text, lo_guest_ratings[1].text, lo_guest_ratings[3].text
 
-    def get_hotel_metadata_primary(self):
 
-        # Grab primary hotel metadata
-        ld_hotel_metadata_hotrate = []
-        ld_hotel_metadata_normal = []
-        lo_hotel_cards = self.o_driver.find_elements(By.CLASS_NAME, 'result-list-components')
-        o_tqdm = tqdm(lo_hotel_cards)
-        o_tqdm.set_description('Fetching Primary Metadata')
-        for o_hotel_card in o_tqdm:
+    def _get_normal_ratings(self):
 
-            # Determine whether card is for a hotrate or normal hotel
-            b_hotrate = '-star' in o_hotel_card.find_element(By.CLASS_NAME, 'HotelCardLayout__hotel-name').text
+        # Read normal hotel ratings from the open reviews dialog
+        if self.s_extraction_mode == 'page_source':
+            d_hotel_ratings = parse_normal_detail_page(self.o_driver.page_source)
+            if d_hotel_ratings['s_condition_rating'] is None:
+                raise ValueError('normal hotel ratings not loaded')
+            return d_hotel_ratings['s_condition_rating'], d_hotel_ratings['s_service_rating'], d_hotel_ratings['s_cleanliness_rating']
+        lo_guest_ratings = self.o_driver.find_elements(By.CLASS_NAME, 'uitk-progress-bar-value')
+        return lo_guest_ratings[3].text[:-2], lo_guest_ratings[1].text[:-2], lo_guest_ratings[0].text[:-2]
 
-            # Determine hotel page url
-            s_hotel_url = o_hotel_card.find_element(By.XPATH, ".//a[@target='_blank']").get_attribute('href')
 
-            # Extract hotel comparison attributes
-            try:
-                i_star_segments_filled = len(o_hotel_card.find_elements(By.XPATH, ".//*[name()='svg']//*[@fill='url(#star-gradient)']"))
-                i_star_segments_unfilled = len(o_hotel_card.find_elements(By.XPATH, ".//*[name()='svg']//*[@fill='#DEE1E7']"))
-                f_hotel_class = float(i_star_segments_filled) if i_star_segments_filled + i_star_segments_unfilled == 5 else i_star_segments_filled - 0.5
-            except:
-                f_hotel_class = None
-            try:
-                s_distance = o_hotel_card.find_element(By.CLASS_NAME, 'HotelCardLayout__distance').text
-            except:
-                s_distance = None
+    def _get_final_price(self):
+
+        # Read hotrate hotel final price from the open checkout page
+        if self.s_extraction_mode == 'page_source':
+            f_final_price = parse_hotrate_checkout_page(self.o_driver.page_source)['f_final_price']
+            if f_final_price is None:
+                raise ValueError('hotrate hotel final price not loaded')
+            return f_final_price
+        return float(self.o_driver.find_element(By.CLASS_NAME, 'review-policy-book__total-charge-amount').text[1:-4].replace(',', ''))
+
+
+    def _get_normal_address(self):
+
+        # Read normal hotel address from the open page
+        if self.s_extraction_mode == 'page_source':
+            return parse_normal_detail_page(self.o_driver.page_source)['s_hotel_address']
+        try:
+            return self.o_driver.find_element(By.XPATH, ".//div[@data-stid='content-hotel-address']").text
+        except:
+            return None
+
+
+    def _get_hotel_card_fields(self, o_hotel_card):
+
+        # Extract raw hotel card fields one WebDriver call at a time
+        d_hotel_card_fields = {
+            's_hotel_name': o_hotel_card.find_element(By.CLASS_NAME, 'HotelCardLayout__hotel-name').text,
+            's_hotel_url': o_hotel_card.find_element(By.XPATH, ".//a[@target='_blank']").get_attribute('href'),
+            'i_star_segments_filled': len(o_hotel_card.find_elements(By.XPATH, ".//*[name()='svg']//*[@fill='url(#star-gradient)']")),
+            'i_star_segments_unfilled': len(o_hotel_card.find_elements(By.XPATH, ".//*[name()='svg']//*[@fill='#DEE1E7']")),
+        }
+        for s_field, s_class_name, b_text_content in [('s_distance', 'HotelCardLayout__distance', False),
+                                                      ('s_guest_rating', 'RatingTag', False),
+                                                      ('s_reviews', 'Reviews', False),
+                                                      ('s_strikethrough_price', 'price-blocks__strikethrough', True),
+                                                      ('s_price', 'price-blocks__price', True)]:
             try:
-                f_guest_rating = float(o_hotel_card.find_element(By.CLASS_NAME, 'RatingTag').text[:-2])
+                o_element = o_hotel_card.find_element(By.CLASS_NAME, s_class_name)
+                d_hotel_card_fields[s_field] = o_element.get_attribute('textContent') if b_text_content else o_element.text
             except:
-                f_guest_rating = None
+                d_hotel_card_fields[s_field] = None
+        try:
+            d_hotel_card_fields['ls_amenity_ids'] = [o_element.find_element(By.TAG_NAME, 'svg').get_attribute('data-id')
+                                                     for o_element in o_hotel_card.find_elements(By.CLASS_NAME, 'AmenityIcon__icon')]
+        except:
+            d_hotel_card_fields['ls_amenity_ids'] = None
+
+        # Return raw hotel card fields
+        return d_hotel_card_fields
+
+
+    def _get_hotel_cards_parsed(self, i_start_idx=0, i_end_idx=None):
+
+        # Grab raw fields of a range of hotel cards, in a single round trip if possible
+        if self.s_extraction_mode in ['script', 'page_source', 'network']:
             try:
-                i_reviews_total = int(o_hotel_card.find_element(By.CLASS_NAME, 'Reviews').text.replace('(', '').replace(')', '').replace('reviews', ''))
+                if self.s_extraction_mode == 'page_source':
+                    ld_hotel_card_fields = parse_search_results_page(self.o_driver.page_source, self.o_driver.current_url, i_start_idx, i_end_idx)
+                else:
+                    ld_hotel_card_fields = self.o_driver.execute_script(S_HOTEL_CARDS_SCRIPT, i_start_idx, i_end_idx)
+                return [parse_hotel_card_fields(d_hotel_card_fields) for d_hotel_card_fields in ld_hotel_card_fields]
             except:
-                i_reviews_total = None
+                pass
+
+        # Otherwise grab them one WebDriver call at a time, telling the driver tracer which card the calls are for
+        lo_hotel_cards = self.o_driver.find_elements(By.CLASS_NAME, 'result-list-components')[i_start_idx:i_end_idx]
+        lt_hotel_cards_parsed = []
+        for i_card_idx, o_hotel_card in enumerate(lo_hotel_cards, i_start_idx):
+            with contextlib.nullcontext() if self.o_tracer is None else self.o_tracer.card(i_card_idx):
+                lt_hotel_cards_parsed.append(parse_hotel_card_fields(self._get_hotel_card_fields(o_hotel_card)))
+        return lt_hotel_cards_parsed
+
+
+    def iter_hotel_cards_loaded(self):
+
+        # Load all hotels, extracting the cards of each batch while the next batch is being fetched
+        i_hotel_cards_extracted = 0
+        while True:
+            i_showing_nth, i_showing_total = retry_until(self._get_showing_count, 'load_hotel_batch')
+            b_all_showing = i_showing_nth == i_showing_total
+            if not b_all_showing:
+                retry_until(self._click_show_more, 'load_hotel_batch')
+
+            # Extract cards showing before the click, or every remaining card once all are showing
+            lt_hotel_cards_parsed = self._get_hotel_cards_parsed(i_hotel_cards_extracted, None if b_all_showing else i_showing_nth)
+            i_hotel_cards_extracted += len(lt_hotel_cards_parsed)
+            yield lt_hotel_cards_parsed, i_showing_total
+            if b_all_showing:
+                break
+
+            # Wait for the next batch to show up
+            def fo_check_batch_loaded():
+                if self._get_showing_count()[0] == i_showing_nth:
+                    raise PageNotReadyError('next batch not showing')
+            retry_until(fo_check_batch_loaded, 'load_hotel_batch')
+        self.o_driver.execute_script('window.scrollTo(0, document.body.scrollHeight);')
+
+
+    def iter_hotel_metadata_primary(self):
+
+        # Take parsed hotel cards straight from captured search results API responses if possible, once all hotels are loaded
+        if self.s_extraction_mode == 'network':
+            self.load_all_hotels()
             try:
-                ls_amenities = sorted([o_element.find_element(By.TAG_NAME, 'svg').get_attribute('data-id') 
-                                       for o_element in o_hotel_card.find_elements(By.CLASS_NAME, 'AmenityIcon__icon')])
+                lt_hotel_cards_parsed = parse_api_hotel_results(get_api_responses(self.o_driver), self.o_driver.current_url)
             except:
-                ls_amenities = None
-            try:
+                lt_hotel_cards_parsed = []
+
+            # Otherwise read hotel cards from the page, e.g. if responses are missing, have an unexpected shape, or do not cover every hotel showing
+            if (len(lt_hotel_cards_parsed) == 0) or (len(lt_hotel_cards_parsed) != retry_until(self._get_showing_count, 'load_hotel_batch')[1]):
+                lt_hotel_cards_parsed = self._get_hotel_cards_parsed()
+            it_hotel_card_batches = iter([(lt_hotel_cards_parsed, len(lt_hotel_cards_parsed))])
+
+        # Otherwise extract cards batch by batch as hotels load
+        else:
+            it_hotel_card_batches = self.iter_hotel_cards_loaded()
+
+        # Grab primary hotel metadata
+        o_tqdm = tqdm(total=None)
+        o_tqdm.set_description('Fetching Primary Metadata')
+        for lt_hotel_cards_parsed, i_hotel_cards_total in it_hotel_card_batches:
+            o_tqdm.total = i_hotel_cards_total
+            ld_hotel_metadata_hotrate = []
+            ld_hotel_metadata_normal = []
+            for b_hotrate, s_hotel_url, d_hotel_comparison_attributes_parsed, d_hotel_additional_attributes_parsed in lt_hotel_cards_parsed:
+
+                # Store hotel comparison attributes
+                d_hotel_comparison_attributes = copy.copy(self.d_hotel_comparison_attributes_template)
+                d_hotel_comparison_attributes.update(d_hotel_comparison_attributes_parsed)
+
+                # Store hotel additional attributes
+                d_hotel_additional_attributes = copy.copy(self.d_hotel_additional_attributes_template)
+                d_hotel_additional_attributes.update(d_hotel_additional_attributes_parsed)
+
+                # Store hotel attributes
+                d_hotel_metadata = HotelRecord(
+                    s_hotel_url=s_hotel_url,
+                    d_hotel_comparison_attributes=d_hotel_comparison_attributes,
+                    d_hotel_additional_attributes=d_hotel_additional_attributes,
+                )
                 if b_hotrate:
-                    i_list_price = int(o_hotel_card.find_element(By.CLASS_NAME, 'price-blocks__strikethrough').get_attribute('textContent')[1:]) + 1
+                    ld_hotel_metadata_hotrate.append(d_hotel_metadata)
                 else:
-                    i_list_price = int(o_hotel_card.find_element(By.CLASS_NAME, 'price-blocks__price').get_attribute('textContent')[1:])
-            except:
-                i_list_price = None
+                    ld_hotel_metadata_normal.append(d_hotel_metadata)
+                o_tqdm.update(1)
 
-            # Extract hotel additional attributes
-            try:
-                s_hotel_name = o_hotel_card.find_element(By.CLASS_NAME, 'HotelCardLayout__hotel-name').text
-            except:
-                s_hotel_name = None
-            try:
-                i_sale_price = int(o_hotel_card.find_element(By.CLASS_NAME, 'price-blocks__price').get_attribute('textContent')[1:])
-            except:
-                i_sale_price = None
-
-            # Store hotel comparison attributes
-            d_hotel_comparison_attributes = copy.copy(self.d_hotel_comparison_attributes_template)
-            d_hotel_comparison_attributes.update({
-                    'f_hotel_class': f_hotel_class,
-                    's_distance': s_distance,
-                    'f_guest_rating': f_guest_rating,
-                    'i_reviews_total': i_reviews_total,
-                    'ls_amenities': ls_amenities,
-                    'i_list_price': i_list_price,
-            })
+            # Hand over metadata for hotrate and normal hotels of this batch
+            self.o_metrics.increment('cards_processed_total', i_amount=len(lt_hotel_cards_parsed))
+            yield ld_hotel_metadata_hotrate, ld_hotel_metadata_normal
+        o_tqdm.close()
 
-            # Store hotel additional attributes
-            d_hotel_additional_attributes = copy.copy(self.d_hotel_additional_attributes_template)
-            d_hotel_additional_attributes.update({
-                's_hotel_name': s_hotel_name,
-                'i_sale_price': i_sale_price,
-            })
 
-            # Store hotel attributes
-            d_hotel_metadata = {
-                's_hotel_url': s_hotel_url,
-                'd_hotel_comparison_attributes': d_hotel_comparison_attributes,
-                'd_hotel_additional_attributes': d_hotel_additional_attributes,
-            }
-            if b_hotrate:
-                ld_hotel_metadata_hotrate.append(d_hotel_metadata)
-            else:
-                ld_hotel_metadata_normal.append(d_hotel_metadata)
+    def get_hotel_metadata_primary(self):
+
+        # Collect primary metadata of every batch
+        ld_hotel_metadata_hotrate = []
+        ld_hotel_metadata_normal = []
+        for ld_hotel_metadata_hotrate_batch, ld_hotel_metadata_normal_batch in self.iter_hotel_metadata_primary():
+            ld_hotel_metadata_hotrate.extend(ld_hotel_metadata_hotrate_batch)
+            ld_hotel_metadata_normal.extend(ld_hotel_metadata_normal_batch)
 
         # Return metadata for hotrate and normal hotels
         return ld_hotel_metadata_hotrate, ld_hotel_metadata_normal
 
 
-    def get_hotel_metadata_secondary(self, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, na_attribute_matches):
+    def _is_hotel_filtered(self, d_hotel_comparison_attributes):
 
-        # Grab secondary hotel metadata
-        o_tqdm = tqdm(range(na_attribute_matches.shape[0]))
-        o_tqdm.set_description('Fetching Secondary Metadata')
-        for i_row_idx in o_tqdm:
+        # Check whether hotel filter requirements are not met by known comparison attributes
+        if self.d_hotel_filter is None:
+            return False
+        lb_filters_triggered = [d_hotel_comparison_attributes[s_attribute] < self.d_hotel_filter[s_attribute]
+                                for s_attribute in self.d_hotel_filter if s_attribute in d_hotel_comparison_attributes]
+        return any(lb_filters_triggered)
 
-            # If hotel filter requirements are not met, skip
-            if self.d_hotel_filter is not None:
-                lb_filters_triggered = [ld_hotel_metadata_hotrate[i_row_idx]['d_hotel_comparison_attributes'][s_attribute] < self.d_hotel_filter[s_attribute] 
-                                        for s_attribute in self.d_hotel_filter if s_attribute in ld_hotel_metadata_hotrate[i_row_idx]['d_hotel_comparison_attributes']]
-                if any(lb_filters_triggered):
-                    continue
 
-            # Get hotrate hotel metadata
-            d_hotel_metadata_hotrate = ld_hotel_metadata_hotrate[i_row_idx]
+    def _open_hotrate_page(self, s_hotel_url_hotrate, s_class_name_ready):
 
-            # Get hotrate hotel page url
-            s_hotel_url_hotrate = d_hotel_metadata_hotrate['s_hotel_url']
+        # Open hotrate hotel webpage, reopening it until its content renders, unless it shows the deal is gone
+        def fo_open_hotrate_page():
+            self._open_page(s_hotel_url_hotrate, s_error_page_text='Not found')
+            WebDriverWait(self.o_driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, 'hw-hotel-description__name-container')))
+            WebDriverWait(self.o_driver, 5).until(EC.any_of(
+                EC.presence_of_element_located((By.CLASS_NAME, s_class_name_ready)),
+                EC.presence_of_element_located((By.CLASS_NAME, 'deals-gone-details-alert'))))
+            return len(self.o_driver.find_elements(By.CLASS_NAME, 'deals-gone-details-alert')) == 0
 
-            # Open hotrate hotel webpage
-            while True:
-                self._open_page(s_hotel_url_hotrate, s_error_page_text='Not found')
-                try:
-                    WebDriverWait(self.o_driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, 'hw-hotel-description__name-container')))
-                    WebDriverWait(self.o_driver, 5).until(EC.presence_of_element_located((By.CLASS_NAME, 'GuestRatingProgressBar__counter')))
-                    break
-                except:
-                    pass
-                if len(self.o_driver.find_elements(By.CLASS_NAME, 'deals-gone-details-alert__title')) > 0:
-                    continue
+        # Return whether the page is ready, giving up on it right away if the deal disappeared
+        if not retry_until(fo_open_hotrate_page, 'hotrate_page'):
+            self.o_metrics.increment('deals_gone_total')
+            return False
+        return True
 
-            # Load all hotrate hotel ratings
-            b_page_load_alert = False
-            while True:
-                try:
-                    lo_guest_ratings = self.o_driver.find_elements(By.CLASS_NAME, 'GuestRatingProgressBar__counter')
-                    s_condition_rating = lo_guest_ratings[0].text
-                    s_service_rating = lo_guest_ratings[1].text
-                    s_cleanliness_rating = lo_guest_ratings[3].text
-                    break
-                except:
-
-                    # Handle case where deal disappeared
-                    i_deal_gone_alerts_num = len(self.o_driver.find_elements(By.CLASS_NAME, 'deals-gone-details-alert'))
-                    if i_deal_gone_alerts_num > 0:
-                        b_page_load_alert = True
-                        break
-                    time.sleep(1)
-                    continue
-            if b_page_load_alert:
-                continue
 
-            # Store hotrate hotel comparison attributes
-            d_hotel_metadata_hotrate['d_hotel_comparison_attributes'].update({
-                's_condition_rating': s_condition_rating,
-                's_service_rating': s_service_rating,
-                's_cleanliness_rating': s_cleanliness_rating,
-            })
+    def _fetch_hotrate_ratings(self, s_hotel_url_hotrate):
+
+        # Load all hotrate hotel ratings, unless the deal disappeared
+        try:
+            if not self._open_hotrate_page(s_hotel_url_hotrate, 'GuestRatingProgressBar__counter'):
+                return None
+            return retry_until(self._get_hotrate_ratings, 'hotrate_ratings')
+        except WaitTimeoutError:
+            return None
+
+
+    def _fetch_normal_ratings(self, s_hotel_url_normal):
+
+        # Load all normal hotel ratings
+        def fo_open_reviews():
+            self.o_driver.find_element(By.XPATH, ".//button[@data-stid='reviews-link']").click()
+            WebDriverWait(self.o_driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, 'uitk-progress-bar-value')))
+        try:
+            self._open_page(s_hotel_url_normal, s_error_page_text='Not found')
+            retry_until(fo_open_reviews, 'normal_ratings')
+            return retry_until(self._get_normal_ratings, 'normal_ratings')
+        except WaitTimeoutError:
+            return None
+
+
+    def _fetch_hotrate_final_price(self, s_hotel_url_hotrate):
 
-            # Iterate over normal hotels
-            li_col_idxs = np.argwhere(na_attribute_matches[i_row_idx].sum(axis=1).astype(bool)).ravel()
-            for i_col_ctr, i_col_idx in tqdm(enumerate(li_col_idxs)):
+        # Get hotrate hotel final price, unless the deal disappeared
+        def fo_open_checkout():
+            self.o_driver.find_elements(By.CLASS_NAME, 'details-bed-types__bed-choice__book-now')[0].click()
+            WebDriverWait(self.o_driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, 'review-policy-book__total-charge-amount')))
+        try:
+            if not self._open_hotrate_page(s_hotel_url_hotrate, 'details-bed-types__bed-choice__book-now'):
+                return None
+            retry_until(fo_open_checkout, 'hotrate_final_price')
+            return retry_until(self._get_final_price, 'hotrate_final_price')
+        except WaitTimeoutError:
+            return None
 
-                # Update description
-                o_tqdm.set_description(f'Fetching Secondary Metadata ({i_col_ctr + 1}/{len(li_col_idxs)})')
 
-                # If hotel filter requirements are not met, skip
-                if self.d_hotel_filter is not None:
-                    lb_filters_triggered = [ld_hotel_metadata_normal[i_col_idx]['d_hotel_comparison_attributes'][s_attribute] < self.d_hotel_filter[s_attribute] 
-                                            for s_attribute in self.d_hotel_filter if s_attribute in ld_hotel_metadata_normal[i_col_idx]['d_hotel_comparison_attributes']]
-                    if any(lb_filters_triggered):
-                        continue
+    def _fetch_normal_address(self, s_hotel_url_normal):
 
-                # Get normal hotel metadata
-                d_hotel_metadata_normal = ld_hotel_metadata_normal[i_col_idx]
+        # Open normal hotel webpage
+        try:
+            self._open_page(s_hotel_url_normal, s_error_page_text='Not found')
+        except WaitTimeoutError:
+            return None
 
-                # Continue normal hotel attributes already fetched
-                if ((d_hotel_metadata_normal['d_hotel_comparison_attributes']['s_condition_rating'] is not None) and 
-                    (d_hotel_metadata_normal['d_hotel_comparison_attributes']['s_service_rating'] is not None) and 
-                    (d_hotel_metadata_normal['d_hotel_comparison_attributes']['s_cleanliness_rating'] is not None)):
+        # Get normal hotel address
+        return self._get_normal_address()
+
+
+    def _fetch_with_checkpoint(self, s_stage, fo_fetch, s_item_key):
+
+        # Reuse a result fetched before an interrupted run stopped, otherwise fetch it
+        # Record only results that came back, so that timed out pages get another chance on resume
+        if self.o_checkpoint is None:
+            return fo_fetch(s_item_key)
+        o_result = self.o_checkpoint.get_progress(s_stage, s_item_key)
+        if o_result is None:
+            o_result = fo_fetch(s_item_key)
+            if o_result is not None:
+                self.o_checkpoint.set_progress(s_stage, s_item_key, o_result)
+        return o_result
+
+
+    def _get_candidate_cols(self, d_hotel_metadata_hotrate, ld_hotel_metadata_normal, li_col_idxs):
+
+        # Rematch one hotrate hotel against its remaining candidates only
+        o_attribute_matches = self.get_attribute_matches([d_hotel_metadata_hotrate], [ld_hotel_metadata_normal[i_col_idx] for i_col_idx in li_col_idxs])
+        return [li_col_idxs[int(i_candidate_idx)] for i_candidate_idx in o_attribute_matches.get_row_cols(0)]
+
+
+    def get_hotel_metadata_secondary(self, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, o_attribute_matches):
+
+        # Determine ambiguous hotrate hotels, since ratings can only rule candidates out and so only decode hotels with several candidates
+        d_row_to_col_idxs = {}
+        for i_row_idx in range(o_attribute_matches.shape[0]):
+            li_col_idxs = [int(i_col_idx) for i_col_idx in o_attribute_matches.get_row_cols(i_row_idx)]
+            if (len(li_col_idxs) > 1) and (not self._is_hotel_filtered(ld_hotel_metadata_hotrate[i_row_idx]['d_hotel_comparison_attributes'])):
+                d_row_to_col_idxs[i_row_idx] = li_col_idxs
+
+        # Group candidate normal hotels by url, so each hotel page is fetched only once
+        # Treat as settled normal hotels already rated, cached, or failing filter requirements, which are never fetched
+        ls_rating_attributes = ['s_condition_rating', 's_service_rating', 's_cleanliness_rating']
+        d_hotel_url_to_col_idxs = cl.defaultdict(list)
+        si_col_idxs_settled = set()
+        for i_col_idx in sorted(set(i_col_idx for li_col_idxs in d_row_to_col_idxs.values() for i_col_idx in li_col_idxs)):
+            d_hotel_comparison_attributes = ld_hotel_metadata_normal[i_col_idx]['d_hotel_comparison_attributes']
+            if self._is_hotel_filtered(d_hotel_comparison_attributes) or all(d_hotel_comparison_attributes[s_attribute] is not None for s_attribute in ls_rating_attributes):
+                si_col_idxs_settled.add(i_col_idx)
+            else:
+                d_hotel_url_to_col_idxs[ld_hotel_metadata_normal[i_col_idx]['s_hotel_url']].append(i_col_idx)
+
+        # Store normal hotel attributes already in the cache
+        if self.o_detail_cache is not None:
+            for s_hotel_url_normal in list(d_hotel_url_to_col_idxs):
+                d_hotel_ratings = self.o_detail_cache.get_complete(s_hotel_url_normal, ls_rating_attributes)
+                if d_hotel_ratings is None:
                     continue
+                for i_col_idx in d_hotel_url_to_col_idxs.pop(s_hotel_url_normal):
+                    ld_hotel_metadata_normal[i_col_idx]['d_hotel_comparison_attributes'].update(d_hotel_ratings)
+                    si_col_idxs_settled.add(i_col_idx)
 
-                # Get normal hotel page url
-                s_hotel_url_normal = d_hotel_metadata_normal['s_hotel_url']
-
-                # Open normal hotel webpage
-                self._open_page(s_hotel_url_normal, s_error_page_text='Not found')
-
-                # Load all normal hotel ratings
-                while True:
-                    try:
-                        self.o_driver.find_element(By.XPATH, ".//button[@data-stid='reviews-link']").click()
-                        WebDriverWait(self.o_driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, 'uitk-progress-bar-value')))
-                        break
-                    except:
-                        time.sleep(1)
-                        continue
-                while True:
-                    try:
-                        lo_guest_ratings = self.o_driver.find_elements(By.CLASS_NAME, 'uitk-progress-bar-value')
-                        s_condition_rating = lo_guest_ratings[3].text[:-2]
-                        s_service_rating = lo_guest_ratings[1].text[:-2]
-                        s_cleanliness_rating = lo_guest_ratings[0].text[:-2]
-                        break
-                    except:
-                        time.sleep(1)
-                        continue 
-
-                # Store normal hotel attributes
-                d_hotel_metadata_normal['d_hotel_comparison_attributes'].update({
-                    's_condition_rating': s_condition_rating,
-                    's_service_rating': s_service_rating,
-                    's_cleanliness_rating': s_cleanliness_rating,
-                })
+        # Fetch ratings in rounds, most ambiguity-reducing pages first, until no fetch can change any hotrate hotel's outcome
+        i_fetches_per_round = self.o_driver_pool.i_workers if isinstance(self.o_driver_pool, DriverPool) else self.o_driver_pool.i_tabs
+        si_rows_rated = set()
+        while True:
+
+            # Score unrated hotrate hotels by the candidates they could rule out
+            lt_fetches = [(len(li_col_idxs) - 1, 0, ld_hotel_metadata_hotrate[i_row_idx]['s_hotel_url'], i_row_idx)
+                          for i_row_idx, li_col_idxs in d_row_to_col_idxs.items() if i_row_idx not in si_rows_rated]
+
+            # Score normal hotels by the rated hotrate hotels they could help decode, which are those with fewer than two settled candidates left
+            d_hotel_url_to_score = cl.Counter()
+            for i_row_idx in si_rows_rated:
+                li_col_idxs_open = [i_col_idx for i_col_idx in d_row_to_col_idxs[i_row_idx] if i_col_idx not in si_col_idxs_settled]
+                if (len(li_col_idxs_open) > 0) and (len(d_row_to_col_idxs[i_row_idx]) - len(li_col_idxs_open) < 2):
+                    d_hotel_url_to_score.update(set(ld_hotel_metadata_normal[i_col_idx]['s_hotel_url'] for i_col_idx in li_col_idxs_open))
+            lt_fetches.extend((i_score, 1, s_hotel_url_normal, None) for s_hotel_url_normal, i_score in d_hotel_url_to_score.items())
+            if len(lt_fetches) == 0:
+                break
+            lt_fetches = sorted(lt_fetches, key=lambda t: (-t[0], t[1]))[:i_fetches_per_round]
+
+            # Fetch hotrate hotel ratings, giving up on deals that disappeared
+            lt_fetches_hotrate = [t for t in lt_fetches if t[1] == 0]
+            lt_hotel_ratings = self.o_driver_pool.map(partial(self._fetch_with_checkpoint, 'hotrate_ratings', self._fetch_hotrate_ratings), [t[2] for t in lt_fetches_hotrate], 'Fetching Secondary Metadata (Hotrate)')
+            for (_, _, _, i_row_idx), t_hotel_ratings in zip(lt_fetches_hotrate, lt_hotel_ratings):
+                if t_hotel_ratings is None:
+                    del d_row_to_col_idxs[i_row_idx]
+                    continue
+                ld_hotel_metadata_hotrate[i_row_idx]['d_hotel_comparison_attributes'].update(dict(zip(ls_rating_attributes, t_hotel_ratings)))
+                si_rows_rated.add(i_row_idx)
+
+                # Rematch against all remaining candidates
+                d_row_to_col_idxs[i_row_idx] = self._get_candidate_cols(ld_hotel_metadata_hotrate[i_row_idx], ld_hotel_metadata_normal, d_row_to_col_idxs[i_row_idx])
+
+            # Fetch normal hotel ratings, settling hotels whose ratings never loaded as they are
+            ls_hotel_urls_normal = [t[2] for t in lt_fetches if t[1] == 1]
+            lt_hotel_ratings = self.o_driver_pool.map(partial(self._fetch_with_checkpoint, 'normal_ratings', self._fetch_normal_ratings), ls_hotel_urls_normal, 'Fetching Secondary Metadata (Normal)')
+            si_col_idxs_fetched = set()
+            for s_hotel_url_normal, t_hotel_ratings in zip(ls_hotel_urls_normal, lt_hotel_ratings):
+                li_col_idxs = d_hotel_url_to_col_idxs.pop(s_hotel_url_normal)
+                si_col_idxs_settled.update(li_col_idxs)
+                if t_hotel_ratings is None:
+                    continue
+                d_hotel_ratings = dict(zip(ls_rating_attributes, t_hotel_ratings))
+                for i_col_idx in li_col_idxs:
+                    ld_hotel_metadata_normal[i_col_idx]['d_hotel_comparison_attributes'].update(d_hotel_ratings)
+                if self.o_detail_cache is not None:
+                    self.o_detail_cache.set(s_hotel_url_normal, d_hotel_ratings)
+                si_col_idxs_fetched.update(li_col_idxs)
+
+            # Rematch rated hotrate hotels against just the normal hotels rated this round, in one pass
+            li_row_idxs = [i_row_idx for i_row_idx in si_rows_rated if not si_col_idxs_fetched.isdisjoint(d_row_to_col_idxs[i_row_idx])]
+            if len(li_row_idxs) > 0:
+                li_col_idxs = sorted(si_col_idxs_fetched)
+                o_attribute_matches_round = self.get_attribute_matches([ld_hotel_metadata_hotrate[i_row_idx] for i_row_idx in li_row_idxs],
+                                                                       [ld_hotel_metadata_normal[i_col_idx] for i_col_idx in li_col_idxs])
+                for i_round_row_idx, i_row_idx in enumerate(li_row_idxs):
+                    si_col_idxs_matched = set(li_col_idxs[int(i_round_col_idx)] for i_round_col_idx in o_attribute_matches_round.get_row_cols(i_round_row_idx))
+                    d_row_to_col_idxs[i_row_idx] = [i_col_idx for i_col_idx in d_row_to_col_idxs[i_row_idx]
+                                                    if (i_col_idx not in si_col_idxs_fetched) or (i_col_idx in si_col_idxs_matched)]
 
         # Return metadata for hotrate and normal hotels
         return ld_hotel_metadata_hotrate, ld_hotel_metadata_normal
@@ -344,31 +643,20 @@ class HackingHotwire:
     def get_attribute_matches(self, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal):
 
         # Find attribute matches
-        na_attribute_matches = np.zeros((len(ld_hotel_metadata_hotrate), len(ld_hotel_metadata_normal), len(self.d_hotel_comparison_attributes_template)))
-        for i_row_idx, d_hotel_metadata_hotrate in enumerate(ld_hotel_metadata_hotrate):
-            for i_col_idx, d_hotel_metadata_normal in enumerate(ld_hotel_metadata_normal):
-                for i_dep_idx, s_attribute in enumerate(self.d_hotel_comparison_attributes_template):
-                    if ((d_hotel_metadata_hotrate['d_hotel_comparison_attributes'][s_attribute] is None) or 
-                        (d_hotel_metadata_normal['d_hotel_comparison_attributes'][s_attribute] is None)):
-                        continue
-                    elif d_hotel_metadata_hotrate['d_hotel_comparison_attributes'][s_attribute] == d_hotel_metadata_normal['d_hotel_comparison_attributes'][s_attribute]:
-                            na_attribute_matches[i_row_idx, i_col_idx, i_dep_idx] = 1
-                    elif d_hotel_metadata_hotrate['d_hotel_comparison_attributes'][s_attribute] != d_hotel_metadata_normal['d_hotel_comparison_attributes'][s_attribute]:
-                            na_attribute_matches[i_row_idx, i_col_idx, :] = 0
-                            break
+        o_attribute_matches = get_attribute_matches_sparse(list(self.d_hotel_comparison_attributes_template), ld_hotel_metadata_hotrate, ld_hotel_metadata_normal)
 
-        # Return match matrix
-        return na_attribute_matches
+        # Return sparse matches
+        return o_attribute_matches
 
 
-    def parse_metadata_by_matches(self, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, na_attribute_matches):
+    def parse_metadata_by_matches(self, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, o_attribute_matches):
 
         # Find perfect hotrate to normal hotel matches
         ld_hotel_metadata_decoded = []
-        for i_row_idx in range(na_attribute_matches.shape[0]):
+        for i_row_idx in range(o_attribute_matches.shape[0]):
 
             # If there is not exactly one perfect normal hotel match, skip
-            na_perfect_normal_hotel_match_idxs = np.where(na_attribute_matches[i_row_idx, :, :].sum(axis=1).astype(bool))[0].ravel()
+            na_perfect_normal_hotel_match_idxs = o_attribute_matches.get_row_cols(i_row_idx)
             if len(na_perfect_normal_hotel_match_idxs) != 1:
                 continue
             i_perfect_normal_hotel_match_idx = int(na_perfect_normal_hotel_match_idxs[0])
@@ -377,150 +665,198 @@ class HackingHotwire:
             d_hotel_metadata_hotrate = ld_hotel_metadata_hotrate[i_row_idx]
             d_hotel_metadata_normal = ld_hotel_metadata_normal[i_perfect_normal_hotel_match_idx]
             d_attributes_matched = copy.copy(self.d_hotel_comparison_attributes_template)
-            d_attributes_matched.update({list(self.d_hotel_comparison_attributes_template.keys())[i_attribute_idx]: 
-                True for i_attribute_idx in np.argwhere(na_attribute_matches[i_row_idx, i_perfect_normal_hotel_match_idx]).ravel()})
+            d_attributes_matched.update({s_attribute: True for s_attribute in o_attribute_matches.get_matched_attributes(i_row_idx, i_perfect_normal_hotel_match_idx)})
 
             # Store decoded metadata
-            ld_hotel_metadata_decoded.append({
-                'd_hotel_metadata_hotrate': d_hotel_metadata_hotrate,
-                'd_hotel_metadata_normal': d_hotel_metadata_normal,
-                'd_attributes_matched': d_attributes_matched,
-            })
+            ld_hotel_metadata_decoded.append(DecodedHotelRecord(
+                d_hotel_metadata_hotrate=d_hotel_metadata_hotrate,
+                d_hotel_metadata_normal=d_hotel_metadata_normal,
+                d_attributes_matched=d_attributes_matched,
+            ))
 
         # Return decoded metadata
         return ld_hotel_metadata_decoded
 
 
-    def get_hotel_metadata_misc(self, ld_hotel_metadata_decoded):
+    def parse_metadata_by_known_decodings(self, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal):
+
+        # Skip if there is no index of earlier decodings
+        if self.o_decoding_index is None:
+            return [], ld_hotel_metadata_hotrate
+
+        # Index listed normal hotels by property id, so that a decoding recorded on other dates finds its hotel,
+        # leaving out any key two different listed hotels share, since it cannot tell them apart
+        d_hotel_key_to_normal = {}
+        ss_hotel_keys_shared = set()
+        for d_hotel_metadata_normal in ld_hotel_metadata_normal:
+            s_hotel_key = get_hotel_cache_key(d_hotel_metadata_normal['s_hotel_url'])
+            if (s_hotel_key in d_hotel_key_to_normal) and (d_hotel_key_to_normal[s_hotel_key]['s_hotel_url'] != d_hotel_metadata_normal['s_hotel_url']):
+                ss_hotel_keys_shared.add(s_hotel_key)
+            d_hotel_key_to_normal[s_hotel_key] = d_hotel_metadata_normal
+        for s_hotel_key in ss_hotel_keys_shared:
+            del d_hotel_key_to_normal[s_hotel_key]
+
+        # Resolve hotrate hotels decoded in earlier runs whose normal hotel is listed and still consistent
+        ld_hotel_metadata_decoded_known = []
+        ld_hotel_metadata_hotrate_unknown = []
+        for d_hotel_metadata_hotrate in ld_hotel_metadata_hotrate:
+
+            # Look up hotrate card fingerprint
+            s_hotel_url_normal = self.o_decoding_index.lookup(d_hotel_metadata_hotrate['d_hotel_comparison_attributes'])
+            d_hotel_metadata_normal = None if s_hotel_url_normal is None else d_hotel_key_to_normal.get(get_hotel_cache_key(s_hotel_url_normal))
+            if d_hotel_metadata_normal is None:
+                ld_hotel_metadata_hotrate_unknown.append(d_hotel_metadata_hotrate)
+                continue
 
-        # Collect miscellaneous hotel data for each decoded hotel
-        o_tqdm = tqdm(ld_hotel_metadata_decoded)
-        o_tqdm.set_description('Fetching Misc Metadata')
-        for d_hotel_metadata_decoded in o_tqdm:
+            # Check the known normal hotel still matches today's attributes
+            o_attribute_matches = self.get_attribute_matches([d_hotel_metadata_hotrate], [d_hotel_metadata_normal])
+            if len(o_attribute_matches) == 0:
+                ld_hotel_metadata_hotrate_unknown.append(d_hotel_metadata_hotrate)
+                continue
 
-            # Get hotrate hotel page url
-            s_hotel_url_hotrate = d_hotel_metadata_decoded['d_hotel_metadata_hotrate']['s_hotel_url']
+            # Store decoded metadata
+            d_attributes_matched = copy.copy(self.d_hotel_comparison_attributes_template)
+            d_attributes_matched.update({s_attribute: True for s_attribute in o_attribute_matches.get_matched_attributes(0, 0)})
+            ld_hotel_metadata_decoded_known.append(DecodedHotelRecord(
+                d_hotel_metadata_hotrate=d_hotel_metadata_hotrate,
+                d_hotel_metadata_normal=d_hotel_metadata_normal,
+                d_attributes_matched=d_attributes_matched,
+            ))
 
-            # Open hotrate hotel webpage
-            while True:
-                self._open_page(s_hotel_url_hotrate, s_error_page_text='Not found')
-                try:
-                    WebDriverWait(self.o_driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, 'hw-hotel-description__name-container')))
-                    WebDriverWait(self.o_driver, 5).until(EC.presence_of_element_located((By.CLASS_NAME, 'details-bed-types__bed-choice__book-now')))
-                    break
-                except:
-                    pass
-                if len(self.o_driver.find_elements(By.CLASS_NAME, 'deals-gone-details-alert__title')) > 0:
-                    continue
+        # Return decoded metadata and remaining hotrate hotels
+        return ld_hotel_metadata_decoded_known, ld_hotel_metadata_hotrate_unknown
+
+
+    def _record_matched_decodings(self, ld_hotel_metadata_decoded):
+
+        # Remember decodings found by attribute matching in this run for future runs, never those resolved from the index, which would confirm themselves
+        if self.o_decoding_index is None:
+            return
+        for d_hotel_metadata_decoded in ld_hotel_metadata_decoded:
+            self.o_decoding_index.record(
+                d_hotel_metadata_decoded['d_hotel_metadata_hotrate']['d_hotel_comparison_attributes'],
+                d_hotel_metadata_decoded['d_hotel_metadata_normal']['s_hotel_url'],
+                sum(1 for b_matched in d_hotel_metadata_decoded['d_attributes_matched'].values() if b_matched is True))
 
-            # Get hotrate hotel final price
-            while True:
-                try:
-                    self.o_driver.find_elements(By.CLASS_NAME, 'details-bed-types__bed-choice__book-now')[0].click()
-                    WebDriverWait(self.o_driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, 'review-policy-book__total-charge-amount')))
-                    break
-                except:
-                    time.sleep(1)
-                    continue
-            while True:
-                try:
-                    f_final_price = float(self.o_driver.find_element(By.CLASS_NAME, 'review-policy-book__total-charge-amount').text[1:-4].replace(',', ''))
-                    break
-                except:
-                    time.sleep(1)
-                    continue
 
-            # Store hotrate hotel additional attributes
+    def get_hotel_final_prices(self, ld_hotel_metadata_decoded):
+
+        # Fetch hotrate hotel final prices
+        lf_final_prices = self.o_driver_pool.map(
+            partial(self._fetch_with_checkpoint, 'hotrate_final_price', self._fetch_hotrate_final_price),
+            [d['d_hotel_metadata_hotrate']['s_hotel_url'] for d in ld_hotel_metadata_decoded], 'Fetching Misc Metadata (Hotrate)')
+
+        # Store final price for each decoded hotel
+        for d_hotel_metadata_decoded, f_final_price in zip(ld_hotel_metadata_decoded, lf_final_prices):
             d_hotel_metadata_decoded['d_hotel_metadata_hotrate']['d_hotel_additional_attributes'].update({
                 'f_final_price': f_final_price,
             })
 
-            # Get normal hotel page url
-            s_hotel_url = d_hotel_metadata_decoded['d_hotel_metadata_normal']['s_hotel_url']
+        # Return decoded metadata
+        return ld_hotel_metadata_decoded
 
-            # Open normal hotel webpage
-            self._open_page(s_hotel_url, s_error_page_text='Not found')
 
-            # Get normal hotel address
-            try:
-                s_hotel_address = self.o_driver.find_element(By.XPATH, ".//div[@data-stid='content-hotel-address']").text
-            except:
-                s_hotel_address = None
+    def get_hotel_addresses(self, ld_hotel_metadata_decoded):
+
+        # Get normal hotel addresses from the cache where possible
+        d_hotel_url_to_address = {}
+        ls_hotel_urls_normal = list(dict.fromkeys(d['d_hotel_metadata_normal']['s_hotel_url'] for d in ld_hotel_metadata_decoded))
+        if self.o_detail_cache is not None:
+            for s_hotel_url_normal in ls_hotel_urls_normal:
+                d_hotel_url_to_address.update({s_hotel_url_normal: s_hotel_address for s_hotel_address in self.o_detail_cache.get(s_hotel_url_normal, ['s_hotel_address']).values()})
 
-            # Store normal hotel additional attributes
+        # Fetch remaining normal hotel addresses, opening each hotel page only once
+        ls_hotel_urls_normal = [s_hotel_url_normal for s_hotel_url_normal in ls_hotel_urls_normal if s_hotel_url_normal not in d_hotel_url_to_address]
+        for s_hotel_url_normal, s_hotel_address in zip(ls_hotel_urls_normal, self.o_driver_pool.map(
+                partial(self._fetch_with_checkpoint, 'normal_address', self._fetch_normal_address), ls_hotel_urls_normal, 'Fetching Misc Metadata (Normal)')):
+            d_hotel_url_to_address[s_hotel_url_normal] = s_hotel_address
+            if self.o_detail_cache is not None:
+                self.o_detail_cache.set(s_hotel_url_normal, {'s_hotel_address': s_hotel_address})
+
+        # Store address for each decoded hotel
+        for d_hotel_metadata_decoded in ld_hotel_metadata_decoded:
             d_hotel_metadata_decoded['d_hotel_metadata_normal']['d_hotel_additional_attributes'].update({
-                's_hotel_address': s_hotel_address,
+                's_hotel_address': d_hotel_url_to_address[d_hotel_metadata_decoded['d_hotel_metadata_normal']['s_hotel_url']],
             })
 
         # Return decoded metadata
         return ld_hotel_metadata_decoded
 
 
-    def get_geographic_metadata(self, ld_hotel_metadata_decoded):
+    def get_hotel_metadata_misc(self, ld_hotel_metadata_decoded):
 
-        # Skip if necessary input data is not specified
-        if self.s_geographic_goto_address is None:
-            return
+        # Get miscellaneous hotel data for each decoded hotel
+        ld_hotel_metadata_decoded = self.get_hotel_final_prices(ld_hotel_metadata_decoded)
+        return self.get_hotel_addresses(ld_hotel_metadata_decoded)
 
-        # Find geographic metadata
-        o_tqdm = tqdm(ld_hotel_metadata_decoded)
-        o_tqdm.set_description('Fetching Geographic Data')
-        for d_hotel_metadata_decoded in o_tqdm:
-
-            # Get normal hotel address
-            s_hotel_address = d_hotel_metadata_decoded['d_hotel_metadata_normal']['d_hotel_additional_attributes']['s_hotel_address']
-
-            # Address case when no address could be found
-            # Store geographic attributes
-            if s_hotel_address is None:
-                d_hotel_metadata_decoded['d_hotel_metadata_normal']['d_hotel_additional_attributes'].update({
-                    'f_geographic_distance': None,
-                    's_geographic_url': None,
-                })
-                continue
 
-            # Open google maps
-            self._open_page('https://www.google.com/maps/dir/')
+    def _fetch_geographic_distance_maps(self, s_hotel_address):
 
-            # Search for a route between two points
-            while True:
-                try:
-                    self.o_driver.find_element(By.ID, 'directions-searchbox-0').find_element(By.CLASS_NAME, 'tactile-searchbox-input').send_keys(self.s_geographic_goto_address)
-                    self.o_driver.find_element(By.ID, 'directions-searchbox-1').find_element(By.CLASS_NAME, 'tactile-searchbox-input').send_keys(s_hotel_address + '\n')
-                    break
-                except:
-                    time.sleep(1)
-                    continue
-            while True:
-                try:
-                    self.o_driver.find_element(By.XPATH, ".//img[@aria-label='Driving']").click()
-                    break
-                except:
-                    time.sleep(1)
-                    continue
-            while True:
-                try:
-                    f_geographic_distance = float(
-                        self.o_driver.find_element(By.ID, 'section-directions-trip-0').find_element(By.CLASS_NAME, 'fontBodyMedium').text.split(' ')[0].replace(',', ''))
-                    break
-                except:
-                    try:
-                        if 'Google Maps can\'t find' in self.o_driver.find_element(By.CLASS_NAME, 'widget-directions').find_element(By.ID, 'sbsg51').text:
-                            f_geographic_distance = None
-                            break
-                    except:
-                        pass
-                    time.sleep(1)
-                    continue
-            while True:
-                s_geographic_url = self.o_driver.current_url
-                if s_geographic_url == 'https://www.google.com/maps/dir/':
-                    time.sleep(1)
-                    continue
-                else:
-                    break
-            
-            # Store geographic attributes
+        # Define steps to search for a route between two points
+        def fo_search_route():
+            self.o_driver.find_element(By.ID, 'directions-searchbox-0').find_element(By.CLASS_NAME, 'tactile-searchbox-input').send_keys(self.s_geographic_goto_address)
+            self.o_driver.find_element(By.ID, 'directions-searchbox-1').find_element(By.CLASS_NAME, 'tactile-searchbox-input').send_keys(s_hotel_address + '\n')
+        def fo_choose_driving():
+            self.o_driver.find_element(By.XPATH, ".//img[@aria-label='Driving']").click()
+        def fo_get_distance():
+            try:
+                return float(self.o_driver.find_element(By.ID, 'section-directions-trip-0').find_element(By.CLASS_NAME, 'fontBodyMedium').text.split(' ')[0].replace(',', ''))
+            except:
+                if 'Google Maps can\'t find' in self.o_driver.find_element(By.CLASS_NAME, 'widget-directions').find_element(By.ID, 'sbsg51').text:
+                    return None
+                raise
+        def fo_get_url():
+            if self.o_driver.current_url == self.s_maps_directions_url:
+                raise PageNotReadyError('directions url not updated')
+            return self.o_driver.current_url
+        # Open google maps and get driving directions, giving up on stuck steps
+        try:
+            self._open_page(self.s_maps_directions_url)
+            retry_until(fo_search_route, 'maps_directions')
+            retry_until(fo_choose_driving, 'maps_directions')
+            f_geographic_distance = retry_until(fo_get_distance, 'maps_directions')
+            s_geographic_url = retry_until(fo_get_url, 'maps_directions')
+        except WaitTimeoutError:
+            return None, None
+
+        # Return geographic attributes
+        return f_geographic_distance, s_geographic_url
+
+
+    def get_geographic_metadata(self, ld_hotel_metadata_decoded):
+
+        # Skip if necessary input data is not specified
+        if self.s_geographic_goto_address is None:
+            return ld_hotel_metadata_decoded
+
+        # Determine unique hotel addresses
+        ls_hotel_addresses = list(dict.fromkeys(d['d_hotel_metadata_normal']['d_hotel_additional_attributes']['s_hotel_address'] for d in ld_hotel_metadata_decoded
+                                                if d['d_hotel_metadata_normal']['d_hotel_additional_attributes']['s_hotel_address'] is not None))
+
+        # Find geographic metadata for all addresses at once with the distance provider
+        if self.o_distance_provider is not None:
+            lt_geographic_attributes = self.o_distance_provider.get_distances(self.s_geographic_goto_address, ls_hotel_addresses)
+        else:
+            lt_geographic_attributes = [None] * len(ls_hotel_addresses)
+
+        # Refine the closest hotels, and any the provider could not handle, with google maps directions
+        li_hotel_idxs_ranked = sorted([i_hotel_idx for i_hotel_idx, t in enumerate(lt_geographic_attributes) if (t is not None) and (t[0] is not None)],
+                                      key=lambda i_hotel_idx: lt_geographic_attributes[i_hotel_idx][0])
+        li_hotel_idxs_maps = sorted(set(li_hotel_idxs_ranked[:self.i_maps_refine_top]) |
+                                    set(i_hotel_idx for i_hotel_idx, t in enumerate(lt_geographic_attributes) if t is None))
+        if len(li_hotel_idxs_maps) > 0:
+            with self.o_driver_pool.checkout():
+                o_tqdm = tqdm(li_hotel_idxs_maps)
+                o_tqdm.set_description('Fetching Geographic Data')
+                for i_hotel_idx in o_tqdm:
+                    lt_geographic_attributes[i_hotel_idx] = self._fetch_with_checkpoint('maps_directions', self._fetch_geographic_distance_maps, ls_hotel_addresses[i_hotel_idx])
+
+        # Store geographic attributes
+        # Address case when no address could be found
+        d_address_to_geographic_attributes = dict(zip(ls_hotel_addresses, lt_geographic_attributes))
+        for d_hotel_metadata_decoded in ld_hotel_metadata_decoded:
+            f_geographic_distance, s_geographic_url = d_address_to_geographic_attributes.get(
+                d_hotel_metadata_decoded['d_hotel_metadata_normal']['d_hotel_additional_attributes']['s_hotel_address'], (None, None))
             d_hotel_metadata_decoded['d_hotel_metadata_normal']['d_hotel_additional_attributes'].update({
                 'f_geographic_distance': f_geographic_distance,
                 's_geographic_url': s_geographic_url,
@@ -530,38 +866,43 @@ class HackingHotwire:
         return ld_hotel_metadata_decoded
 
 
-    def parse_metadata_by_filters(self, ld_hotel_metadata_decoded):
+    def parse_metadata_by_filters(self, ld_hotel_metadata_decoded, ls_filter_attributes=None):
 
-        # Find hotels that match filter criteria
+        # Find hotels that match filter criteria, or only the given ones of them
+        ls_filter_attributes = None if self.d_hotel_filter is None else [
+            s_attribute for s_attribute in self.d_hotel_filter if (ls_filter_attributes is None) or (s_attribute in ls_filter_attributes)]
         ld_hotel_metadata_decoded_parsed = []
         for d_hotel_metadata_decoded in ld_hotel_metadata_decoded:
 
-            # Extract relevant metadata data structure
-            d_hotel_metadata_hotrate = d_hotel_metadata_decoded['d_hotel_metadata_hotrate']
-            d_hotel_metadata_normal = d_hotel_metadata_decoded['d_hotel_metadata_normal']
+            # Extract relevant metadata records, reading their fields as attributes rather than through nested lookups
+            d_hotel_comparison_attributes_hotrate = d_hotel_metadata_decoded.d_hotel_metadata_hotrate.d_hotel_comparison_attributes
+            d_hotel_additional_attributes_hotrate = d_hotel_metadata_decoded.d_hotel_metadata_hotrate.d_hotel_additional_attributes
+            d_hotel_metadata_normal = d_hotel_metadata_decoded.d_hotel_metadata_normal
 
             # Calculate savings
             # Store savings value
-            f_savings_pct = round(100.0 * (1.0 - (d_hotel_metadata_hotrate['d_hotel_additional_attributes']['i_sale_price'] / 
-                                  float(d_hotel_metadata_normal['d_hotel_comparison_attributes']['i_list_price']))), 2)
-            d_hotel_metadata_hotrate['d_hotel_additional_attributes']['f_savings_pct'] = f_savings_pct
+            f_savings_pct = round(100.0 * (1.0 - (d_hotel_additional_attributes_hotrate.i_sale_price /
+                                  float(d_hotel_metadata_normal.d_hotel_comparison_attributes.i_list_price))), 2)
+            d_hotel_additional_attributes_hotrate.f_savings_pct = f_savings_pct
 
             # If hotel filter requirements are not met, skip
             if self.d_hotel_filter is not None:
                 b_filter_hotel = False
-                for s_attribute in self.d_hotel_filter:
+                for s_attribute in ls_filter_attributes:
                     if s_attribute == 'f_savings_pct':
-                        if d_hotel_metadata_hotrate['d_hotel_additional_attributes']['f_savings_pct'] <= self.d_hotel_filter[s_attribute]:
+                        if f_savings_pct <= self.d_hotel_filter[s_attribute]:
                             b_filter_hotel = True
                     elif s_attribute == 'f_geographic_distance':
-                        if d_hotel_metadata_normal['d_hotel_additional_attributes']['f_geographic_distance'] is None:
+                        f_geographic_distance = d_hotel_metadata_normal.d_hotel_additional_attributes.f_geographic_distance
+                        if f_geographic_distance is None:
                             b_filter_hotel = True
-                        elif d_hotel_metadata_normal['d_hotel_additional_attributes']['f_geographic_distance'] > self.d_hotel_filter[s_attribute]:
+                        elif f_geographic_distance > self.d_hotel_filter[s_attribute]:
                             b_filter_hotel = True
                     else:
-                        if d_hotel_metadata_hotrate['d_hotel_comparison_attributes'][s_attribute] is None:
+                        o_value = getattr(d_hotel_comparison_attributes_hotrate, s_attribute)
+                        if o_value is None:
                             b_filter_hotel = True
-                        elif d_hotel_metadata_hotrate['d_hotel_comparison_attributes'][s_attribute] < self.d_hotel_filter[s_attribute]:
+                        elif o_value < self.d_hotel_filter[s_attribute]:
                             b_filter_hotel = True
                 if b_filter_hotel:
                     continue
@@ -573,65 +914,203 @@ class HackingHotwire:
         return ld_hotel_metadata_decoded_parsed
 
 
-    def hack_hotwire_basic(self, s_search_query_url, b_for_advanced=False):
+    def sort_metadata_by_filters(self, ld_hotel_metadata_decoded):
+
+        # Skip if there are no filters to sort by
+        if self.d_hotel_filter is None:
+            return ld_hotel_metadata_decoded
+
+        # Sort hotels by each filter attribute in turn, best first, with hotels missing a value last
+        d_filter_to_get_value = {
+            'f_hotel_class': lambda d: d.d_hotel_metadata_normal.d_hotel_comparison_attributes.f_hotel_class,
+            'f_guest_rating': lambda d: d.d_hotel_metadata_normal.d_hotel_comparison_attributes.f_guest_rating,
+            'f_savings_pct': lambda d: d.d_hotel_metadata_hotrate.d_hotel_additional_attributes.f_savings_pct,
+            'f_geographic_distance': lambda d: d.d_hotel_metadata_normal.d_hotel_additional_attributes.f_geographic_distance,
+        }
+        d_filter_to_sign = {'f_hotel_class': -1.0, 'f_guest_rating': -1.0, 'f_savings_pct': -1.0, 'f_geographic_distance': 1.0}
+        def fo_get_sort_key(d):
+            lt_sort_key = []
+            for s_attribute in self.d_hotel_filter:
+                o_value = d_filter_to_get_value[s_attribute](d)
+                lt_sort_key.append((1, 0.0) if o_value is None else (0, d_filter_to_sign[s_attribute] * o_value))
+            return tuple(lt_sort_key)
+
+        # Return sorted metadata
+        return sorted(ld_hotel_metadata_decoded, key=fo_get_sort_key)
+
+
+    def _fetch_hotel_final_prices(self, ld_hotel_metadata_decoded):
+
+        # Fetch final prices one hotel at a time, on a driver checked out for the hotel
+        for d_hotel_metadata_decoded in ld_hotel_metadata_decoded:
+            with self.o_driver_pool.checkout():
+                f_final_price = self._fetch_with_checkpoint('hotrate_final_price', self._fetch_hotrate_final_price, d_hotel_metadata_decoded['d_hotel_metadata_hotrate']['s_hotel_url'])
+            d_hotel_metadata_decoded['d_hotel_metadata_hotrate']['d_hotel_additional_attributes'].update({
+                'f_final_price': f_final_price,
+            })
+
+        # Return decoded metadata
+        return ld_hotel_metadata_decoded
+
+
+    def _fetch_hotel_addresses(self, ld_hotel_metadata_decoded):
+
+        # Fetch addresses one hotel at a time, from the cache or on a driver checked out for the hotel
+        for d_hotel_metadata_decoded in ld_hotel_metadata_decoded:
+            s_hotel_url_normal = d_hotel_metadata_decoded['d_hotel_metadata_normal']['s_hotel_url']
+            d_hotel_address = {} if self.o_detail_cache is None else self.o_detail_cache.get(s_hotel_url_normal, ['s_hotel_address'])
+            if 's_hotel_address' not in d_hotel_address:
+                with self.o_driver_pool.checkout():
+                    d_hotel_address['s_hotel_address'] = self._fetch_with_checkpoint('normal_address', self._fetch_normal_address, s_hotel_url_normal)
+                if self.o_detail_cache is not None:
+                    self.o_detail_cache.set(s_hotel_url_normal, d_hotel_address)
+            d_hotel_metadata_decoded['d_hotel_metadata_normal']['d_hotel_additional_attributes'].update(d_hotel_address)
+
+        # Return decoded metadata
+        return ld_hotel_metadata_decoded
+
+
+    def _mark_metadata_by_filters(self, ld_hotel_metadata_decoded):
+
+        # Keep hotels in place, replacing those that do not meet filter criteria by None
+        si_hotel_ids_kept = set(id(d_hotel_metadata_decoded) for d_hotel_metadata_decoded in self.parse_metadata_by_filters(ld_hotel_metadata_decoded))
+        return [d_hotel_metadata_decoded if id(d_hotel_metadata_decoded) in si_hotel_ids_kept else None for d_hotel_metadata_decoded in ld_hotel_metadata_decoded]
+
+
+    def get_fetch_plan(self, b_fetch_final_price=True):
+
+        # Evaluate filters answered by primary metadata first, then fetch addresses and distances only for a distance filter or report,
+        # and final prices, the costliest field, only if asked and only for hotels that passed every filter
+        b_fetch_distance = self.s_geographic_goto_address is not None
+        return {
+            'ls_filters_primary': [] if self.d_hotel_filter is None else [s_attribute for s_attribute in self.d_hotel_filter if s_attribute != 'f_geographic_distance'],
+            'b_fetch_address': b_fetch_distance,
+            'b_fetch_distance': b_fetch_distance,
+            'b_fetch_final_price': b_fetch_final_price,
+        }
+
+
+    def get_hotel_metadata_final(self, ld_hotel_metadata_decoded):
+
+        # Resume from final metadata of an interrupted run if there is one
+        if self.o_checkpoint is not None:
+            ld_hotel_metadata_final = self.o_checkpoint.get_stage('final')
+            if ld_hotel_metadata_final is not None:
+                return ld_hotel_metadata_final
+
+        # Drop hotels that fail filters answered by primary metadata before fetching anything
+        ld_hotel_metadata_decoded = self.parse_metadata_by_filters(ld_hotel_metadata_decoded, self.d_fetch_plan['ls_filters_primary'])
+
+        # Run stages one after the other if asked, or if the closest hotels must be ranked across all hotels
+        if (not self.b_overlap_stages) or (self.i_maps_refine_top > 0) or (len(ld_hotel_metadata_decoded) == 0):
+
+            # Get hotel addresses and geographic metadata
+            if self.d_fetch_plan['b_fetch_address']:
+                with self.o_metrics.time_stage('addresses'):
+                    ld_hotel_metadata_decoded = self.get_hotel_addresses(ld_hotel_metadata_decoded)
+            if self.d_fetch_plan['b_fetch_distance']:
+                with self.o_metrics.time_stage('geographic'):
+                    ld_hotel_metadata_decoded = self.get_geographic_metadata(ld_hotel_metadata_decoded)
+
+            # Parse to keep only relevant data by filters
+            with self.o_metrics.time_stage('filters'):
+                ld_hotel_metadata_decoded = self.parse_metadata_by_filters(ld_hotel_metadata_decoded)
+
+            # Get final prices of remaining hotels
+            if self.d_fetch_plan['b_fetch_final_price']:
+                with self.o_metrics.time_stage('final_prices'):
+                    ld_hotel_metadata_decoded = self.get_hotel_final_prices(ld_hotel_metadata_decoded)
+
+        # Otherwise overlap stages, moving each hotel on as soon as its address, its distance, and then its filter outcome, is known
+        else:
+            i_browser_workers = self.o_driver_pool.i_workers if isinstance(self.o_driver_pool, DriverPool) else 1
+            self.o_driver_pool.start_drivers(i_browser_workers)
+            lt_stages = []
+            if self.d_fetch_plan['b_fetch_address']:
+                lt_stages.append((self._fetch_hotel_addresses, i_browser_workers, 1))
+            if self.d_fetch_plan['b_fetch_distance']:
+                lt_stages.append((self.get_geographic_metadata, 1, 25))
+            lt_stages.append((self._mark_metadata_by_filters, 1, 25))
+            if self.d_fetch_plan['b_fetch_final_price']:
+                lt_stages.append((self._fetch_hotel_final_prices, i_browser_workers, 1))
+            with self.o_metrics.time_stage('misc_geographic_overlapped'):
+                ld_hotel_metadata_decoded = run_pipeline(ld_hotel_metadata_decoded, lt_stages, s_description='Fetching Misc and Geographic Metadata')
+
+        # Checkpoint final metadata
+        if self.o_checkpoint is not None:
+            self.o_checkpoint.set_stage('final', ld_hotel_metadata_decoded)
+
+        # Return decoded metadata
+        return ld_hotel_metadata_decoded
+
+
+    def _open_search_results(self, s_search_query_url):
 
         # Open query page
-        self._open_page(s_search_query_url, s_error_page_text='Not found', i_wait_extra=15)
+        self._open_page(s_search_query_url, s_error_page_text='Not found', b_wait_network_idle=True)
 
-        # Apply hotel filter requirements
+        # Apply hotel filter requirements, dropping captured responses before each filter reruns the search,
+        # so that only those of the final filtered search are read
         if self.d_hotel_filter is not None:
             if 'f_hotel_class' in self.d_hotel_filter:
-                while True:
-                    try:
-                        self.o_driver.find_element(By.CLASS_NAME, 'star_rating_filter').click()
-                        for i_hotel_class_checkbox_idx in range(int(np.floor(5 - self.d_hotel_filter['f_hotel_class'])) + 1):
-                            o_hotel_class_element = self.o_driver.find_element(
-                                By.CLASS_NAME, 'star_rating_filter').find_elements(By.CLASS_NAME, 'ListBuilderItem')[i_hotel_class_checkbox_idx]
-                            if 'ListBuilderItem__disabled' in o_hotel_class_element.get_attribute('class'):
-                                continue
-                            o_hotel_class_element.find_element(By.CLASS_NAME, 'filter-text').click()
-                        self.o_driver.find_element(By.CLASS_NAME, 'star_rating_filter').click()
-                        break
-                    except:
-                        time.sleep(1)
-                        continue
+                self._clear_api_responses(b_wait_network_idle=True)
+                def fo_apply_hotel_class_filter():
+                    self.o_driver.find_element(By.CLASS_NAME, 'star_rating_filter').click()
+                    for i_hotel_class_checkbox_idx in range(int(np.floor(5 - self.d_hotel_filter['f_hotel_class'])) + 1):
+                        o_hotel_class_element = self.o_driver.find_element(
+                            By.CLASS_NAME, 'star_rating_filter').find_elements(By.CLASS_NAME, 'ListBuilderItem')[i_hotel_class_checkbox_idx]
+                        if 'ListBuilderItem__disabled' in o_hotel_class_element.get_attribute('class'):
+                            continue
+                        o_hotel_class_element.find_element(By.CLASS_NAME, 'filter-text').click()
+                    self.o_driver.find_element(By.CLASS_NAME, 'star_rating_filter').click()
+                retry_until(fo_apply_hotel_class_filter, 'hotel_filter')
             if 'f_guest_rating' in self.d_hotel_filter:
                 if self.d_hotel_filter['f_guest_rating'] >= 3.5:
+                    self._clear_api_responses(b_wait_network_idle=True)
                     self.o_driver.find_element(By.CLASS_NAME, 'guest_rating_filter').click()
-                    while True:
-                        try:
-                            self.o_driver.find_element(By.CLASS_NAME, 'guest_rating_filter').click()
-                            i_guest_rating_radiobutton_idx = min(int(np.ceil((5 - self.d_hotel_filter['f_guest_rating']) / 0.5)), 4)
-                            self.o_driver.find_element(By.CLASS_NAME, 'guest_rating_filter').find_elements(By.CLASS_NAME, 'label-text')[i_guest_rating_radiobutton_idx].click()
-                            break
-                        except:
-                            time.sleep(1)
-                            continue
+                    def fo_apply_guest_rating_filter():
+                        self.o_driver.find_element(By.CLASS_NAME, 'guest_rating_filter').click()
+                        i_guest_rating_radiobutton_idx = min(int(np.ceil((5 - self.d_hotel_filter['f_guest_rating']) / 0.5)), 4)
+                        self.o_driver.find_element(By.CLASS_NAME, 'guest_rating_filter').find_elements(By.CLASS_NAME, 'label-text')[i_guest_rating_radiobutton_idx].click()
+                    retry_until(fo_apply_guest_rating_filter, 'hotel_filter')
+
 
-        # Load all hotels
-        self.load_all_hotels()
+    def hack_hotwire_basic(self, s_search_query_url, b_for_advanced=False):
 
-        # Get primary hotel metadata
-        ld_hotel_metadata_hotrate, ld_hotel_metadata_normal = self.get_hotel_metadata_primary()
+        # Resume from primary metadata and matches of an interrupted run if there is one
+        t_hotel_metadata_primary = None if self.o_checkpoint is None else self.o_checkpoint.get_stage('primary')
+        if t_hotel_metadata_primary is None:
 
-        # Determine attribute matches
-        na_attribute_matches = self.get_attribute_matches(ld_hotel_metadata_hotrate, ld_hotel_metadata_normal)
+            # Open query page and apply hotel filter requirements
+            with self.o_metrics.time_stage('search_page'):
+                self._open_search_results(s_search_query_url)
+
+            # Load all hotels and get primary hotel metadata
+            with self.o_metrics.time_stage('primary'):
+                ld_hotel_metadata_hotrate, ld_hotel_metadata_normal = self.get_hotel_metadata_primary()
+
+            # Resolve hotrate hotels decoded in earlier runs, and determine attribute matches
+            with self.o_metrics.time_stage('matching'):
+                ld_hotel_metadata_decoded_known, ld_hotel_metadata_hotrate = self.parse_metadata_by_known_decodings(ld_hotel_metadata_hotrate, ld_hotel_metadata_normal)
+                o_attribute_matches = self.get_attribute_matches(ld_hotel_metadata_hotrate, ld_hotel_metadata_normal)
+
+            # Checkpoint primary metadata and matches
+            if self.o_checkpoint is not None:
+                self.o_checkpoint.set_stage('primary', (ld_hotel_metadata_decoded_known, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, o_attribute_matches))
+        else:
+            ld_hotel_metadata_decoded_known, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, o_attribute_matches = t_hotel_metadata_primary
 
         # Parse and get geographic metadata for basic search
-        ld_hotel_metadata_decoded = None
+        ld_hotel_metadata_decoded = ld_hotel_metadata_decoded_known
         if not b_for_advanced:
 
             # Parse to keep only relevant data by matches
-            ld_hotel_metadata_decoded = self.parse_metadata_by_matches(ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, na_attribute_matches)
-
-            # Get miscellaneous other metadata
-            ld_hotel_metadata_decoded = self.get_hotel_metadata_misc(ld_hotel_metadata_decoded)
+            ld_hotel_metadata_decoded_matched = self.parse_metadata_by_matches(ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, o_attribute_matches)
+            self._record_matched_decodings(ld_hotel_metadata_decoded_matched)
+            ld_hotel_metadata_decoded = ld_hotel_metadata_decoded_known + ld_hotel_metadata_decoded_matched
 
-            # Get geographic metadata
-            ld_hotel_metadata_decoded = self.get_geographic_metadata(ld_hotel_metadata_decoded)
-
-            # Parse to keep only relevant data by filters
-            ld_hotel_metadata_decoded = self.parse_metadata_by_filters(ld_hotel_metadata_decoded)
+            # Get miscellaneous and geographic metadata, and parse to keep only relevant data by filters
+            ld_hotel_metadata_decoded = self.get_hotel_metadata_final(ld_hotel_metadata_decoded)
 
             # Drop secondary metadata comparison attributes
             for d_hotel_metadata_decoded in ld_hotel_metadata_decoded:
@@ -643,7 +1122,7 @@ class HackingHotwire:
         d_hotel_metadata_granular = {
             'ld_hotel_metadata_hotrate': ld_hotel_metadata_hotrate, 
             'ld_hotel_metadata_normal': ld_hotel_metadata_normal, 
-            'na_attribute_matches': na_attribute_matches
+            'o_attribute_matches': o_attribute_matches
         }
 
         # Return hotel metadata and attribute matches
@@ -652,69 +1131,163 @@ class HackingHotwire:
 
     def hack_hotwire_advanced(self, s_search_query_url):
 
-        # Get attribute matches based on primary hotel metadata
-        _, d_hotel_metadata_granular = self.hack_hotwire_basic(s_search_query_url, b_for_advanced=True)
+        # Get attribute matches based on primary hotel metadata, and hotels decoded in earlier runs
+        ld_hotel_metadata_decoded_known, d_hotel_metadata_granular = self.hack_hotwire_basic(s_search_query_url, b_for_advanced=True)
 
-        # Add in secondary hotel metadata
-        ld_hotel_metadata_hotrate, ld_hotel_metadata_normal = self.get_hotel_metadata_secondary(**d_hotel_metadata_granular)
+        # Add in secondary hotel metadata, resuming from that of an interrupted run if there is one
+        t_hotel_metadata_secondary = None if self.o_checkpoint is None else self.o_checkpoint.get_stage('secondary')
+        if t_hotel_metadata_secondary is None:
+            with self.o_metrics.time_stage('secondary'):
+                ld_hotel_metadata_hotrate, ld_hotel_metadata_normal = self.get_hotel_metadata_secondary(**d_hotel_metadata_granular)
+            if self.o_checkpoint is not None:
+                self.o_checkpoint.set_stage('secondary', (ld_hotel_metadata_hotrate, ld_hotel_metadata_normal))
+        else:
+            ld_hotel_metadata_hotrate, ld_hotel_metadata_normal = t_hotel_metadata_secondary
 
         # Determine attribute matches
-        na_attribute_matches = self.get_attribute_matches(ld_hotel_metadata_hotrate, ld_hotel_metadata_normal)
+        with self.o_metrics.time_stage('matching'):
+            o_attribute_matches = self.get_attribute_matches(ld_hotel_metadata_hotrate, ld_hotel_metadata_normal)
 
         # Parse to keep only relevant data by matches
-        ld_hotel_metadata_decoded = self.parse_metadata_by_matches(ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, na_attribute_matches)
-
-        # Get miscellaneous other metadata
-        ld_hotel_metadata_decoded = self.get_hotel_metadata_misc(ld_hotel_metadata_decoded)
+        ld_hotel_metadata_decoded_matched = self.parse_metadata_by_matches(ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, o_attribute_matches)
+        self._record_matched_decodings(ld_hotel_metadata_decoded_matched)
+        ld_hotel_metadata_decoded = ld_hotel_metadata_decoded_known + ld_hotel_metadata_decoded_matched
 
-        # Get geographic metadata
-        ld_hotel_metadata_decoded = self.get_geographic_metadata(ld_hotel_metadata_decoded)
-
-        # Parse to keep only relevant data by filters
-        ld_hotel_metadata_decoded = self.parse_metadata_by_filters(ld_hotel_metadata_decoded)
+        # Get miscellaneous and geographic metadata, and parse to keep only relevant data by filters
+        ld_hotel_metadata_decoded = self.get_hotel_metadata_final(ld_hotel_metadata_decoded)
 
         # Return hotel metadata and attribute matches
         return ld_hotel_metadata_decoded
 
 
-    def hack_hotwire(self, s_search_query_url, s_hack_mode='basic', b_generate_report=False):
+    def hack_hotwire(self, s_search_query_url, s_hack_mode='basic', b_generate_report=False, b_close_when_done=True, b_fetch_final_price=True):
 
         # Check that arguments are valid
         assert s_hack_mode in ['basic', 'advanced'], \
             '\nError:\ts_hack_mode expected to be in [\'basic\', \'advanced\']'
 
-        # Get hotel metadata and attribute matches
-        if s_hack_mode == 'basic':
-            ld_hotel_metadata_decoded, _ = self.hack_hotwire_basic(s_search_query_url)
-        elif s_hack_mode == 'advanced':
-            ld_hotel_metadata_decoded = self.hack_hotwire_advanced(s_search_query_url)
-        self.o_driver.close()
-
-        # Sort hotels
-        d_filter_to_get_value = {
-            'f_hotel_class': lambda d: -d['d_hotel_metadata_normal']['d_hotel_comparison_attributes']['f_hotel_class'],
-            'f_guest_rating': lambda d: -d['d_hotel_metadata_normal']['d_hotel_comparison_attributes']['f_guest_rating'],
-            'f_savings_pct': lambda d: -d['d_hotel_metadata_hotrate']['d_hotel_additional_attributes']['f_savings_pct'],
-            'f_geographic_distance': lambda d: d['d_hotel_metadata_normal']['d_hotel_additional_attributes']['f_geographic_distance'],
-        }
-        ld_hotel_metadata_decoded = sorted(ld_hotel_metadata_decoded, key=lambda d: tuple(d_filter_to_get_value[k](d) for k in self.d_hotel_filter))
-
-        # Produce a report
-        if b_generate_report:
-            if not os.path.isdir('reports'):
-                os.makedirs('reports')
-            s_pdf_file_path = os.path.join('reports', f'{self.s_report_name}.pdf')
-            generate_report_pdf(s_search_query_url, self.d_hotel_filter, ld_hotel_metadata_decoded, s_pdf_file_path)
+        # Plan which fields to fetch for the filters and results, and start metrics and tracing of this query afresh
+        self.d_fetch_plan = self.get_fetch_plan(b_fetch_final_price)
+        self.o_metrics = Metrics()
+        if self.o_tracer is not None:
+            self.o_tracer.reset()
+
+        # Open checkpoint of this query, which holds the progress of an interrupted run if there was one
+        if self.s_checkpoint_dir is not None:
+            self.o_checkpoint = Checkpoint(self.s_checkpoint_dir, get_checkpoint_key(
+                s_search_query_url, s_hack_mode, self.d_hotel_filter, self.s_geographic_goto_address, b_fetch_final_price))
+
+        # Get hotel metadata and attribute matches, recording every wait
+        f_started_at = time.perf_counter()
+        try:
+            add_wait_observer(self.o_metrics.observe_wait)
+            try:
+                if s_hack_mode == 'basic':
+                    ld_hotel_metadata_decoded, _ = self.hack_hotwire_basic(s_search_query_url)
+                elif s_hack_mode == 'advanced':
+                    ld_hotel_metadata_decoded = self.hack_hotwire_advanced(s_search_query_url)
+            finally:
+                remove_wait_observer(self.o_metrics.observe_wait)
+            if b_close_when_done:
+                self.close()
+
+            # Sort hotels
+            ld_hotel_metadata_decoded = self.sort_metadata_by_filters(ld_hotel_metadata_decoded)
+
+            # Produce a report
+            if b_generate_report:
+                with self.o_metrics.time_stage('report'):
+                    if not os.path.isdir('reports'):
+                        os.makedirs('reports')
+                    s_pdf_file_path = os.path.join('reports', f'{self.s_report_name}.pdf')
+                    generate_report_pdf(s_search_query_url, self.d_hotel_filter, ld_hotel_metadata_decoded, s_pdf_file_path)
+
+            # Remove checkpoint, so that the next run of this query starts fresh
+            if self.o_checkpoint is not None:
+                self.o_checkpoint.remove()
+
+        except:
+
+            # Save progress made so far if the run stops, and count it as failed
+            if self.o_checkpoint is not None:
+                self.o_checkpoint.flush()
+            self.o_metrics.increment('runs_failed_total')
+            raise
+
+        finally:
+
+            # Write metrics and WebDriver command trace of the run, whether or not it finished, for tracking throughput and failures across runs
+            self.o_metrics.add_stage_seconds('total', time.perf_counter() - f_started_at)
+            if self.s_metrics_dir is not None:
+                self.o_metrics.write(os.path.join(self.s_metrics_dir, self.s_report_name))
+            if self.o_tracer is not None:
+                self.o_tracer.write(os.path.join(self.s_trace_dir, self.s_report_name))
 
         # Return hotel metadata and attribute matches
         return ld_hotel_metadata_decoded
 
 
+    def hack_hotwire_batch(self, ls_search_query_urls, s_hack_mode='basic', b_generate_report=False, b_fetch_final_price=True):
+
+        # Share decodings between queries, keeping them in memory if no cache file is used, while hotel details are shared only through the cache file
+        if self.o_decoding_index is None:
+            self.o_decoding_index = DecodingIndex(':memory:')
+
+        # Hack each query on the same browser session, naming its report after the query, and carrying on past queries that fail
+        s_report_name = self.s_report_name
+        ld_query_summaries = []
+        try:
+            for i_query_idx, s_search_query_url in enumerate(ls_search_query_urls):
+                print(f'Query {i_query_idx + 1} of {len(ls_search_query_urls)}:  {s_search_query_url}')
+                self.s_report_name = get_batch_report_name(s_report_name, s_search_query_url)
+                f_started_at = time.perf_counter()
+                try:
+                    ld_hotel_metadata_decoded = self.hack_hotwire(s_search_query_url, s_hack_mode, b_generate_report, b_close_when_done=False, b_fetch_final_price=b_fetch_final_price)
+                    s_error = None
+                except Exception as o_error:
+                    ld_hotel_metadata_decoded = []
+                    s_error = repr(o_error)
+                ld_query_summaries.append(get_query_summary(s_search_query_url, self.s_report_name, ld_hotel_metadata_decoded,
+                                                            time.perf_counter() - f_started_at, s_error, b_generate_report))
+        finally:
+            self.s_report_name = s_report_name
+            self.close()
+
+        # Write combined summary of every query next to the reports
+        write_batch_summary(ld_query_summaries, os.path.join('reports', f'{s_report_name}_summary'))
+        print(format_batch_summary(ld_query_summaries))
+
+        # Return query summaries
+        return ld_query_summaries
+
+
 def main():
 
-    # Initialize hotwire object, hack, and generate report
-    o_hh = HackingHotwire(S_REPORT_NAME, D_HOTEL_FILTER, S_GEOGRAPHIC_GOTO_ADDRESS)
-    o_hh.hack_hotwire(S_SEARCH_QUERY_URL, S_HACK_MODE, B_GENERATE_REPORT)
+    # Initialize hotwire object
+    o_hh = HackingHotwire(
+        S_REPORT_NAME, D_HOTEL_FILTER, S_GEOGRAPHIC_GOTO_ADDRESS,
+        s_extraction_mode=S_EXTRACTION_MODE,
+        i_browser_workers=I_BROWSER_WORKERS,
+        i_browser_tabs=I_BROWSER_TABS,
+        s_cache_file=S_CACHE_FILE,
+        s_distance_mode=S_DISTANCE_MODE,
+        i_maps_refine_top=I_MAPS_REFINE_TOP,
+        s_distance_matrix_url=S_DISTANCE_MATRIX_URL,
+        s_distance_matrix_api_key=S_DISTANCE_MATRIX_API_KEY,
+        s_browser_profile=S_BROWSER_PROFILE,
+        b_overlap_stages=B_OVERLAP_STAGES,
+        s_checkpoint_dir=S_CHECKPOINT_DIR,
+        s_metrics_dir=S_METRICS_DIR,
+        s_trace_dir=S_TRACE_DIR,
+        b_network_api_confirmed=B_NETWORK_API_CONFIRMED,
+    )
+
+    # Hack every query of a batch on one browser session if one is given, otherwise the single query
+    ls_search_query_urls = get_batch_search_query_urls(S_SEARCH_QUERY_URL, S_BATCH_QUERY_FILE, D_BATCH_DATE_RANGES)
+    if ls_search_query_urls is None:
+        o_hh.hack_hotwire(S_SEARCH_QUERY_URL, S_HACK_MODE, B_GENERATE_REPORT, b_fetch_final_price=B_FETCH_FINAL_PRICE)
+    else:
+        o_hh.hack_hotwire_batch(ls_search_query_urls, S_HACK_MODE, B_GENERATE_REPORT, B_FETCH_FINAL_PRICE)
 
 
 if __name__ == '__main__':
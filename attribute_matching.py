@@ -0,0 +1,270 @@
+# Do imports
+import collections as cl
+import numpy as np
+
+
+# Define attributes used to bucket normal hotels
+LS_INDEX_KEY_ATTRIBUTES = ['f_hotel_class', 'f_guest_rating']
+
+
+class AttributeMatches:
+
+
+    def __init__(self, ls_attributes, ti_shape, na_indptr, na_indices, na_masks):
+
+        # Store matches in compressed sparse row form, one uint16 mask of matched attributes per entry
+        self.ls_attributes = list(ls_attributes)
+        self.shape = tuple(ti_shape)
+        self.na_indptr = na_indptr
+        self.na_indices = na_indices
+        self.na_masks = na_masks
+
+
+    @classmethod
+    def from_entries(cls, ls_attributes, ti_shape, na_rows, na_cols, na_masks):
+
+        # Keep only entries where at least one attribute matched, ordered by row then column
+        na_keep = na_masks != 0
+        na_rows, na_cols, na_masks = na_rows[na_keep], na_cols[na_keep], na_masks[na_keep]
+        na_order = np.lexsort((na_cols, na_rows))
+        na_indptr = np.zeros(ti_shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(na_rows, minlength=ti_shape[0]), out=na_indptr[1:])
+        return cls(ls_attributes, ti_shape, na_indptr, na_cols[na_order].astype(np.int64), na_masks[na_order].astype(np.uint16))
+
+
+    def __len__(self):
+
+        # Return number of stored candidate entries
+        return len(self.na_indices)
+
+
+    def get_row_cols(self, i_row_idx):
+
+        # Return normal hotel indices with at least one matched attribute
+        return self.na_indices[self.na_indptr[i_row_idx]:self.na_indptr[i_row_idx + 1]]
+
+
+    def get_row_masks(self, i_row_idx):
+
+        # Return matched attribute masks aligned with get_row_cols
+        return self.na_masks[self.na_indptr[i_row_idx]:self.na_indptr[i_row_idx + 1]]
+
+
+    def get_mask(self, i_row_idx, i_col_idx):
+
+        # Return matched attribute mask for a single pair, zero if not a candidate
+        na_row_cols = self.get_row_cols(i_row_idx)
+        i_pos = int(np.searchsorted(na_row_cols, i_col_idx))
+        if (i_pos < len(na_row_cols)) and (na_row_cols[i_pos] == i_col_idx):
+            return int(self.get_row_masks(i_row_idx)[i_pos])
+        return 0
+
+
+    def get_matched_attributes(self, i_row_idx, i_col_idx):
+
+        # Return names of matched attributes for a single pair
+        i_mask = self.get_mask(i_row_idx, i_col_idx)
+        return [s_attribute for i_dep_idx, s_attribute in enumerate(self.ls_attributes) if i_mask & (1 << i_dep_idx)]
+
+
+    def to_dense(self):
+
+        # Expand into the dense float64 match tensor
+        na_attribute_matches = np.zeros((self.shape[0], self.shape[1], len(self.ls_attributes)))
+        na_rows = np.repeat(np.arange(self.shape[0]), np.diff(self.na_indptr))
+        na_attribute_matches[na_rows, self.na_indices] = (self.na_masks[:, None] >> np.arange(len(self.ls_attributes), dtype=np.uint16)) & 1
+        return na_attribute_matches
+
+
+def _encode_scalar_attribute(l_values):
+
+    # Assign each distinct value an integer code, with -1 marking missing values
+    d_vocabulary = {}
+    na_codes = np.full(len(l_values), -1, dtype=np.int64)
+    for i_hotel_idx, o_value in enumerate(l_values):
+        if o_value is None:
+            continue
+        if o_value != o_value:
+            na_codes[i_hotel_idx] = d_vocabulary.setdefault(object(), len(d_vocabulary))
+            continue
+        if isinstance(o_value, list):
+            o_value = tuple(o_value)
+        na_codes[i_hotel_idx] = d_vocabulary.setdefault(o_value, len(d_vocabulary))
+    return na_codes
+
+
+def _encode_bitset_attribute(l_values):
+
+    # Give every (item, occurrence) pair its own bit so that multiset equality becomes bitset equality
+    # List attributes are stored sorted, so multiset equality is the same as list equality
+    d_vocabulary = {}
+    lli_bits = []
+    for l_items in l_values:
+        if l_items is None:
+            lli_bits.append(None)
+            continue
+        d_item_counts = cl.Counter()
+        li_bits = []
+        for s_item in l_items:
+            li_bits.append(d_vocabulary.setdefault((s_item, d_item_counts[s_item]), len(d_vocabulary)))
+            d_item_counts[s_item] += 1
+        lli_bits.append(li_bits)
+
+    # Pack bits into 64-bit words
+    na_codes = np.full(len(l_values), -1, dtype=np.int64)
+    na_bits = np.zeros((len(l_values), max(1, (len(d_vocabulary) + 63) // 64)), dtype=np.uint64)
+    for i_hotel_idx, li_bits in enumerate(lli_bits):
+        if li_bits is None:
+            continue
+        na_codes[i_hotel_idx] = 0
+        for i_bit in li_bits:
+            na_bits[i_hotel_idx, i_bit // 64] |= np.uint64(1 << (i_bit % 64))
+    return na_codes, na_bits
+
+
+def encode_comparison_attributes(ls_attributes, ld_hotel_comparison_attributes):
+
+    # Encode each comparison attribute into an integer column; list attributes are additionally encoded as bitsets
+    na_codes = np.full((len(ld_hotel_comparison_attributes), len(ls_attributes)), -1, dtype=np.int64)
+    d_bitsets = {}
+    for i_dep_idx, s_attribute in enumerate(ls_attributes):
+        l_values = [d_hotel_comparison_attributes[s_attribute] for d_hotel_comparison_attributes in ld_hotel_comparison_attributes]
+        if s_attribute.startswith('ls_'):
+            na_codes[:, i_dep_idx], d_bitsets[i_dep_idx] = _encode_bitset_attribute(l_values)
+        else:
+            na_codes[:, i_dep_idx] = _encode_scalar_attribute(l_values)
+
+    # Return encoded attributes
+    return na_codes, d_bitsets
+
+
+def _get_attribute_match_block(na_codes_hotrate, d_bitsets_hotrate, na_codes_normal, d_bitsets_normal):
+
+    # Missing values act as wildcards
+    na_present = (na_codes_hotrate[:, None, :] >= 0) & (na_codes_normal[None, :, :] >= 0)
+    na_equal = na_codes_hotrate[:, None, :] == na_codes_normal[None, :, :]
+    for i_dep_idx in d_bitsets_hotrate:
+        na_equal[:, :, i_dep_idx] = (d_bitsets_hotrate[i_dep_idx][:, None, :] == d_bitsets_normal[i_dep_idx][None, :, :]).all(axis=2)
+
+    # Any present but differing attribute rules out the pair entirely
+    na_conflict = (na_present & ~na_equal).any(axis=2)
+    return na_present & na_equal & ~na_conflict[:, :, None]
+
+
+def get_attribute_match_tensor(na_codes_hotrate, d_bitsets_hotrate, na_codes_normal, d_bitsets_normal, i_chunk_rows=64):
+
+    # Compare encoded attributes with broadcasting, a chunk of hotrate rows at a time
+    i_hotrate, i_attributes = na_codes_hotrate.shape
+    i_normal = na_codes_normal.shape[0]
+    na_attribute_matches = np.zeros((i_hotrate, i_normal, i_attributes))
+    for i_row_start in range(0, i_hotrate, i_chunk_rows):
+        i_row_end = min(i_row_start + i_chunk_rows, i_hotrate)
+        na_attribute_matches[i_row_start:i_row_end] = _get_attribute_match_block(
+            na_codes_hotrate[i_row_start:i_row_end], {k: v[i_row_start:i_row_end] for k, v in d_bitsets_hotrate.items()},
+            na_codes_normal, d_bitsets_normal)
+
+    # Return match tensor
+    return na_attribute_matches
+
+
+def build_candidate_index(na_codes_normal, li_key_idxs):
+
+    # Bucket normal hotels by the codes of the key attributes, keeping missing values as their own bucket
+    d_candidate_index = cl.defaultdict(list)
+    for i_col_idx, ti_key in enumerate(map(tuple, na_codes_normal[:, li_key_idxs].tolist())):
+        d_candidate_index[ti_key].append(i_col_idx)
+    return {ti_key: np.array(li_col_idxs, dtype=np.int64) for ti_key, li_col_idxs in d_candidate_index.items()}
+
+
+def get_candidate_cols(d_candidate_index, ti_key):
+
+    # Look up the exact bucket and every bucket that is missing some of the key values
+    # A hotrate hotel missing a key value falls back to all buckets for that key
+    lna_col_idxs = [na_col_idxs for ti_bucket_key, na_col_idxs in d_candidate_index.items()
+                    if all((i_code < 0) or (i_bucket_code < 0) or (i_code == i_bucket_code) for i_code, i_bucket_code in zip(ti_key, ti_bucket_key))]
+    if len(lna_col_idxs) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.sort(np.concatenate(lna_col_idxs))
+
+
+def get_attribute_match_entries(na_codes_hotrate, d_bitsets_hotrate, na_codes_normal, d_bitsets_normal, li_key_idxs, i_chunk_rows=64):
+
+    # Check that attribute masks fit
+    i_attributes = na_codes_hotrate.shape[1]
+    assert i_attributes <= 16, \
+        '\nError:\tat most 16 comparison attributes can be matched'
+    na_bit_values = (1 << np.arange(i_attributes)).astype(np.uint16)
+
+    # Group hotrate hotels sharing the same key so each group is compared against its candidate bucket only
+    d_candidate_index = build_candidate_index(na_codes_normal, li_key_idxs)
+    d_row_groups = cl.defaultdict(list)
+    for i_row_idx, ti_key in enumerate(map(tuple, na_codes_hotrate[:, li_key_idxs].tolist())):
+        d_row_groups[ti_key].append(i_row_idx)
+
+    # Find matching (row, col, mask) entries group by group
+    lna_rows, lna_cols, lna_masks = [], [], []
+    for ti_key, li_row_idxs in d_row_groups.items():
+        na_col_idxs = get_candidate_cols(d_candidate_index, ti_key)
+        if len(na_col_idxs) == 0:
+            continue
+        d_bitsets_candidates = {k: v[na_col_idxs] for k, v in d_bitsets_normal.items()}
+        for i_row_start in range(0, len(li_row_idxs), i_chunk_rows):
+            na_row_idxs = np.array(li_row_idxs[i_row_start:i_row_start + i_chunk_rows], dtype=np.int64)
+            na_masks = _get_attribute_match_block(
+                na_codes_hotrate[na_row_idxs], {k: v[na_row_idxs] for k, v in d_bitsets_hotrate.items()},
+                na_codes_normal[na_col_idxs], d_bitsets_candidates).astype(np.uint16) @ na_bit_values
+            na_row_pos, na_col_pos = np.nonzero(na_masks)
+            lna_rows.append(na_row_idxs[na_row_pos])
+            lna_cols.append(na_col_idxs[na_col_pos])
+            lna_masks.append(na_masks[na_row_pos, na_col_pos])
+
+    # Return entries sorted by row then column
+    if len(lna_rows) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint16)
+    na_rows, na_cols, na_masks = np.concatenate(lna_rows), np.concatenate(lna_cols), np.concatenate(lna_masks).astype(np.uint16)
+    na_order = np.lexsort((na_cols, na_rows))
+    return na_rows[na_order], na_cols[na_order], na_masks[na_order]
+
+
+def get_attribute_matches_loop(ls_attributes, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal):
+
+    # Find attribute matches with the original pure python loop, kept as a reference implementation
+    na_attribute_matches = np.zeros((len(ld_hotel_metadata_hotrate), len(ld_hotel_metadata_normal), len(ls_attributes)))
+    for i_row_idx, d_hotel_metadata_hotrate in enumerate(ld_hotel_metadata_hotrate):
+        for i_col_idx, d_hotel_metadata_normal in enumerate(ld_hotel_metadata_normal):
+            for i_dep_idx, s_attribute in enumerate(ls_attributes):
+                if ((d_hotel_metadata_hotrate['d_hotel_comparison_attributes'][s_attribute] is None) or
+                    (d_hotel_metadata_normal['d_hotel_comparison_attributes'][s_attribute] is None)):
+                    continue
+                elif d_hotel_metadata_hotrate['d_hotel_comparison_attributes'][s_attribute] == d_hotel_metadata_normal['d_hotel_comparison_attributes'][s_attribute]:
+                        na_attribute_matches[i_row_idx, i_col_idx, i_dep_idx] = 1
+                elif d_hotel_metadata_hotrate['d_hotel_comparison_attributes'][s_attribute] != d_hotel_metadata_normal['d_hotel_comparison_attributes'][s_attribute]:
+                        na_attribute_matches[i_row_idx, i_col_idx, :] = 0
+                        break
+
+    # Return match matrix
+    return na_attribute_matches
+
+
+def get_attribute_matches_sparse(ls_attributes, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, ls_key_attributes=None):
+
+    # Encode hotrate and normal hotels against a shared vocabulary
+    na_codes, d_bitsets = encode_comparison_attributes(
+        ls_attributes, [d['d_hotel_comparison_attributes'] for d in ld_hotel_metadata_hotrate + ld_hotel_metadata_normal])
+    i_hotrate = len(ld_hotel_metadata_hotrate)
+
+    # Find matching entries via the candidate index
+    ls_key_attributes = LS_INDEX_KEY_ATTRIBUTES if ls_key_attributes is None else ls_key_attributes
+    na_rows, na_cols, na_masks = get_attribute_match_entries(
+        na_codes[:i_hotrate], {k: v[:i_hotrate] for k, v in d_bitsets.items()},
+        na_codes[i_hotrate:], {k: v[i_hotrate:] for k, v in d_bitsets.items()},
+        [ls_attributes.index(s_attribute) for s_attribute in ls_key_attributes if s_attribute in ls_attributes])
+
+    # Return sparse matches
+    return AttributeMatches.from_entries(ls_attributes, (i_hotrate, len(ld_hotel_metadata_normal)), na_rows, na_cols, na_masks)
+
+
+def get_attribute_matches_vectorized(ls_attributes, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, ls_key_attributes=None):
+
+    # Return match tensor
+    return get_attribute_matches_sparse(ls_attributes, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, ls_key_attributes).to_dense()
@@ -0,0 +1,143 @@
+# Do imports
+import os
+import re
+import csv
+import json
+import datetime
+from urllib.parse import quote, unquote
+
+
+# Define format of dates in search query urls
+S_QUERY_DATE_FORMAT = '%m-%d-%Y'
+
+
+def read_search_query_urls(s_query_file):
+
+    # Read one search query url per line, skipping blank lines and comments
+    with open(s_query_file) as o_file:
+        return [s_line.strip() for s_line in o_file if (s_line.strip() != '') and (not s_line.strip().startswith('#'))]
+
+
+def get_search_query_urls_by_dates(s_search_query_url, s_first_start_date, i_nights=1, i_date_ranges=1, i_step_days=1, ls_destinations=None):
+
+    # Check that arguments are valid
+    assert (i_nights >= 1) and (i_date_ranges >= 1) and (i_step_days >= 1), \
+        '\nError:\ti_nights, i_date_ranges and i_step_days expected to be in [1, inf)'
+
+    # Vary the destination and dates of a search query url, keeping its other parameters and their order
+    o_first_start_date = datetime.datetime.strptime(s_first_start_date, S_QUERY_DATE_FORMAT)
+    ls_search_query_urls = []
+    for s_destination in [None] if ls_destinations is None else ls_destinations:
+        s_search_query_url_destination = s_search_query_url if s_destination is None else \
+            re.sub(r'destination=[^&]*', lambda _: f'destination={quote(s_destination, safe="")}', s_search_query_url)
+        for i_date_range_idx in range(i_date_ranges):
+            o_start_date = o_first_start_date + datetime.timedelta(days=i_date_range_idx * i_step_days)
+            o_end_date = o_start_date + datetime.timedelta(days=i_nights)
+            s_search_query_url_dates = re.sub(r'startDate=[^&]*', f'startDate={o_start_date.strftime(S_QUERY_DATE_FORMAT)}', s_search_query_url_destination)
+            ls_search_query_urls.append(re.sub(r'endDate=[^&]*', f'endDate={o_end_date.strftime(S_QUERY_DATE_FORMAT)}', s_search_query_url_dates))
+
+    # Return search query urls
+    return ls_search_query_urls
+
+
+def get_batch_search_query_urls(s_search_query_url, s_batch_query_file=None, d_batch_date_ranges=None):
+
+    # Collect queries of a batch from a file and from date ranges, or return None if no batch is asked for
+    if (s_batch_query_file is None) and (d_batch_date_ranges is None):
+        return None
+    ls_search_query_urls = []
+    if s_batch_query_file is not None:
+        ls_search_query_urls.extend(read_search_query_urls(s_batch_query_file))
+    if d_batch_date_ranges is not None:
+        ls_search_query_urls.extend(get_search_query_urls_by_dates(s_search_query_url, **d_batch_date_ranges))
+    assert len(ls_search_query_urls) > 0, \
+        '\nError:\tbatch expected to contain at least one search query url'
+
+    # Return queries in order, each once
+    return list(dict.fromkeys(ls_search_query_urls))
+
+
+def get_query_details(s_search_query_url):
+
+    # Read destination and dates of a search query url
+    d_query_details = {}
+    for s_parameter, s_key in [('destination', 's_destination'), ('startDate', 's_start_date'), ('endDate', 's_end_date')]:
+        o_match = re.search(f'{s_parameter}=([^&]*)', s_search_query_url)
+        d_query_details[s_key] = None if o_match is None else unquote(o_match.group(1))
+    return d_query_details
+
+
+def get_batch_report_name(s_report_name, s_search_query_url):
+
+    # Name a query's report after the batch, its destination and its dates, e.g. 'vacation_(Los_Angeles_2024.06.29_to_2024.06.30)'
+    d_query_details = get_query_details(s_search_query_url)
+    ls_dates = []
+    for s_date in [d_query_details['s_start_date'], d_query_details['s_end_date']]:
+        try:
+            ls_dates.append(datetime.datetime.strptime(s_date, S_QUERY_DATE_FORMAT).strftime('%Y.%m.%d'))
+        except:
+            ls_dates.append(str(s_date))
+    s_query_name = f'{d_query_details["s_destination"]}_{ls_dates[0]}_to_{ls_dates[1]}'
+    return f'{s_report_name}_({re.sub(r"[^A-Za-z0-9.-]+", "_", s_query_name)})'
+
+
+def get_query_summary(s_search_query_url, s_report_name, ld_hotel_metadata_decoded, f_wall_s, s_error=None, b_generate_report=False, i_top_deals=5):
+
+    # Summarize the best deals of a query, which come first once hotels are sorted by the filters
+    ld_top_deals = []
+    for d_hotel_metadata_decoded in ld_hotel_metadata_decoded[:i_top_deals]:
+        d_hotel_additional_attributes_hotrate = d_hotel_metadata_decoded['d_hotel_metadata_hotrate']['d_hotel_additional_attributes']
+        d_hotel_metadata_normal = d_hotel_metadata_decoded['d_hotel_metadata_normal']
+        ld_top_deals.append({
+            's_hotel_name': d_hotel_metadata_normal['d_hotel_additional_attributes']['s_hotel_name'],
+            'f_hotel_class': d_hotel_metadata_normal['d_hotel_comparison_attributes']['f_hotel_class'],
+            'f_guest_rating': d_hotel_metadata_normal['d_hotel_comparison_attributes']['f_guest_rating'],
+            'i_sale_price': d_hotel_additional_attributes_hotrate['i_sale_price'],
+            'f_final_price': d_hotel_additional_attributes_hotrate['f_final_price'],
+            'f_savings_pct': d_hotel_additional_attributes_hotrate['f_savings_pct'],
+            'f_geographic_distance': d_hotel_metadata_normal['d_hotel_additional_attributes']['f_geographic_distance'],
+            's_hotel_url_hotrate': d_hotel_metadata_decoded['d_hotel_metadata_hotrate']['s_hotel_url'],
+            's_hotel_url_normal': d_hotel_metadata_normal['s_hotel_url'],
+        })
+
+    # Return query summary
+    return dict(get_query_details(s_search_query_url), **{
+        's_search_query_url': s_search_query_url,
+        's_report_file': os.path.join('reports', f'{s_report_name}.pdf') if b_generate_report and (s_error is None) else None,
+        'i_hotels_decoded': len(ld_hotel_metadata_decoded),
+        'f_wall_s': round(f_wall_s, 3),
+        's_error': s_error,
+        'ld_top_deals': ld_top_deals,
+    })
+
+
+def write_batch_summary(ld_query_summaries, s_file_path_base):
+
+    # Write full summary as JSON, and one row per query with its best deal as CSV
+    if os.path.dirname(s_file_path_base) != '':
+        os.makedirs(os.path.dirname(s_file_path_base), exist_ok=True)
+    with open(f'{s_file_path_base}.json', 'w') as o_file:
+        json.dump(ld_query_summaries, o_file, indent=2)
+    ls_columns = ['s_destination', 's_start_date', 's_end_date', 'i_hotels_decoded', 'f_wall_s', 's_error', 's_report_file',
+                  's_hotel_name', 'f_hotel_class', 'f_guest_rating', 'i_sale_price', 'f_final_price', 'f_savings_pct', 'f_geographic_distance', 's_hotel_url_hotrate']
+    with open(f'{s_file_path_base}.csv', 'w', newline='') as o_file:
+        o_writer = csv.DictWriter(o_file, fieldnames=ls_columns, extrasaction='ignore')
+        o_writer.writeheader()
+        for d_query_summary in ld_query_summaries:
+            o_writer.writerow(dict(d_query_summary, **(d_query_summary['ld_top_deals'][0] if len(d_query_summary['ld_top_deals']) > 0 else {})))
+
+
+def format_batch_summary(ld_query_summaries):
+
+    # Render one line per query with its best deal
+    ls_lines = [f'{"destination":<24}{"dates":<26}{"decoded":>8}{"seconds":>10}   best deal']
+    for d in ld_query_summaries:
+        if d['s_error'] is not None:
+            s_best_deal = f'failed: {d["s_error"]}'
+        elif len(d['ld_top_deals']) == 0:
+            s_best_deal = '-'
+        else:
+            d_top_deal = d['ld_top_deals'][0]
+            s_best_deal = f'{d_top_deal["s_hotel_name"]}, ${d_top_deal["i_sale_price"]}, {d_top_deal["f_savings_pct"]}% off'
+        ls_lines.append(f'{str(d["s_destination"])[:23]:<24}{str(d["s_start_date"]) + " to " + str(d["s_end_date"]):<26}{d["i_hotels_decoded"]:>8}{d["f_wall_s"]:>10.1f}   {s_best_deal}')
+    return '\n'.join(ls_lines)
@@ -0,0 +1,64 @@
+# Do imports
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+
+# Do local imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from attribute_matching import encode_comparison_attributes, get_attribute_match_tensor, get_attribute_matches_loop, get_attribute_matches_sparse
+from synthetic_metadata import generate_hotel_metadata
+
+
+def main():
+
+    # Parse arguments
+    o_parser = argparse.ArgumentParser(description='Benchmark the vectorized attribute matching engine against the original loop')
+    o_parser.add_argument('--hotrate', type=int, default=1000)
+    o_parser.add_argument('--normal', type=int, default=10000)
+    o_parser.add_argument('--loop-rows', type=int, default=10, help='Hotrate rows timed with the loop; the full loop time is extrapolated')
+    o_parser.add_argument('--none-rate', type=float, default=0.05)
+    o_parser.add_argument('--seed', type=int, default=0)
+    o_args = o_parser.parse_args()
+
+    # Generate synthetic metadata
+    ls_attributes, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal = generate_hotel_metadata(
+        o_args.hotrate, o_args.normal, f_none_rate=o_args.none_rate, i_seed=o_args.seed)
+
+    # Time dense broadcasting over every pair
+    f_start = time.perf_counter()
+    na_codes, d_bitsets = encode_comparison_attributes(
+        ls_attributes, [d['d_hotel_comparison_attributes'] for d in ld_hotel_metadata_hotrate + ld_hotel_metadata_normal])
+    na_attribute_matches_dense = get_attribute_match_tensor(
+        na_codes[:o_args.hotrate], {k: v[:o_args.hotrate] for k, v in d_bitsets.items()},
+        na_codes[o_args.hotrate:], {k: v[o_args.hotrate:] for k, v in d_bitsets.items()})
+    f_dense_s = time.perf_counter() - f_start
+
+    # Time vectorized engine with the candidate index and sparse output
+    f_start = time.perf_counter()
+    o_attribute_matches = get_attribute_matches_sparse(ls_attributes, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal)
+    f_vectorized_s = time.perf_counter() - f_start
+    i_sparse_bytes = o_attribute_matches.na_indptr.nbytes + o_attribute_matches.na_indices.nbytes + o_attribute_matches.na_masks.nbytes
+    na_attribute_matches = o_attribute_matches.to_dense()
+
+    # Time loop over a subset of rows and check the outputs are identical there
+    i_loop_rows = min(o_args.loop_rows, o_args.hotrate)
+    f_start = time.perf_counter()
+    na_attribute_matches_loop = get_attribute_matches_loop(ls_attributes, ld_hotel_metadata_hotrate[:i_loop_rows], ld_hotel_metadata_normal)
+    f_loop_s = (time.perf_counter() - f_start) * o_args.hotrate / max(i_loop_rows, 1)
+    b_identical = (np.array_equal(na_attribute_matches[:i_loop_rows], na_attribute_matches_loop) and np.array_equal(na_attribute_matches, na_attribute_matches_dense) and
+                   (na_attribute_matches.dtype == na_attribute_matches_loop.dtype))
+
+    # Report results
+    print(f'Scale:            {o_args.hotrate} hotrate x {o_args.normal} normal x {len(ls_attributes)} attributes')
+    print(f'Loop (extrap.):   {f_loop_s:.2f} s  (timed on {i_loop_rows} rows)')
+    print(f'Dense broadcast:  {f_dense_s:.2f} s  ({f_loop_s / f_dense_s:.1f}x)')
+    print(f'Indexed sparse:   {f_vectorized_s:.2f} s  ({f_loop_s / f_vectorized_s:.1f}x)')
+    print(f'Memory:           {na_attribute_matches_dense.nbytes / 1e6:.1f} MB dense, {i_sparse_bytes / 1e6:.3f} MB sparse ({len(o_attribute_matches)} entries)')
+    print(f'Bit-identical:    {b_identical}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+# Do imports
+import os
+import sys
+import glob
+import time
+import argparse
+import threading
+import numpy as np
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+
+# Do optional imports, psutil being needed to read browser memory outside Linux
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# Do local imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from browser_profile import S_BROWSER_BINARY_PATH, S_DRIVER_EXECUTABLE_PATH, create_driver
+from waiting import wait_for_dom_ready
+
+
+class QuietRequestHandler(SimpleHTTPRequestHandler):
+
+
+    def log_message(self, *args):
+
+        # Do not log every fixture request
+        pass
+
+
+def get_rss_source():
+
+    # Return where browser memory is read from, or None if it cannot be read on this platform
+    if psutil is not None:
+        return 'psutil'
+    if os.path.isdir('/proc'):
+        return '/proc'
+    return None
+
+
+def get_driver_rss_bytes(o_driver):
+
+    # Sum resident memory of the driver process and every browser process it started, returning None if it cannot be read
+    i_pid_root = o_driver.service.process.pid
+    s_rss_source = get_rss_source()
+    if s_rss_source == 'psutil':
+        try:
+            o_process_root = psutil.Process(i_pid_root)
+            lo_processes = [o_process_root] + o_process_root.children(recursive=True)
+        except psutil.Error:
+            return None
+        i_rss_bytes = 0
+        for o_process in lo_processes:
+            try:
+                i_rss_bytes += o_process.memory_info().rss
+            except psutil.Error:
+                continue
+        return i_rss_bytes
+    if s_rss_source is None:
+        return None
+
+    # Without psutil, find descendant processes and their resident memory in /proc
+    d_pid_to_parent = {}
+    for s_pid in filter(str.isdigit, os.listdir('/proc')):
+        try:
+            with open(f'/proc/{s_pid}/stat') as o_file:
+                d_pid_to_parent[int(s_pid)] = int(o_file.read().rsplit(')', 1)[1].split()[1])
+        except:
+            continue
+    si_pids = {i_pid_root}
+    while True:
+        si_pids_children = {i_pid for i_pid, i_pid_parent in d_pid_to_parent.items() if (i_pid_parent in si_pids) and (i_pid not in si_pids)}
+        if len(si_pids_children) == 0:
+            break
+        si_pids |= si_pids_children
+    i_rss_bytes = 0
+    for i_pid in si_pids:
+        try:
+            with open(f'/proc/{i_pid}/status') as o_file:
+                i_rss_bytes += 1024 * int(next(s_line for s_line in o_file if s_line.startswith('VmRSS:')).split()[1])
+        except:
+            continue
+    return i_rss_bytes
+
+
+def record_fixtures(ls_urls, s_fixtures_dir, s_browser_binary_path, s_driver_executable_path):
+
+    # Save rendered page sources with the full profile, so that replays request the same resources
+    os.makedirs(s_fixtures_dir, exist_ok=True)
+    o_driver = create_driver('full', s_browser_binary_path, s_driver_executable_path)
+    try:
+        for i_url_idx, s_url in enumerate(ls_urls):
+            o_driver.get(s_url)
+            wait_for_dom_ready(o_driver)
+            with open(os.path.join(s_fixtures_dir, f'fixture_{i_url_idx:03d}.html'), 'w', encoding='utf-8') as o_file:
+                o_file.write(o_driver.page_source)
+    finally:
+        o_driver.quit()
+
+
+def benchmark_profile(s_browser_profile, ls_fixture_urls, i_repeats, s_browser_binary_path, s_driver_executable_path):
+
+    # Load every fixture, timing each page load and sampling browser memory after it
+    o_driver = create_driver(s_browser_profile, s_browser_binary_path, s_driver_executable_path)
+    lf_load_s = []
+    li_rss_bytes = []
+    try:
+        for _ in range(i_repeats):
+            for s_fixture_url in ls_fixture_urls:
+                f_start = time.perf_counter()
+                o_driver.get(s_fixture_url)
+                wait_for_dom_ready(o_driver)
+                lf_load_s.append(time.perf_counter() - f_start)
+                li_rss_bytes.append(get_driver_rss_bytes(o_driver))
+    finally:
+        o_driver.quit()
+
+    # Return latencies, and memory samples unless memory could not be read
+    return np.array(lf_load_s), None if None in li_rss_bytes else np.array(li_rss_bytes)
+
+
+def main():
+
+    # Parse arguments
+    o_parser = argparse.ArgumentParser(description='Benchmark page load latency and browser memory of the full and lean browser profiles on recorded fixtures')
+    o_parser.add_argument('--fixtures-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures'))
+    o_parser.add_argument('--record', nargs='+', metavar='URL', help='Record the given pages into the fixtures directory before benchmarking')
+    o_parser.add_argument('--repeats', type=int, default=3)
+    o_parser.add_argument('--browser-binary', default=S_BROWSER_BINARY_PATH)
+    o_parser.add_argument('--driver-executable', default=S_DRIVER_EXECUTABLE_PATH)
+    o_args = o_parser.parse_args()
+
+    # Record fixtures if asked
+    if o_args.record is not None:
+        record_fixtures(o_args.record, o_args.fixtures_dir, o_args.browser_binary, o_args.driver_executable)
+    ls_fixture_names = sorted(os.path.basename(s_path) for s_path in glob.glob(os.path.join(o_args.fixtures_dir, '*.html')))
+    assert len(ls_fixture_names) > 0, \
+        f'\nError:\tno .html fixtures found in {o_args.fixtures_dir}, record some with --record URL [URL ...]'
+
+    # Serve fixtures locally
+    o_server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietRequestHandler, directory=o_args.fixtures_dir))
+    threading.Thread(target=o_server.serve_forever, daemon=True).start()
+    ls_fixture_urls = [f'http://127.0.0.1:{o_server.server_port}/{s_fixture_name}' for s_fixture_name in ls_fixture_names]
+
+    # Benchmark each profile, stating where memory is read from, or that it is not measured
+    print(f'Fixtures:  {len(ls_fixture_names)} pages x {o_args.repeats} repeats')
+    s_rss_source = get_rss_source()
+    print('Memory:    ' + ('not measured, install psutil (pip install psutil) to read browser memory on this platform' if s_rss_source is None else f'read with {s_rss_source}'))
+    try:
+        for s_browser_profile in ['full', 'lean']:
+            na_load_s, na_rss_bytes = benchmark_profile(s_browser_profile, ls_fixture_urls, o_args.repeats, o_args.browser_binary, o_args.driver_executable)
+            s_rss = 'rss n/a' if na_rss_bytes is None else f'rss mean {na_rss_bytes.mean() / 1e6:.0f} MB, max {na_rss_bytes.max() / 1e6:.0f} MB'
+            print(f'{s_browser_profile:<5}      load p50 {np.median(na_load_s):.3f} s, p90 {np.percentile(na_load_s, 90):.3f} s, '
+                  f'mean {na_load_s.mean():.3f} s; {s_rss}')
+    finally:
+        o_server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
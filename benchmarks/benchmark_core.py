@@ -0,0 +1,184 @@
+# Do imports
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import subprocess
+import numpy as np
+
+
+# Do local imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from HackingHotwire import HackingHotwire
+from hotel_records import HotelComparisonAttributes, HotelAdditionalAttributes, HotelRecord
+from synthetic_metadata import generate_hotel_metadata
+
+
+# Define default scales, as hotrate x normal hotels, and the filter hotels are checked and sorted against
+LS_SCALES = ['100x1000', '500x5000', '1000x10000', '5000x50000']
+D_HOTEL_FILTER = {'f_hotel_class': 3.0, 'f_guest_rating': 3.5, 'f_savings_pct': 10.0, 'f_geographic_distance': 30.0}
+S_GEOGRAPHIC_GOTO_ADDRESS = '200 N Spring St, Los Angeles, CA 90012'
+S_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+class OfflineHackingHotwire(HackingHotwire):
+
+
+    def _create_driver(self, b_capture_network=False):
+
+        # Run without a browser, as the matching and filtering core never touches one
+        return None
+
+
+def get_hotel_records(ld_hotel_metadata):
+
+    # Turn synthetic metadata dicts into the records primary metadata is stored in
+    return [HotelRecord(
+        s_hotel_url=d['s_hotel_url'],
+        d_hotel_comparison_attributes=HotelComparisonAttributes(**d['d_hotel_comparison_attributes']),
+        d_hotel_additional_attributes=HotelAdditionalAttributes(**d['d_hotel_additional_attributes']),
+    ) for d in ld_hotel_metadata]
+
+
+def get_git_commit():
+
+    # Return short hash of the checked out commit, marking uncommitted changes, or None outside a git checkout
+    s_repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        s_commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=s_repo_dir, capture_output=True, text=True, check=True).stdout.strip()
+        b_dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=s_repo_dir, capture_output=True, text=True, check=True).stdout.strip() != ''
+    except:
+        return None
+    return f'{s_commit}-dirty' if b_dirty else s_commit
+
+
+def benchmark_function(fo_function, i_repeats):
+
+    # Warm up once, time repeated calls, then measure peak memory of one more call separately, since tracing allocations slows it down
+    fo_function()
+    lf_seconds = []
+    for _ in range(i_repeats):
+        f_start = time.perf_counter()
+        o_output = fo_function()
+        lf_seconds.append(time.perf_counter() - f_start)
+    tracemalloc.start()
+    fo_function()
+    _, i_peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Return timings, peak memory and output of the last timed call
+    return {'f_min_s': round(min(lf_seconds), 6), 'f_median_s': round(float(np.median(lf_seconds)), 6), 'i_peak_bytes': i_peak_bytes}, o_output
+
+
+def benchmark_scale(o_hh, i_hotrate, i_normal, f_none_rate, i_amenities, i_repeats, i_seed):
+
+    # Generate synthetic metadata, with secondary ratings as advanced mode would have them
+    _, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal = generate_hotel_metadata(
+        i_hotrate, i_normal, f_none_rate=f_none_rate, i_amenities=i_amenities, b_secondary=True, i_seed=i_seed)
+
+    # Give every normal hotel a price, as normal hotel cards always show one
+    o_rng = np.random.default_rng(i_seed)
+    for d_hotel_metadata_normal in ld_hotel_metadata_normal:
+        if d_hotel_metadata_normal['d_hotel_comparison_attributes']['i_list_price'] is None:
+            d_hotel_metadata_normal['d_hotel_comparison_attributes']['i_list_price'] = int(o_rng.integers(60, 600))
+            d_hotel_metadata_normal['d_hotel_additional_attributes']['i_sale_price'] = d_hotel_metadata_normal['d_hotel_comparison_attributes']['i_list_price']
+    ld_hotel_metadata_hotrate = get_hotel_records(ld_hotel_metadata_hotrate)
+    ld_hotel_metadata_normal = get_hotel_records(ld_hotel_metadata_normal)
+
+    # Time each stage of the core on the output of the one before
+    d_functions = {}
+    d_functions['get_attribute_matches'], o_attribute_matches = benchmark_function(
+        lambda: o_hh.get_attribute_matches(ld_hotel_metadata_hotrate, ld_hotel_metadata_normal), i_repeats)
+    d_functions['parse_metadata_by_matches'], ld_hotel_metadata_decoded = benchmark_function(
+        lambda: o_hh.parse_metadata_by_matches(ld_hotel_metadata_hotrate, ld_hotel_metadata_normal, o_attribute_matches), i_repeats)
+    d_functions['parse_metadata_by_filters'], ld_hotel_metadata_filtered = benchmark_function(
+        lambda: o_hh.parse_metadata_by_filters(ld_hotel_metadata_decoded), i_repeats)
+    d_functions['sort_metadata_by_filters'], _ = benchmark_function(
+        lambda: o_hh.sort_metadata_by_filters(ld_hotel_metadata_decoded), i_repeats)
+
+    # Return results of this scale
+    return {
+        's_scale': f'{i_hotrate}x{i_normal}',
+        'i_hotrate': i_hotrate,
+        'i_normal': i_normal,
+        'i_matches': len(o_attribute_matches),
+        'i_decoded': len(ld_hotel_metadata_decoded),
+        'i_filtered': len(ld_hotel_metadata_filtered),
+        'd_functions': d_functions,
+    }
+
+
+def print_comparison(d_results, d_results_baseline):
+
+    # Print time and memory ratios of each function against a baseline run, where both ran the same scale
+    d_scale_to_baseline = {d['s_scale']: d for d in d_results_baseline['ld_scales']}
+    print(f'Compared to {d_results_baseline["s_git_commit"]}  (ratio < 1 is faster or smaller now)')
+    for d_scale in d_results['ld_scales']:
+        if d_scale['s_scale'] not in d_scale_to_baseline:
+            continue
+        for s_function, d_function in d_scale['d_functions'].items():
+            d_function_baseline = d_scale_to_baseline[d_scale['s_scale']]['d_functions'].get(s_function)
+            if d_function_baseline is None:
+                continue
+            print(f'{d_scale["s_scale"]:<12}{s_function:<28}time x{d_function["f_min_s"] / max(d_function_baseline["f_min_s"], 1e-9):>7.2f}   '
+                  f'peak memory x{d_function["i_peak_bytes"] / max(d_function_baseline["i_peak_bytes"], 1):>7.2f}')
+
+
+def main():
+
+    # Parse arguments
+    o_parser = argparse.ArgumentParser(description='Benchmark time and peak memory of attribute matching, decoding, filtering and sorting on synthetic metadata at several scales')
+    o_parser.add_argument('--scales', nargs='+', default=LS_SCALES, help='Scales as <hotrate>x<normal>')
+    o_parser.add_argument('--none-rate', type=float, default=0.05)
+    o_parser.add_argument('--amenities', type=int, default=8, help='Number of distinct amenities hotels draw from')
+    o_parser.add_argument('--repeats', type=int, default=3)
+    o_parser.add_argument('--seed', type=int, default=0)
+    o_parser.add_argument('--output', help=f'JSON file to save results to, by default <commit>.json in {S_RESULTS_DIR}')
+    o_parser.add_argument('--compare', help='JSON file of an earlier run to compare results against')
+    o_args = o_parser.parse_args()
+
+    # Check that arguments are valid
+    assert all((len(s_scale.split('x')) == 2) and all(s.isdigit() for s in s_scale.split('x')) for s_scale in o_args.scales), \
+        '\nError:\tscales expected to be formatted as <hotrate>x<normal>, e.g. 1000x10000'
+    assert (o_args.amenities >= 1) and (o_args.amenities <= 20), \
+        '\nError:\tamenities expected to be in [1, 20]'
+
+    # Benchmark each scale
+    o_hh = OfflineHackingHotwire(d_hotel_filter=D_HOTEL_FILTER, s_geographic_goto_address=S_GEOGRAPHIC_GOTO_ADDRESS)
+    ld_scales = []
+    for s_scale in o_args.scales:
+        i_hotrate, i_normal = [int(s) for s in s_scale.split('x')]
+        d_scale = benchmark_scale(o_hh, i_hotrate, i_normal, o_args.none_rate, o_args.amenities, o_args.repeats, o_args.seed)
+        ld_scales.append(d_scale)
+        print(f'Scale {s_scale}:  {d_scale["i_matches"]} matches, {d_scale["i_decoded"]} decoded, {d_scale["i_filtered"]} left after filters')
+        for s_function, d_function in d_scale['d_functions'].items():
+            print(f'    {s_function:<28}min {d_function["f_min_s"]:>9.4f} s   median {d_function["f_median_s"]:>9.4f} s   peak {d_function["i_peak_bytes"] / 1e6:>9.2f} MB')
+
+    # Save results, keyed by commit so that runs on different commits sit side by side
+    s_git_commit = get_git_commit()
+    d_results = {
+        's_git_commit': s_git_commit,
+        's_python_version': platform.python_version(),
+        's_numpy_version': np.__version__,
+        'd_arguments': vars(o_args),
+        'ld_scales': ld_scales,
+    }
+    s_output_file = o_args.output if o_args.output is not None else os.path.join(S_RESULTS_DIR, f'{s_git_commit or "results"}.json')
+    if os.path.dirname(s_output_file) != '':
+        os.makedirs(os.path.dirname(s_output_file), exist_ok=True)
+    with open(s_output_file, 'w') as o_file:
+        json.dump(d_results, o_file, indent=2)
+    print(f'Results saved to {s_output_file}')
+
+    # Compare against an earlier run if asked
+    if o_args.compare is not None:
+        with open(o_args.compare) as o_file:
+            print_comparison(d_results, json.load(o_file))
+
+
+if __name__ == '__main__':
+    main()
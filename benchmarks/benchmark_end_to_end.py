@@ -0,0 +1,120 @@
+# Do imports
+import os
+import sys
+import json
+import time
+import argparse
+
+
+# Do local imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from browser_profile import S_BROWSER_BINARY_PATH, S_DRIVER_EXECUTABLE_PATH
+from HackingHotwire import HackingHotwire
+from local_site import LocalSite
+
+
+# Define default run parameters
+D_HOTEL_FILTER = {'f_hotel_class': 3.0, 'f_geographic_distance': 30.0}
+S_GEOGRAPHIC_GOTO_ADDRESS = '200 N Spring St, Los Angeles, CA 90012'
+
+
+def run_end_to_end(o_site, s_hack_mode, d_hotel_filter, s_geographic_goto_address, b_generate_report, b_fetch_final_price, d_hack_hotwire_kwargs):
+
+    # Run a full hack against the local site, timing it from browser start to returned decodings
+    d_request_counts_before = o_site.get_request_counts()
+    f_started_at = time.perf_counter()
+    o_hh = HackingHotwire(f'benchmark_end_to_end_{s_hack_mode}', d_hotel_filter, s_geographic_goto_address, s_maps_directions_url=o_site.s_maps_directions_url,
+                          s_distance_matrix_url=o_site.s_distance_matrix_url, **d_hack_hotwire_kwargs)
+    ld_hotel_metadata_decoded = o_hh.hack_hotwire(o_site.s_search_query_url, s_hack_mode, b_generate_report, b_fetch_final_price=b_fetch_final_price)
+    f_wall_s = time.perf_counter() - f_started_at
+
+    # Count requests the site served during the run, by page kind
+    d_request_counts = {s_page_kind: i_count - d_request_counts_before.get(s_page_kind, 0) for s_page_kind, i_count in o_site.get_request_counts().items()}
+    d_request_counts = {s_page_kind: i_count for s_page_kind, i_count in sorted(d_request_counts.items()) if i_count > 0}
+
+    # Score decodings against the hotels each hotrate hotel really is
+    d_decodings = o_site.get_decodings()
+    i_decoded_correct = sum(1 for d in ld_hotel_metadata_decoded if d_decodings.get(d.d_hotel_metadata_hotrate.s_hotel_url) == d.d_hotel_metadata_normal.s_hotel_url)
+
+    # Return results of the run
+    d_metrics_summary = o_hh.o_metrics.get_summary()
+    i_page_loads = sum(d_histogram['i_count'] for d_histogram in d_metrics_summary['d_histograms'].get('page_load_seconds', {}).values())
+    return {
+        's_hack_mode': s_hack_mode,
+        'f_wall_s': round(f_wall_s, 3),
+        'f_driver_start_s': round(f_wall_s - d_metrics_summary['d_stage_seconds']['total'], 3),
+        'i_page_loads': i_page_loads,
+        'f_page_loads_per_second': round(i_page_loads / f_wall_s, 3),
+        'f_cards_per_second': d_metrics_summary['f_cards_per_second'],
+        'i_decoded': len(ld_hotel_metadata_decoded),
+        'i_decoded_correct': i_decoded_correct,
+        'f_decoded_per_minute': round(60.0 * len(ld_hotel_metadata_decoded) / f_wall_s, 3),
+        'd_request_counts': d_request_counts,
+        'd_stage_seconds': d_metrics_summary['d_stage_seconds'],
+    }
+
+
+def main():
+
+    # Parse arguments
+    o_parser = argparse.ArgumentParser(description='Benchmark basic and advanced mode end to end against a local stand-in for Hotwire, Expedia and Google Maps pages and the distance matrix API')
+    o_parser.add_argument('--hotrate', type=int, default=40)
+    o_parser.add_argument('--normal', type=int, default=200)
+    o_parser.add_argument('--batch-size', type=int, default=20)
+    o_parser.add_argument('--latency', type=float, default=0.05, help='Seconds added to every request the site serves')
+    o_parser.add_argument('--error-page-rate', type=float, default=0.0)
+    o_parser.add_argument('--deals-gone-rate', type=float, default=0.0)
+    o_parser.add_argument('--seed', type=int, default=0)
+    o_parser.add_argument('--modes', nargs='+', choices=['basic', 'advanced'], default=['basic', 'advanced'])
+    o_parser.add_argument('--report', action='store_true', help='Also write a PDF report')
+    o_parser.add_argument('--no-final-price', action='store_true', help='Skip fetching checkout totals')
+    o_parser.add_argument('--extraction-mode', choices=['script', 'webdriver', 'page_source'], default='script')
+    o_parser.add_argument('--distance-mode', choices=['maps', 'distance_matrix'], default='maps')
+    o_parser.add_argument('--browser-profile', choices=['full', 'lean'], default='lean')
+    o_parser.add_argument('--browser-workers', type=int, default=1)
+    o_parser.add_argument('--browser-tabs', type=int, default=1)
+    o_parser.add_argument('--no-overlap-stages', action='store_true')
+    o_parser.add_argument('--browser-binary', default=S_BROWSER_BINARY_PATH)
+    o_parser.add_argument('--driver-executable', default=S_DRIVER_EXECUTABLE_PATH)
+    o_parser.add_argument('--output', help='Write results of every run to this JSON file')
+    o_args = o_parser.parse_args()
+
+    # Define parameters shared by every run
+    d_hack_hotwire_kwargs = {
+        's_extraction_mode': o_args.extraction_mode,
+        's_distance_mode': o_args.distance_mode,
+        'i_browser_workers': o_args.browser_workers,
+        'i_browser_tabs': o_args.browser_tabs,
+        's_browser_profile': o_args.browser_profile,
+        'b_overlap_stages': not o_args.no_overlap_stages,
+        's_browser_binary_path': o_args.browser_binary,
+        's_driver_executable_path': o_args.driver_executable,
+    }
+
+    # Serve local site and run each mode against it
+    o_site = LocalSite(o_args.hotrate, o_args.normal, o_args.batch_size, o_args.latency, o_args.error_page_rate, o_args.deals_gone_rate, i_seed=o_args.seed).start()
+    print(f'Site:  {o_args.hotrate} hotrate + {o_args.normal} normal hotels, {o_args.batch_size} per batch, {o_args.latency:.3f} s latency')
+    ld_results = []
+    try:
+        for s_hack_mode in o_args.modes:
+            d_result = run_end_to_end(o_site, s_hack_mode, D_HOTEL_FILTER, S_GEOGRAPHIC_GOTO_ADDRESS, o_args.report, not o_args.no_final_price, d_hack_hotwire_kwargs)
+            ld_results.append(d_result)
+            print(f'{s_hack_mode:<8}  wall {d_result["f_wall_s"]:.2f} s (driver start {d_result["f_driver_start_s"]:.2f} s), '
+                  f'{d_result["i_page_loads"]} page loads ({d_result["f_page_loads_per_second"]:.2f}/s), '
+                  f'{d_result["f_cards_per_second"] or 0.0:.1f} cards/s, {d_result["i_decoded"]} decoded ({d_result["i_decoded_correct"]} correct, '
+                  f'{d_result["f_decoded_per_minute"]:.1f}/min)')
+            print(f'{"":<8}  requests {d_result["d_request_counts"]}')
+    finally:
+        o_site.stop()
+
+    # Write results if asked
+    if o_args.output is not None:
+        if os.path.dirname(o_args.output) != '':
+            os.makedirs(os.path.dirname(o_args.output), exist_ok=True)
+        with open(o_args.output, 'w') as o_file:
+            json.dump({'d_arguments': vars(o_args), 'ld_results': ld_results}, o_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+# Do imports
+import os
+import sys
+import tempfile
+
+
+# Do local imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from benchmark_core import OfflineHackingHotwire
+from detail_cache import DetailCache
+from hotel_records import HotelComparisonAttributes, HotelAdditionalAttributes, HotelRecord
+
+
+# Define two queries for the same dates whose result sets differ, each hotel listed as a normal hotel and disguised as a hotrate hotel,
+# with normal hotel urls shaped like real ones, which carry the dates in their path
+S_GEOGRAPHIC_GOTO_ADDRESS = '200 N Spring St, Los Angeles, CA 90012'
+S_QUERY_DATES = 'startDate=06-29-2024&endDate=06-30-2024&rooms=1&adults=2&children=0'
+D_QUERY_TO_PROPERTY_IDS = {
+    f'https://www.hotwire.com/hotels/search?destination=Los%20Angeles&{S_QUERY_DATES}': [12670, 74503881],
+    f'https://www.hotwire.com/hotels/search?destination=San%20Diego&{S_QUERY_DATES}': [55120, 9901],
+}
+
+
+def get_hotel_url_normal(i_property_id):
+
+    # Return normal hotel url of a property
+    return f'https://vacation.hotwire.com/go/hotel/info/{i_property_id}/2024-06-29/2024-06-30?adults=2&rooms=1'
+
+
+def get_hotel_address(s_hotel_url_normal):
+
+    # Return the address the hotel page of a normal hotel shows
+    return f'{s_hotel_url_normal.split("/info/")[1].split("/")[0]} Main St'
+
+
+class OfflineBatchHackingHotwire(OfflineHackingHotwire):
+
+
+    def hack_hotwire(self, s_search_query_url, *args, **kwargs):
+
+        # Keep decoded hotels of each query for checking
+        ld_hotel_metadata_decoded = super().hack_hotwire(s_search_query_url, *args, **kwargs)
+        self.d_query_to_decoded = dict(getattr(self, 'd_query_to_decoded', {}), **{s_search_query_url: ld_hotel_metadata_decoded})
+        return ld_hotel_metadata_decoded
+
+
+    def _open_search_results(self, s_search_query_url):
+
+        # Remember which query is open in place of opening it
+        self.s_search_query_url_open = s_search_query_url
+
+
+    def get_hotel_metadata_primary(self):
+
+        # Return the hotels of the open query, each hotrate hotel matching one normal hotel only
+        ld_hotel_metadata_hotrate = []
+        ld_hotel_metadata_normal = []
+        for i_hotel_idx, i_property_id in enumerate(D_QUERY_TO_PROPERTY_IDS[self.s_search_query_url_open]):
+            d_hotel_comparison_attributes = {'f_hotel_class': 3.0 + i_hotel_idx, 's_distance': f'Neighbourhood {i_property_id}', 'f_guest_rating': 4.0,
+                                             'i_reviews_total': i_property_id % 1000, 'ls_amenities': ['WIFI'], 'i_list_price': 200}
+            ld_hotel_metadata_normal.append(HotelRecord(
+                s_hotel_url=get_hotel_url_normal(i_property_id),
+                d_hotel_comparison_attributes=HotelComparisonAttributes(**d_hotel_comparison_attributes),
+                d_hotel_additional_attributes=HotelAdditionalAttributes(s_hotel_name=f'Hotel {i_property_id}', i_sale_price=200)))
+            ld_hotel_metadata_hotrate.append(HotelRecord(
+                s_hotel_url=f'https://www.hotwire.com/hotels/details/hotrate?resultId={i_property_id}',
+                d_hotel_comparison_attributes=HotelComparisonAttributes(**d_hotel_comparison_attributes),
+                d_hotel_additional_attributes=HotelAdditionalAttributes(s_hotel_name=f'{3.0 + i_hotel_idx:g}-star hotel', i_sale_price=150)))
+        return ld_hotel_metadata_hotrate, ld_hotel_metadata_normal
+
+
+    def _fetch_normal_address(self, s_hotel_url_normal):
+
+        # Return address shown on the hotel page
+        return get_hotel_address(s_hotel_url_normal)
+
+
+    def _fetch_hotrate_final_price(self, s_hotel_url_hotrate):
+
+        # Return checkout total
+        return 175.5
+
+
+    def get_geographic_metadata(self, ld_hotel_metadata_decoded):
+
+        # Skip driving distances, which do not depend on the cache
+        return ld_hotel_metadata_decoded
+
+
+    def close(self):
+
+        # Close caches, there being no browser to close
+        if self.o_detail_cache is not None:
+            self.o_detail_cache.close()
+        if self.o_decoding_index is not None:
+            self.o_decoding_index.close()
+
+
+def check_batch(s_cache_file):
+
+    # Run both queries as a batch, with or without a cache file
+    o_hh = OfflineBatchHackingHotwire('check_batch', None, S_GEOGRAPHIC_GOTO_ADDRESS, s_cache_file=s_cache_file, b_overlap_stages=False)
+    ld_query_summaries = o_hh.hack_hotwire_batch(list(D_QUERY_TO_PROPERTY_IDS))
+
+    # Check each query decoded its own hotels, with the addresses of those hotels
+    for d_query_summary, (s_search_query_url, li_property_ids) in zip(ld_query_summaries, D_QUERY_TO_PROPERTY_IDS.items()):
+        assert d_query_summary['s_error'] is None, \
+            f'\nError:\t{s_search_query_url} failed with {d_query_summary["s_error"]}'
+        ss_hotel_names = set(d_top_deal['s_hotel_name'] for d_top_deal in d_query_summary['ld_top_deals'])
+        assert ss_hotel_names == set(f'Hotel {i_property_id}' for i_property_id in li_property_ids), \
+            f'\nError:\t{s_search_query_url} expected to decode its own hotels, got {ss_hotel_names}'
+        for d_hotel_metadata_decoded in o_hh.d_query_to_decoded[s_search_query_url]:
+            d_hotel_metadata_normal = d_hotel_metadata_decoded['d_hotel_metadata_normal']
+            assert d_hotel_metadata_normal['d_hotel_additional_attributes']['s_hotel_address'] == get_hotel_address(d_hotel_metadata_normal['s_hotel_url']), \
+                f'\nError:\t{d_hotel_metadata_normal["s_hotel_url"]} expected to have its own address, got {d_hotel_metadata_normal["d_hotel_additional_attributes"]["s_hotel_address"]}'
+
+    # Check each hotel is cached with its own address
+    for s_hotel_url_normal in [get_hotel_url_normal(i_property_id) for li_property_ids in D_QUERY_TO_PROPERTY_IDS.values() for i_property_id in li_property_ids]:
+        if s_cache_file is not None:
+            o_detail_cache = DetailCache(s_cache_file)
+            s_hotel_address = o_detail_cache.get(s_hotel_url_normal, ['s_hotel_address']).get('s_hotel_address')
+            o_detail_cache.close()
+            assert s_hotel_address == get_hotel_address(s_hotel_url_normal), \
+                f'\nError:\t{s_hotel_url_normal} expected to be cached with its own address, got {s_hotel_address}'
+    return ld_query_summaries
+
+
+def main():
+
+    # Run batch without a cache file, then with one, writing reports and summaries to a temporary directory
+    s_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as s_temp_dir:
+        os.chdir(s_temp_dir)
+        try:
+            check_batch(None)
+            check_batch(os.path.join(s_temp_dir, 'cache.sqlite'))
+        finally:
+            os.chdir(s_cwd)
+    print(f'Batch OK:  {len(D_QUERY_TO_PROPERTY_IDS)} queries with different hotels each decoded their own hotels and addresses, with and without a cache file')
+
+
+if __name__ == '__main__':
+    main()
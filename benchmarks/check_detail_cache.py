@@ -0,0 +1,76 @@
+# Do imports
+import os
+import sys
+import sqlite3
+import tempfile
+
+
+# Do local imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from detail_cache import DetailCache, get_hotel_cache_key
+
+
+# Define hotel urls of the shapes the site uses, with the key each should get; urls of one row are the same hotel, urls of different rows are different hotels
+S_QUERY = 'startDate=06-29-2024&endDate=06-30-2024&rooms=1&adults=2&children=0'
+LT_HOTEL_URL_KEYS = [
+    (['https://vacation.hotwire.com/go/hotel/info/12670/2024-06-29/2024-06-30?adults=2&rooms=1',
+      'https://vacation.hotwire.com/go/hotel/info/12670/2024-07-06/2024-07-07?adults=2&rooms=1'], 'hotel:vacation.hotwire.com/12670'),
+    (['https://vacation.hotwire.com/go/hotel/info/74503881/2024-06-29/2024-06-30?adults=2&rooms=1'], 'hotel:vacation.hotwire.com/74503881'),
+    (['https://vacation.hotwire.com/go/hotel/info/987/2024-06-29/2024-06-30'], 'hotel:vacation.hotwire.com/987'),
+    ([f'https://www.hotwire.com/hotels/details/retail?hotelId=2180&{S_QUERY}',
+      'https://www.hotwire.com/hotels/details/retail?hotelId=2180&startDate=07-06-2024&endDate=07-07-2024'], 'hotel:www.hotwire.com/2180'),
+    ([f'https://www.hotwire.com/hotels/details/retail?hotelId=5512&{S_QUERY}'], 'hotel:www.hotwire.com/5512'),
+    ([f'https://www.hotwire.com/hotels/details/retail?propertyId=5513&{S_QUERY}'], 'hotel:www.hotwire.com/5513'),
+    (['http://127.0.0.1:8000/hotels/details/100005'], 'hotel:127.0.0.1:8000/100005'),
+    (['http://127.0.0.1:8000/hotels/details/100006'], 'hotel:127.0.0.1:8000/100006'),
+    ([f'https://www.hotwire.com/hotels/details/retail?name=Hotel-A&{S_QUERY}'], f'url:www.hotwire.com/hotels/details/retail?name=Hotel-A&{S_QUERY}'),
+    ([f'https://www.hotwire.com/hotels/details/retail?name=Hotel-B&{S_QUERY}'], f'url:www.hotwire.com/hotels/details/retail?name=Hotel-B&{S_QUERY}'),
+]
+
+
+def check_keys():
+
+    # Check each url gets its expected key, so that one hotel shares a key across dates and different hotels never do
+    for ls_hotel_urls, s_hotel_key in LT_HOTEL_URL_KEYS:
+        for s_hotel_url in ls_hotel_urls:
+            assert get_hotel_cache_key(s_hotel_url) == s_hotel_key, \
+                f'\nError:\t{s_hotel_url} expected to be keyed {s_hotel_key}, got {get_hotel_cache_key(s_hotel_url)}'
+    assert len(set(s_hotel_key for _, s_hotel_key in LT_HOTEL_URL_KEYS)) == len(LT_HOTEL_URL_KEYS), \
+        '\nError:\tdifferent hotels expected to get different keys'
+
+
+def check_cache(s_cache_file):
+
+    # Store a detail for each hotel and check each reads back its own, whichever of its urls it is read by
+    o_detail_cache = DetailCache(s_cache_file)
+    for i_hotel_idx, (ls_hotel_urls, _) in enumerate(LT_HOTEL_URL_KEYS):
+        o_detail_cache.set(ls_hotel_urls[0], {'s_hotel_address': f'{i_hotel_idx} Main St'})
+    for i_hotel_idx, (ls_hotel_urls, _) in enumerate(LT_HOTEL_URL_KEYS):
+        for s_hotel_url in ls_hotel_urls:
+            assert o_detail_cache.get(s_hotel_url, ['s_hotel_address']) == {'s_hotel_address': f'{i_hotel_idx} Main St'}, \
+                f'\nError:\t{s_hotel_url} expected to read back its own address'
+    o_detail_cache.close()
+
+    # Check that entries stored under keys of earlier versions are dropped when the cache is opened
+    o_connection = sqlite3.connect(s_cache_file)
+    o_connection.execute("INSERT INTO hotel_details VALUES ('vacation.hotwire.com/property/2024', 's_hotel_address', '\"1 Wrong St\"', 0.0, 0.0)")
+    o_connection.commit()
+    o_connection.close()
+    o_detail_cache = DetailCache(s_cache_file)
+    i_entries = o_detail_cache.o_connection.execute('SELECT COUNT(*) FROM hotel_details').fetchone()[0]
+    o_detail_cache.close()
+    assert i_entries == len(LT_HOTEL_URL_KEYS), \
+        f'\nError:\tentries under old keys expected to be dropped, {i_entries} entries left'
+
+
+def main():
+
+    # Run checks
+    check_keys()
+    with tempfile.TemporaryDirectory() as s_temp_dir:
+        check_cache(os.path.join(s_temp_dir, 'cache.sqlite'))
+    print(f'Detail cache OK:  {sum(len(ls) for ls, _ in LT_HOTEL_URL_KEYS)} urls of {len(LT_HOTEL_URL_KEYS)} hotels keyed apart')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+# Do imports
+import os
+import sys
+import math
+import argparse
+
+
+# Do local imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from geographic import F_METERS_PER_MILE, DistanceMatrixProvider
+from local_site import I_DISTANCE_MATRIX_MAX_ADDRESSES, LocalSite, get_driving_distance
+
+
+# Define origin, and addresses the local site does not know, which come back NOT_FOUND
+S_ORIGIN_ADDRESS = '200 N Spring St, Los Angeles, CA 90012'
+LS_UNKNOWN_ADDRESSES = ['1 Nowhere Rd, Atlantis', '2 Nowhere Rd, Atlantis']
+
+
+def get_expected_distance(s_address):
+
+    # Return the distance the provider should read for an address, after the site's round trip through meters
+    return round(int(round(get_driving_distance(s_address) * F_METERS_PER_MILE)) / F_METERS_PER_MILE, 1)
+
+
+def check_provider(i_normal, i_batch_size, i_drop_every):
+
+    # Ask for every hotel address twice, in shuffled order, mixed with unknown addresses
+    o_site = LocalSite(i_hotrate=0, i_normal=i_normal, i_distance_matrix_drop_every=i_drop_every).start()
+    try:
+        ls_hotel_addresses = sorted(o_site.ss_hotel_addresses)
+        ls_addresses = ls_hotel_addresses[::-1] + LS_UNKNOWN_ADDRESSES + ls_hotel_addresses + LS_UNKNOWN_ADDRESSES[:1]
+        o_provider = DistanceMatrixProvider(o_site.s_distance_matrix_url, i_batch_size=i_batch_size)
+        lt_distances = o_provider.get_distances(S_ORIGIN_ADDRESS, ls_addresses)
+        o_provider.close()
+
+        # Check distances, which are None for addresses the API could not find
+        assert len(lt_distances) == len(ls_addresses), \
+            '\nError:\texpected one distance per address'
+        for s_address, t_distance in zip(ls_addresses, lt_distances):
+            if s_address in LS_UNKNOWN_ADDRESSES:
+                assert t_distance is None, \
+                    f'\nError:\tNOT_FOUND address {s_address} expected to have no distance'
+            else:
+                assert (t_distance is not None) and (t_distance[0] == get_expected_distance(s_address)), \
+                    f'\nError:\t{s_address} expected to be {get_expected_distance(s_address)} miles away, got {t_distance}'
+
+        # Check that each unique address was asked for once, in batches no larger than the batch size
+        lls_destinations = o_site.get_distance_matrix_destinations()
+        ls_destinations_requested = [s for ls_destinations in lls_destinations for s in ls_destinations]
+        i_unique = len(ls_hotel_addresses) + len(LS_UNKNOWN_ADDRESSES)
+        assert sorted(ls_destinations_requested) == sorted(set(ls_addresses)), \
+            f'\nError:\texpected {i_unique} unique addresses to be requested once each, got {len(ls_destinations_requested)} requested'
+        assert (len(lls_destinations) == math.ceil(i_unique / i_batch_size)) and all(len(ls_destinations) <= i_batch_size for ls_destinations in lls_destinations), \
+            f'\nError:\texpected {math.ceil(i_unique / i_batch_size)} batches of up to {i_batch_size} addresses, got {[len(ls) for ls in lls_destinations]}'
+
+        # Check that connections were kept alive, a new one being opened only after each dropped request
+        i_dropped = o_site.get_request_counts().get('distance_matrix_dropped', 0)
+        assert (i_drop_every == 0) or (i_dropped > 0), \
+            '\nError:\texpected some requests to be dropped'
+        assert o_site.get_connection_count() == 1 + i_dropped, \
+            f'\nError:\texpected {1 + i_dropped} connections for {len(lls_destinations)} answered and {i_dropped} dropped requests, got {o_site.get_connection_count()}'
+    finally:
+        o_site.stop()
+
+    # Return counts to report
+    return len(lls_destinations), i_dropped
+
+
+def check_stalled_connection():
+
+    # Stall every other request past the client timeout, which must close the connection and retry on a fresh one
+    o_site = LocalSite(i_hotrate=0, i_normal=4, i_distance_matrix_drop_every=2, f_distance_matrix_drop_delay_s=1.0).start()
+    try:
+        ls_addresses = sorted(o_site.ss_hotel_addresses)
+        o_provider = DistanceMatrixProvider(o_site.s_distance_matrix_url, i_batch_size=1, i_pool_size=1, f_timeout_s=0.3)
+        lt_distances = o_provider.get_distances(S_ORIGIN_ADDRESS, ls_addresses)
+        o_provider.close()
+
+        # Check every address still got its distance
+        for s_address, t_distance in zip(ls_addresses, lt_distances):
+            assert (t_distance is not None) and (t_distance[0] == get_expected_distance(s_address)), \
+                f'\nError:\taddress {s_address} expected a distance after a stalled request was retried'
+        i_stalled = o_site.get_request_counts().get('distance_matrix_dropped', 0)
+        assert i_stalled > 0, \
+            '\nError:\texpected at least one stalled request'
+    finally:
+        o_site.stop()
+    return i_stalled
+
+
+def check_oversized_batch():
+
+    # Check that a batch the API refuses leaves every address in it without a distance, rather than failing
+    o_site = LocalSite(i_hotrate=0, i_normal=I_DISTANCE_MATRIX_MAX_ADDRESSES + 1).start()
+    try:
+        o_provider = DistanceMatrixProvider(o_site.s_distance_matrix_url, i_batch_size=I_DISTANCE_MATRIX_MAX_ADDRESSES + 1)
+        lt_distances = o_provider.get_distances(S_ORIGIN_ADDRESS, sorted(o_site.ss_hotel_addresses))
+        o_provider.close()
+    finally:
+        o_site.stop()
+    assert lt_distances == [None] * (I_DISTANCE_MATRIX_MAX_ADDRESSES + 1), \
+        '\nError:\taddresses of a MAX_DIMENSIONS_EXCEEDED batch expected to have no distance'
+
+
+def main():
+
+    # Parse arguments
+    o_parser = argparse.ArgumentParser(description='Check the distance matrix provider against the local stand-in distance matrix API')
+    o_parser.add_argument('--normal', type=int, default=120, help='Number of hotel addresses the site knows')
+    o_parser.add_argument('--batch-size', type=int, default=I_DISTANCE_MATRIX_MAX_ADDRESSES)
+    o_parser.add_argument('--drop-every', type=int, default=3, help='Close the connection without answering every nth request, 0 to never')
+    o_args = o_parser.parse_args()
+
+    # Run checks
+    i_requests, i_dropped = check_provider(o_args.normal, o_args.batch_size, o_args.drop_every)
+    i_stalled = check_stalled_connection()
+    check_oversized_batch()
+    print(f'Distance matrix provider OK:  {o_args.normal} addresses in {i_requests} batches, {i_dropped} dropped and {i_stalled} stalled requests retried, NOT_FOUND and oversized batches left without a distance')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# Do imports
+import os
+import sys
+
+
+# Do local imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from benchmark_core import OfflineHackingHotwire
+from decoding_index import DecodingIndex
+from hotel_records import HotelComparisonAttributes, HotelAdditionalAttributes, HotelRecord
+
+
+# Define normal hotels listed for the same dates, whose urls differ only by property id, and the hotrate hotel disguising each
+LT_HOTELS = [
+    ('https://vacation.hotwire.com/go/hotel/info/12670/2024-06-29/2024-06-30?adults=2&rooms=1', 'https://www.hotwire.com/hotels/details/hotrate?resultId=a1',
+     {'f_hotel_class': 4.5, 's_distance': 'Downtown', 'f_guest_rating': 4.3, 'i_reviews_total': 1288, 'ls_amenities': ['POOL', 'WIFI'], 'i_list_price': 279}),
+    ('https://vacation.hotwire.com/go/hotel/info/74503881/2024-06-29/2024-06-30?adults=2&rooms=1', 'https://www.hotwire.com/hotels/details/hotrate?resultId=b2',
+     {'f_hotel_class': 3.0, 's_distance': 'Hollywood', 'f_guest_rating': 3.9, 'i_reviews_total': 402, 'ls_amenities': ['WIFI'], 'i_list_price': 131}),
+]
+
+
+def get_hotel_record(s_hotel_url, d_hotel_comparison_attributes, i_sale_price):
+
+    # Build a hotel record as parsed from a card
+    return HotelRecord(
+        s_hotel_url=s_hotel_url,
+        d_hotel_comparison_attributes=HotelComparisonAttributes(**d_hotel_comparison_attributes),
+        d_hotel_additional_attributes=HotelAdditionalAttributes(s_hotel_name=s_hotel_url, i_sale_price=i_sale_price),
+    )
+
+
+def main():
+
+    # Index each hotrate hotel as decoded to its normal hotel, as an earlier run would have
+    o_hh = OfflineHackingHotwire()
+    o_hh.o_decoding_index = DecodingIndex(':memory:')
+    ld_hotel_metadata_normal = [get_hotel_record(s_url_normal, d_attributes, d_attributes['i_list_price']) for s_url_normal, _, d_attributes in LT_HOTELS]
+    ld_hotel_metadata_hotrate = [get_hotel_record(s_url_hotrate, d_attributes, int(d_attributes['i_list_price'] * 0.7)) for _, s_url_hotrate, d_attributes in LT_HOTELS]
+    for s_url_normal, _, d_attributes in LT_HOTELS:
+        o_hh.o_decoding_index.record(d_attributes, s_url_normal, len(d_attributes))
+
+    # Check that each hotrate hotel resolves to its own normal hotel, not to whichever was listed last
+    ld_hotel_metadata_decoded_known, ld_hotel_metadata_hotrate_unknown = o_hh.parse_metadata_by_known_decodings(ld_hotel_metadata_hotrate, ld_hotel_metadata_normal)
+    o_hh.o_decoding_index.close()
+    assert len(ld_hotel_metadata_hotrate_unknown) == 0, \
+        '\nError:\tevery hotrate hotel expected to resolve from the index'
+    for d_hotel_metadata_decoded, (s_url_normal, s_url_hotrate, _) in zip(ld_hotel_metadata_decoded_known, LT_HOTELS):
+        assert (d_hotel_metadata_decoded['d_hotel_metadata_hotrate']['s_hotel_url'] == s_url_hotrate) and \
+               (d_hotel_metadata_decoded['d_hotel_metadata_normal']['s_hotel_url'] == s_url_normal), \
+            f'\nError:\t{s_url_hotrate} expected to resolve to {s_url_normal}, got {d_hotel_metadata_decoded["d_hotel_metadata_normal"]["s_hotel_url"]}'
+    print(f'Known decodings OK:  {len(LT_HOTELS)} hotrate hotels resolved to their own normal hotels listed for the same dates')
+
+
+if __name__ == '__main__':
+    main()
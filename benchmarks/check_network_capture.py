@@ -0,0 +1,125 @@
+# Do imports
+import os
+import sys
+import copy
+import json
+import argparse
+
+
+# Do local imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from browser_profile import S_BROWSER_BINARY_PATH, S_DRIVER_EXECUTABLE_PATH, create_driver
+from network_capture import O_SEARCH_API_URL_PATTERN, get_api_responses, parse_api_hotel_results
+from waiting import wait_for_dom_ready, wait_for_network_idle
+
+
+# Define search results response the parser is pinned to, and the page url it was captured on
+S_FIXTURE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'resources', 'search_api_response.json')
+S_FIXTURE_PAGE_URL = 'https://www.hotwire.com/hotels/search?destination=Los%20Angeles&startDate=06-29-2024&endDate=06-30-2024&rooms=1&adults=2&children=0'
+
+
+# Define hotel cards the fixture is expected to parse to, as hotel cards parsed from the page would be
+S_HOTWIRE = 'https://www.hotwire.com'
+S_QUERY = 'startDate=06-29-2024&endDate=06-30-2024&rooms=1&adults=2&children=0'
+LT_FIXTURE_HOTEL_CARDS_PARSED = [
+    (True, f'{S_HOTWIRE}/hotels/details/hotrate?resultId=7f3c1a&{S_QUERY}',
+     {'f_hotel_class': 4.5, 's_distance': 'Downtown Los Angeles', 'f_guest_rating': 4.3, 'i_reviews_total': 1288, 'ls_amenities': ['FITNESS', 'POOL', 'WIFI'], 'i_list_price': 280},
+     {'s_hotel_name': '4.5-star Downtown hotel', 'i_sale_price': 189}),
+    (True, f'{S_HOTWIRE}/hotels/details/hotrate?resultId=9b02de&{S_QUERY}',
+     {'f_hotel_class': 3.0, 's_distance': 'Hollywood', 'f_guest_rating': None, 'i_reviews_total': None, 'ls_amenities': ['WIFI'], 'i_list_price': None},
+     {'s_hotel_name': '3-star Hollywood hotel', 'i_sale_price': 112}),
+    (False, f'{S_HOTWIRE}/hotels/details/retail?hotelId=2180&{S_QUERY}',
+     {'f_hotel_class': 4.5, 's_distance': 'Downtown Los Angeles', 'f_guest_rating': 4.3, 'i_reviews_total': 1288, 'ls_amenities': ['FITNESS', 'POOL', 'WIFI'], 'i_list_price': 279},
+     {'s_hotel_name': 'The Westin Bonaventure Hotel & Suites', 'i_sale_price': 279}),
+    (False, f'{S_HOTWIRE}/hotels/details/retail?hotelId=5512&{S_QUERY}',
+     {'f_hotel_class': 3.0, 's_distance': 'Hollywood', 'f_guest_rating': 3.9, 'i_reviews_total': 402, 'ls_amenities': [], 'i_list_price': 131},
+     {'s_hotel_name': 'Hollywood Inn Express', 'i_sale_price': 131}),
+]
+
+
+def record_responses(s_search_query_url, s_output_file, s_browser_binary_path, s_driver_executable_path):
+
+    # Open a search with network capture on, and save every JSON response from Hotwire with its url, so that the pinned paths can be checked against it
+    o_driver = create_driver('full', s_browser_binary_path, s_driver_executable_path, b_capture_network=True)
+    try:
+        o_driver.get(s_search_query_url)
+        wait_for_dom_ready(o_driver)
+        wait_for_network_idle(o_driver)
+        ld_responses = []
+        for d_entry in o_driver.get_log('performance'):
+            d_message = json.loads(d_entry['message'])['message']
+            if (d_message['method'] != 'Network.responseReceived') or ('json' not in d_message['params']['response'].get('mimeType', '')):
+                continue
+            s_url = d_message['params']['response']['url']
+            if 'hotwire.com' not in s_url:
+                continue
+            try:
+                s_body = o_driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': d_message['params']['requestId']})['body']
+                ld_responses.append({'s_url': s_url, 'b_search_api': O_SEARCH_API_URL_PATTERN.search(s_url) is not None, 'o_payload': json.loads(s_body)})
+            except:
+                continue
+    finally:
+        o_driver.quit()
+    with open(s_output_file, 'w') as o_file:
+        json.dump(ld_responses, o_file, indent=2)
+    print(f'{len(ld_responses)} responses saved to {s_output_file}, {sum(d["b_search_api"] for d in ld_responses)} of them from the search results API')
+
+
+def check_parser(o_payload):
+
+    # Check that the fixture parses to the expected hotel cards
+    assert O_SEARCH_API_URL_PATTERN.search(f'{S_HOTWIRE}/api/hotel/search/results?{S_QUERY}') is not None, \
+        '\nError:\tsearch results API url expected to match O_SEARCH_API_URL_PATTERN'
+    assert O_SEARCH_API_URL_PATTERN.search(f'{S_HOTWIRE}/api/hotel/search/filters?{S_QUERY}') is None, \
+        '\nError:\tother API urls expected not to match O_SEARCH_API_URL_PATTERN'
+    lt_hotel_cards_parsed = parse_api_hotel_results([o_payload], S_FIXTURE_PAGE_URL)
+    assert lt_hotel_cards_parsed == LT_FIXTURE_HOTEL_CARDS_PARSED, \
+        f'\nError:\tfixture parsed to {lt_hotel_cards_parsed}'
+
+    # Check that a hotel in two payloads is kept once
+    assert parse_api_hotel_results([o_payload, o_payload], S_FIXTURE_PAGE_URL) == LT_FIXTURE_HOTEL_CARDS_PARSED, \
+        '\nError:\thotels repeated across payloads expected to be kept once'
+
+    # Check that payloads without the expected shape parse to nothing, so that hotel cards are read from the page instead
+    o_payload_moved = {'data': {'results': o_payload['data']['hotels']}}
+    o_payload_missing = copy.deepcopy(o_payload)
+    del o_payload_missing['data']['hotels'][0]['detailsUrl']
+    o_payload_retyped = copy.deepcopy(o_payload)
+    o_payload_retyped['data']['hotels'][2]['isHotRate'] = 'false'
+    o_payload_price_text = copy.deepcopy(o_payload)
+    o_payload_price_text['data']['hotels'][3]['price']['displayPrice'] = '$131'
+    for s_case, ld_payloads in [
+        ('results moved', [o_payload_moved]),
+        ('required field missing', [o_payload_missing]),
+        ('isHotRate not a bool', [o_payload_retyped]),
+        ('price as text', [o_payload_price_text]),
+        ('one good and one unexpected payload', [o_payload, o_payload_moved]),
+        ('unrelated payload', [{'data': {'user': {'name': 'x', 'url': '/account'}}}]),
+        ('not an object', [['hotelName', 'detailsUrl']]),
+    ]:
+        assert parse_api_hotel_results(ld_payloads, S_FIXTURE_PAGE_URL) == [], \
+            f'\nError:\t{s_case} expected to parse to no hotel cards'
+
+
+def main():
+
+    # Parse arguments
+    o_parser = argparse.ArgumentParser(description='Check the search results API parser against a captured response, or record responses of a live search to pin it to')
+    o_parser.add_argument('--fixture', default=S_FIXTURE_FILE, help='Search results API response to check the parser against')
+    o_parser.add_argument('--record', metavar='SEARCH_URL', help='Record JSON responses of a live Hotwire search instead of checking')
+    o_parser.add_argument('--output', default='search_api_responses.json', help='File recorded responses are saved to')
+    o_parser.add_argument('--browser-binary', default=S_BROWSER_BINARY_PATH)
+    o_parser.add_argument('--driver-executable', default=S_DRIVER_EXECUTABLE_PATH)
+    o_args = o_parser.parse_args()
+
+    # Record responses if asked, otherwise check parser against the fixture
+    if o_args.record is not None:
+        record_responses(o_args.record, o_args.output, o_args.browser_binary, o_args.driver_executable)
+        return
+    with open(o_args.fixture) as o_file:
+        check_parser(json.load(o_file))
+    print(f'Parser matches {o_args.fixture}')
+
+
+if __name__ == '__main__':
+    main()
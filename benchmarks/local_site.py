@@ -0,0 +1,518 @@
+# Do imports
+import os
+import sys
+import html
+import json
+import time
+import hashlib
+import argparse
+import threading
+import numpy as np
+import collections as cl
+from functools import partial
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+# Do local imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from geographic import F_METERS_PER_MILE
+from synthetic_metadata import LF_HOTEL_CLASSES, LF_GUEST_RATINGS, LS_AMENITY_IDS
+
+
+# Define synthetic value pools, rating bars being shown out of 5
+LS_RATING_STRINGS = [f'{f:.1f}' for f in np.arange(3.0, 5.01, 0.1)]
+S_CITY_STATE = 'Los Angeles, CA'
+
+
+# Define distance matrix API path and limits, as the Google Maps one enforces them
+S_DISTANCE_MATRIX_PATH = '/maps/api/distancematrix/json'
+I_DISTANCE_MATRIX_MAX_ADDRESSES = 25
+I_DISTANCE_MATRIX_MAX_ELEMENTS = 100
+
+
+# Define page templates, which carry the class names, attributes and behaviour HackingHotwire relies on
+S_SEARCH_PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Hotels in Los Angeles</title></head><body>
+<div class="star_rating_filter">{s_star_rating_filter}</div>
+<div class="guest_rating_filter">{s_guest_rating_filter}</div>
+<div class="showing-results-count">Showing 1 - {i_showing_nth} out of {i_showing_total}</div>
+<div id="results">{s_hotel_cards}</div>
+<button class="show-more-results__button" onclick="showMore()">Show more results</button>
+<script>
+    var iShowingNth = {i_showing_nth}, iShowingTotal = {i_showing_total}, iBatchSize = {i_batch_size}, bLoading = false;
+    function showMore() {{
+        if (bLoading || (iShowingNth >= iShowingTotal)) {{
+            return;
+        }}
+        bLoading = true;
+        var iEndIdx = Math.min(iShowingNth + iBatchSize, iShowingTotal);
+        fetch('/hotels/search/cards?start=' + iShowingNth + '&end=' + iEndIdx).then(function (oResponse) {{
+            return oResponse.text();
+        }}).then(function (sHotelCards) {{
+            document.getElementById('results').insertAdjacentHTML('beforeend', sHotelCards);
+            iShowingNth = iEndIdx;
+            document.getElementsByClassName('showing-results-count')[0].innerText = 'Showing 1 - ' + iShowingNth + ' out of ' + iShowingTotal;
+        }}).finally(function () {{
+            bLoading = false;
+        }});
+    }}
+</script>
+</body></html>
+'''
+S_HOTRATE_PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{s_hotel_name}</title></head><body>
+<div class="hw-hotel-description__name-container"><h1>{s_hotel_name}</h1></div>
+{s_details}
+</body></html>
+'''
+S_CHECKOUT_PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Review and book</title></head><body>
+<div class="review-policy-book"><span class="review-policy-book__total-charge-amount">${f_final_price:,.2f} USD</span></div>
+</body></html>
+'''
+S_NORMAL_PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{s_hotel_name}</title></head><body>
+<h1>{s_hotel_name}</h1>
+<div data-stid="content-hotel-address">{s_hotel_address}</div>
+<button data-stid="reviews-link" onclick="showReviews()">See all reviews</button>
+<div id="reviews"></div>
+<script>
+    function showReviews() {{
+        setTimeout(function () {{
+            document.getElementById('reviews').innerHTML = {s_reviews_json};
+        }}, 50);
+    }}
+</script>
+</body></html>
+'''
+S_MAPS_PAGE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Directions</title></head><body>
+<div class="widget-directions">
+    <div id="directions-searchbox-0"><input class="tactile-searchbox-input" type="text"></div>
+    <div id="directions-searchbox-1"><input class="tactile-searchbox-input" type="text"></div>
+    <div id="travel-modes"></div>
+    <div id="sbsg51"></div>
+    <div id="trip"></div>
+</div>
+<script>
+    function getInput(iIdx) {
+        return document.getElementById('directions-searchbox-' + iIdx).getElementsByClassName('tactile-searchbox-input')[0];
+    }
+    function chooseDriving() {
+        fetch('/maps/distance?to=' + encodeURIComponent(getInput(1).value)).then(function (oResponse) {
+            return oResponse.text();
+        }).then(function (sMiles) {
+            if (sMiles === '') {
+                document.getElementById('sbsg51').innerText = "Google Maps can't find " + getInput(1).value;
+            } else {
+                document.getElementById('trip').innerHTML = '<div id="section-directions-trip-0"><div class="fontBodyMedium">' + sMiles + ' miles</div></div>';
+            }
+        });
+    }
+    getInput(1).addEventListener('keydown', function (oEvent) {
+        if (oEvent.key !== 'Enter') {
+            return;
+        }
+        history.pushState(null, '', '/maps/dir/' + encodeURIComponent(getInput(0).value) + '/' + encodeURIComponent(getInput(1).value));
+        document.getElementById('travel-modes').innerHTML = '<img aria-label="Driving" width="24" height="24" onclick="chooseDriving()" ' +
+            'src="data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7">';
+    });
+</script>
+</body></html>
+'''
+S_NOT_FOUND_PAGE = '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Not found</title></head><body>Not found</body></html>\n'
+
+
+def get_driving_distance(s_hotel_address):
+
+    # Derive a stable driving distance in miles from an address
+    return 0.5 + int(hashlib.sha256(s_hotel_address.encode('utf-8')).hexdigest()[:8], 16) % 4000 / 100.0
+
+
+def generate_site_hotels(i_hotrate, i_normal, f_none_rate=0.05, i_amenities=8, f_deals_gone_rate=0.0, i_seed=0):
+
+    # Define key variables
+    o_rng = np.random.default_rng(i_seed)
+    ls_neighbourhoods = [f'Neighbourhood {i}' for i in range(max(10, i_normal // 50))]
+    ls_card_attributes = ['s_distance', 'f_guest_rating', 'i_reviews_total', 'ls_amenities']
+
+    # Generate normal hotels, every one with a class and a price since cards always show them, and ratings of condition, service, amenities and cleanliness
+    ld_hotels_normal = []
+    for i_normal_idx in range(i_normal):
+        ld_hotels_normal.append({
+            's_hotel_path': f'/hotels/details/{100000 + i_normal_idx}',
+            's_hotel_name': f'Hotel {i_normal_idx}',
+            'f_hotel_class': float(o_rng.choice(LF_HOTEL_CLASSES)),
+            's_distance': str(o_rng.choice(ls_neighbourhoods)),
+            'f_guest_rating': float(o_rng.choice(LF_GUEST_RATINGS)),
+            'i_reviews_total': int(o_rng.integers(1, 5000)),
+            'ls_amenities': sorted(o_rng.choice(LS_AMENITY_IDS[:i_amenities], size=int(o_rng.integers(0, i_amenities + 1)), replace=False).tolist()),
+            'i_list_price': int(o_rng.integers(60, 600)),
+            'ls_ratings': [str(o_rng.choice(LS_RATING_STRINGS)) for _ in range(4)],
+            's_hotel_address': f'{i_normal_idx} Main St, {S_CITY_STATE}',
+        })
+
+    # Generate hotrate hotels, each a disguised copy of a normal hotel at a lower price, some of whose deals are gone
+    ld_hotels_hotrate = []
+    for i_hotrate_idx, i_normal_idx in enumerate(o_rng.integers(0, i_normal, size=i_hotrate)):
+        d_hotel_normal = ld_hotels_normal[int(i_normal_idx)]
+        i_sale_price = int(d_hotel_normal['i_list_price'] * o_rng.uniform(0.5, 0.95))
+        ld_hotels_hotrate.append(dict(d_hotel_normal, **{
+            's_hotel_path': f'/hotels/hotrate/{200000 + i_hotrate_idx}',
+            's_hotel_name': f'{d_hotel_normal["f_hotel_class"]:g}-star hotel in {d_hotel_normal["s_distance"]}',
+            's_normal_path': d_hotel_normal['s_hotel_path'],
+            'i_sale_price': i_sale_price,
+            'f_final_price': round(i_sale_price * 1.17, 2),
+            'b_deals_gone': bool(o_rng.random() < f_deals_gone_rate),
+        }))
+    for d_hotel_normal in ld_hotels_normal:
+        d_hotel_normal['i_sale_price'] = d_hotel_normal['i_list_price']
+
+    # Blank out card attributes at random, independently for each card, as search results do
+    ld_hotels = ld_hotels_hotrate + ld_hotels_normal
+    for d_hotel in ld_hotels:
+        d_hotel['d_card'] = {s_attribute: None if o_rng.random() < f_none_rate else d_hotel[s_attribute] for s_attribute in ls_card_attributes}
+
+    # Return hotels in search results order, with hotrate and normal hotels mixed
+    return [ld_hotels[i_hotel_idx] for i_hotel_idx in o_rng.permutation(len(ld_hotels))]
+
+
+def render_hotel_card(d_hotel):
+
+    # Render star rating as svg segments, a half star adding a filled and an unfilled segment
+    d_card = d_hotel['d_card']
+    f_hotel_class = d_hotel['f_hotel_class']
+    s_stars = '<svg class="star-rating">' + '<path fill="url(#star-gradient)"></path>' * int(np.ceil(f_hotel_class)) + \
+        '<path fill="#DEE1E7"></path>' * (5 - int(np.floor(f_hotel_class))) + '</svg>'
+
+    # Render card fields, hotrate cards showing the list price less a dollar as strikethrough price
+    ls_fields = [
+        f'<a target="_blank" href="{d_hotel["s_hotel_path"]}"><h3 class="HotelCardLayout__hotel-name">{html.escape(d_hotel["s_hotel_name"])}</h3></a>',
+        s_stars,
+    ]
+    if d_card['s_distance'] is not None:
+        ls_fields.append(f'<div class="HotelCardLayout__distance">{html.escape(d_card["s_distance"])}</div>')
+    if d_card['f_guest_rating'] is not None:
+        ls_fields.append(f'<span class="RatingTag">{d_card["f_guest_rating"]:.1f}/5</span>')
+    if d_card['i_reviews_total'] is not None:
+        ls_fields.append(f'<span class="Reviews">({d_card["i_reviews_total"]} reviews)</span>')
+    if d_card['ls_amenities'] is None:
+        ls_fields.append('<div class="AmenityIcon__icon"></div>')
+    else:
+        ls_fields.extend(f'<div class="AmenityIcon__icon"><svg data-id="{s_amenity_id}"></svg></div>' for s_amenity_id in d_card['ls_amenities'])
+    if 's_normal_path' in d_hotel:
+        ls_fields.append(f'<span class="price-blocks__strikethrough">${d_hotel["i_list_price"] - 1}</span>')
+    ls_fields.append(f'<span class="price-blocks__price">${d_hotel["i_sale_price"]}</span>')
+
+    # Return card
+    return '<div class="result-list-components">' + ''.join(ls_fields) + '</div>'
+
+
+class LocalSiteRequestHandler(BaseHTTPRequestHandler):
+
+
+    # Keep connections alive between requests, as real servers do
+    protocol_version = 'HTTP/1.1'
+
+
+    def __init__(self, *args, o_site=None, **kwargs):
+
+        # Define instance variables before the connection gets handled, counting it
+        self.o_site = o_site
+        self.o_site.record_connection()
+        super().__init__(*args, **kwargs)
+
+
+    def log_message(self, *args):
+
+        # Do not log every page request
+        pass
+
+
+    def _send(self, s_body, s_content_type='text/html; charset=utf-8', i_status=200):
+
+        # Send response body
+        by_body = s_body.encode('utf-8')
+        self.send_response(i_status)
+        self.send_header('Content-Type', s_content_type)
+        self.send_header('Content-Length', str(len(by_body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(by_body)
+
+
+    def do_GET(self):
+
+        # Route request to the page it asks for, counting it by page kind
+        o_url = urlsplit(self.path)
+        d_query = {s_key: ls_values[0] for s_key, ls_values in parse_qs(o_url.query).items()}
+        if (o_url.path == S_DISTANCE_MATRIX_PATH) and self.o_site.is_dropped_request():
+            self.o_site.record_request('distance_matrix_dropped')
+            time.sleep(self.o_site.f_distance_matrix_drop_delay_s)
+            self.close_connection = True
+            return
+        s_page_kind, s_body = self.o_site.render(o_url.path, d_query)
+        self.o_site.record_request(s_page_kind)
+        if s_page_kind != 'favicon':
+            time.sleep(self.o_site.f_latency_s)
+        s_content_type = {'maps_distance': 'text/plain; charset=utf-8', 'distance_matrix': 'application/json; charset=utf-8'}.get(s_page_kind, 'text/html; charset=utf-8')
+        self._send(s_body, s_content_type, 404 if s_page_kind == 'favicon' else 200)
+
+
+class LocalSite:
+
+
+    def __init__(self, i_hotrate=40, i_normal=200, i_batch_size=20, f_latency_s=0.0, f_error_page_rate=0.0, f_deals_gone_rate=0.0, f_none_rate=0.05, i_seed=0,
+                 i_distance_matrix_drop_every=0, f_distance_matrix_drop_delay_s=0.0):
+
+        # Check that arguments are valid
+        assert (i_hotrate >= 0) and (i_normal >= 1) and (i_batch_size >= 1), \
+            '\nError:\ti_hotrate expected to be in [0, inf), i_normal and i_batch_size in [1, inf)'
+        assert (f_error_page_rate >= 0.0) and (f_error_page_rate < 1.0), \
+            '\nError:\tf_error_page_rate expected to be in [0.0, 1.0)'
+        assert i_distance_matrix_drop_every != 1, \
+            '\nError:\ti_distance_matrix_drop_every expected to be 0, to never drop, or in [2, inf), so that a retry gets through'
+
+        # Define instance variables
+        self.i_batch_size = i_batch_size
+        self.f_latency_s = f_latency_s
+        self.f_error_page_rate = f_error_page_rate
+        self.i_distance_matrix_drop_every = i_distance_matrix_drop_every
+        self.f_distance_matrix_drop_delay_s = f_distance_matrix_drop_delay_s
+        self.o_rng = np.random.default_rng(i_seed + 1)
+        self.o_lock = threading.Lock()
+        self.d_request_counts = cl.Counter()
+        self.i_connections = 0
+        self.i_distance_matrix_requests = 0
+        self.lls_distance_matrix_destinations = []
+        self.o_server = None
+
+        # Generate hotels, indexed by page path
+        self.ld_hotels = generate_site_hotels(i_hotrate, i_normal, f_none_rate=f_none_rate, f_deals_gone_rate=f_deals_gone_rate, i_seed=i_seed)
+        self.d_path_to_hotel = {d_hotel['s_hotel_path']: d_hotel for d_hotel in self.ld_hotels}
+        self.ss_hotel_addresses = set(d_hotel['s_hotel_address'] for d_hotel in self.ld_hotels)
+
+
+    def start(self, i_port=0):
+
+        # Serve site from a background thread
+        self.o_server = ThreadingHTTPServer(('127.0.0.1', i_port), partial(LocalSiteRequestHandler, o_site=self))
+        threading.Thread(target=self.o_server.serve_forever, daemon=True).start()
+        return self
+
+
+    def stop(self):
+
+        # Stop serving site
+        if self.o_server is not None:
+            self.o_server.shutdown()
+            self.o_server.server_close()
+            self.o_server = None
+
+
+    @property
+    def s_base_url(self):
+
+        # Return base url of the running site
+        return f'http://127.0.0.1:{self.o_server.server_port}'
+
+
+    @property
+    def s_search_query_url(self):
+
+        # Return a search query url shaped like a Hotwire one
+        return f'{self.s_base_url}/hotels/search?destination=Los%20Angeles&startDate=06-29-2024&endDate=06-30-2024&rooms=1&adults=2&children=0'
+
+
+    @property
+    def s_maps_directions_url(self):
+
+        # Return url of the directions page
+        return f'{self.s_base_url}/maps/dir/'
+
+
+    @property
+    def s_distance_matrix_url(self):
+
+        # Return url of the distance matrix API
+        return f'{self.s_base_url}{S_DISTANCE_MATRIX_PATH}'
+
+
+    def get_decodings(self):
+
+        # Return normal hotel url behind each hotrate hotel url, the ground truth to score decodings against
+        return {f'{self.s_base_url}{d_hotel["s_hotel_path"]}': f'{self.s_base_url}{d_hotel["s_normal_path"]}' for d_hotel in self.ld_hotels if 's_normal_path' in d_hotel}
+
+
+    def record_request(self, s_page_kind):
+
+        # Count a request by page kind
+        with self.o_lock:
+            self.d_request_counts[s_page_kind] += 1
+
+
+    def get_request_counts(self):
+
+        # Return request counts by page kind
+        with self.o_lock:
+            return dict(self.d_request_counts)
+
+
+    def record_connection(self):
+
+        # Count a new client connection
+        with self.o_lock:
+            self.i_connections += 1
+
+
+    def get_connection_count(self):
+
+        # Return how many client connections were opened, which keep-alive keeps below the request count
+        with self.o_lock:
+            return self.i_connections
+
+
+    def get_distance_matrix_destinations(self):
+
+        # Return destinations of each answered distance matrix request, in order
+        with self.o_lock:
+            return [list(ls_destinations) for ls_destinations in self.lls_distance_matrix_destinations]
+
+
+    def is_dropped_request(self):
+
+        # Decide whether to close the connection without answering, as a server dropping a keep-alive connection does, or stalling first if a drop delay is set
+        with self.o_lock:
+            self.i_distance_matrix_requests += 1
+            return (self.i_distance_matrix_drop_every > 0) and (self.i_distance_matrix_requests % self.i_distance_matrix_drop_every == 0)
+
+
+    def render_distance_matrix(self, d_query):
+
+        # Check request as the Google Maps API does, answering errors with a top level status
+        ls_origins = [s for s in d_query.get('origins', '').split('|') if s != '']
+        ls_destinations = [s for s in d_query.get('destinations', '').split('|') if s != '']
+        if (len(ls_origins) == 0) or (len(ls_destinations) == 0):
+            return json.dumps({'destination_addresses': [], 'origin_addresses': [], 'rows': [], 'status': 'INVALID_REQUEST'})
+        if (max(len(ls_origins), len(ls_destinations)) > I_DISTANCE_MATRIX_MAX_ADDRESSES) or (len(ls_origins) * len(ls_destinations) > I_DISTANCE_MATRIX_MAX_ELEMENTS):
+            return json.dumps({'destination_addresses': [], 'origin_addresses': [], 'rows': [], 'status': 'MAX_DIMENSIONS_EXCEEDED'})
+        with self.o_lock:
+            self.lls_distance_matrix_destinations.append(ls_destinations)
+
+        # Answer one row per origin and one element per destination, addresses the site does not know being NOT_FOUND
+        ld_rows = []
+        for _ in ls_origins:
+            ld_elements = []
+            for s_destination in ls_destinations:
+                if s_destination not in self.ss_hotel_addresses:
+                    ld_elements.append({'status': 'NOT_FOUND'})
+                    continue
+                f_distance_miles = get_driving_distance(s_destination)
+                ld_elements.append({
+                    'distance': {'text': f'{f_distance_miles:.1f} mi', 'value': int(round(f_distance_miles * F_METERS_PER_MILE))},
+                    'duration': {'text': f'{int(f_distance_miles * 2) + 1} mins', 'value': int(f_distance_miles * 120) + 60},
+                    'status': 'OK',
+                })
+            ld_rows.append({'elements': ld_elements})
+        return json.dumps({
+            'destination_addresses': [s if s in self.ss_hotel_addresses else '' for s in ls_destinations],
+            'origin_addresses': ls_origins,
+            'rows': ld_rows,
+            'status': 'OK',
+        })
+
+
+    def _is_error_page(self):
+
+        # Decide at random whether to serve the error page, as the real site now and then does
+        with self.o_lock:
+            return self.o_rng.random() < self.f_error_page_rate
+
+
+    def render(self, s_path, d_query):
+
+        # Render search results, serving the first batch of cards with the page and later batches on request
+        if s_path == '/hotels/search':
+            if self._is_error_page():
+                return 'error_page', S_NOT_FOUND_PAGE
+            ls_star_rating_items = [f'<div class="ListBuilderItem"><span class="filter-text">{i_stars} stars</span></div>' for i_stars in range(5, 0, -1)]
+            ls_guest_rating_items = [f'<label><span class="label-text">{f_rating:g}+</span></label>' for f_rating in [4.5, 4.0, 3.5, 3.0, 2.5]]
+            i_showing_nth = min(self.i_batch_size, len(self.ld_hotels))
+            return 'search', S_SEARCH_PAGE_TEMPLATE.format(
+                s_star_rating_filter=''.join(ls_star_rating_items), s_guest_rating_filter=''.join(ls_guest_rating_items),
+                i_showing_nth=i_showing_nth, i_showing_total=len(self.ld_hotels), i_batch_size=self.i_batch_size,
+                s_hotel_cards=''.join(render_hotel_card(d_hotel) for d_hotel in self.ld_hotels[:i_showing_nth]))
+        if s_path == '/hotels/search/cards':
+            return 'search_cards', ''.join(render_hotel_card(d_hotel) for d_hotel in self.ld_hotels[int(d_query.get('start', 0)):int(d_query.get('end', 0))])
+
+        # Render hotrate hotel pages, with ratings and booking unless the deal is gone, and their checkout pages
+        if s_path.startswith('/hotels/hotrate/') or s_path.startswith('/hotels/checkout/'):
+            d_hotel = self.d_path_to_hotel.get(s_path.replace('/checkout/', '/hotrate/'))
+            if (d_hotel is None) or self._is_error_page():
+                return 'error_page', S_NOT_FOUND_PAGE
+            if s_path.startswith('/hotels/checkout/'):
+                return 'checkout', S_CHECKOUT_PAGE_TEMPLATE.format(f_final_price=d_hotel['f_final_price'])
+            if d_hotel['b_deals_gone']:
+                s_details = '<div class="deals-gone-details-alert">Sorry, this deal is no longer available.</div>'
+            else:
+                s_details = ''.join(f'<div class="GuestRatingProgressBar"><span class="GuestRatingProgressBar__counter">{s_rating}</span></div>' for s_rating in d_hotel['ls_ratings']) + \
+                    f'<button class="details-bed-types__bed-choice__book-now" onclick="location.href=\'{d_hotel["s_hotel_path"].replace("/hotrate/", "/checkout/")}\'">Book now</button>'
+            return 'hotrate_detail', S_HOTRATE_PAGE_TEMPLATE.format(s_hotel_name=html.escape(d_hotel['s_hotel_name']), s_details=s_details)
+
+        # Render normal hotel pages, whose ratings show once the reviews are opened, in a different order to the hotrate page's
+        if s_path.startswith('/hotels/details/'):
+            d_hotel = self.d_path_to_hotel.get(s_path)
+            if (d_hotel is None) or self._is_error_page():
+                return 'error_page', S_NOT_FOUND_PAGE
+            ls_ratings = d_hotel['ls_ratings']
+            s_reviews = ''.join(f'<div class="uitk-progress-bar"><span class="uitk-progress-bar-value">{s_rating}/5</span></div>' for s_rating in
+                                [ls_ratings[3], ls_ratings[1], ls_ratings[2], ls_ratings[0]])
+            return 'normal_detail', S_NORMAL_PAGE_TEMPLATE.format(s_hotel_name=html.escape(d_hotel['s_hotel_name']), s_hotel_address=html.escape(d_hotel['s_hotel_address']),
+                                                                  s_reviews_json=json.dumps(s_reviews).replace('</', '<\\/'))
+
+        # Render directions page, and driving distances to addresses the site knows, one at a time or as a matrix
+        if s_path.startswith('/maps/dir/'):
+            return 'maps', S_MAPS_PAGE
+        if s_path == S_DISTANCE_MATRIX_PATH:
+            return 'distance_matrix', self.render_distance_matrix(d_query)
+        if s_path == '/maps/distance':
+            s_hotel_address = d_query.get('to', '')
+            return 'maps_distance', f'{get_driving_distance(s_hotel_address):.1f}' if s_hotel_address in self.ss_hotel_addresses else ''
+        if s_path == '/favicon.ico':
+            return 'favicon', ''
+        return 'error_page', S_NOT_FOUND_PAGE
+
+
+def main():
+
+    # Parse arguments
+    o_parser = argparse.ArgumentParser(description='Serve a local stand-in for the Hotwire search, hotel, checkout and directions pages and the distance matrix API HackingHotwire reads')
+    o_parser.add_argument('--hotrate', type=int, default=40)
+    o_parser.add_argument('--normal', type=int, default=200)
+    o_parser.add_argument('--batch-size', type=int, default=20)
+    o_parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every request')
+    o_parser.add_argument('--error-page-rate', type=float, default=0.0)
+    o_parser.add_argument('--deals-gone-rate', type=float, default=0.0)
+    o_parser.add_argument('--seed', type=int, default=0)
+    o_parser.add_argument('--distance-matrix-drop-every', type=int, default=0, help='Close the connection without answering every nth distance matrix request')
+    o_parser.add_argument('--distance-matrix-drop-delay', type=float, default=0.0, help='Seconds to stall before closing a dropped connection')
+    o_parser.add_argument('--port', type=int, default=8000)
+    o_args = o_parser.parse_args()
+
+    # Serve site until interrupted
+    o_site = LocalSite(o_args.hotrate, o_args.normal, o_args.batch_size, o_args.latency, o_args.error_page_rate, o_args.deals_gone_rate, i_seed=o_args.seed,
+                       i_distance_matrix_drop_every=o_args.distance_matrix_drop_every, f_distance_matrix_drop_delay_s=o_args.distance_matrix_drop_delay).start(o_args.port)
+    print(f'Search page:      {o_site.s_search_query_url}')
+    print(f'Directions page:  {o_site.s_maps_directions_url}')
+    print(f'Distance matrix:  {o_site.s_distance_matrix_url}')
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        o_site.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# Do imports
+import copy
+import numpy as np
+
+
+# Define synthetic value pools
+LF_HOTEL_CLASSES = [2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0]
+LF_GUEST_RATINGS = [round(f, 1) for f in np.arange(3.0, 5.01, 0.1)]
+LS_AMENITY_IDS = ['wifi', 'parking', 'pool', 'breakfast', 'gym', 'spa', 'restaurant', 'bar', 'pets', 'shuttle',
+                  'kitchen', 'laundry', 'business', 'beach', 'casino', 'golf', 'ac', 'roomservice', 'crib', 'ev']
+LS_RATING_STRINGS = [f'{f:.1f}' for f in np.arange(6.0, 10.01, 0.2)]
+
+
+def _get_random_comparison_attributes(o_rng, ls_attributes, ls_neighbourhoods, i_amenities, f_none_rate):
+
+    # Draw a random set of comparison attributes
+    d_hotel_comparison_attributes = {
+        'f_hotel_class': float(o_rng.choice(LF_HOTEL_CLASSES)),
+        's_distance': str(o_rng.choice(ls_neighbourhoods)),
+        'f_guest_rating': float(o_rng.choice(LF_GUEST_RATINGS)),
+        'i_reviews_total': int(o_rng.integers(1, 5000)),
+        'ls_amenities': sorted(o_rng.choice(LS_AMENITY_IDS[:i_amenities], size=int(o_rng.integers(0, i_amenities + 1)), replace=False).tolist()),
+        'i_list_price': int(o_rng.integers(60, 600)),
+        's_condition_rating': str(o_rng.choice(LS_RATING_STRINGS)),
+        's_service_rating': str(o_rng.choice(LS_RATING_STRINGS)),
+        's_cleanliness_rating': str(o_rng.choice(LS_RATING_STRINGS)),
+    }
+
+    # Blank out attributes at random
+    for s_attribute in ls_attributes:
+        if o_rng.random() < f_none_rate:
+            d_hotel_comparison_attributes[s_attribute] = None
+    return d_hotel_comparison_attributes
+
+
+def generate_hotel_metadata(i_hotrate, i_normal, f_none_rate=0.05, i_amenities=8, f_hotrate_from_normal_pct=0.8, b_secondary=False, i_seed=0):
+
+    # Define key variables
+    o_rng = np.random.default_rng(i_seed)
+    ls_attributes = ['f_hotel_class', 's_distance', 'f_guest_rating', 'i_reviews_total', 'ls_amenities', 'i_list_price',
+                     's_condition_rating', 's_service_rating', 's_cleanliness_rating']
+    ls_secondary_attributes = ls_attributes[6:]
+    ls_neighbourhoods = [f'Neighbourhood {i}' for i in range(max(10, i_normal // 50))]
+
+    # Generate normal hotels
+    ld_hotel_metadata_normal = []
+    for i_col_idx in range(i_normal):
+        d_hotel_comparison_attributes = _get_random_comparison_attributes(o_rng, ls_attributes, ls_neighbourhoods, i_amenities, f_none_rate)
+        if not b_secondary:
+            d_hotel_comparison_attributes.update({s_attribute: None for s_attribute in ls_secondary_attributes})
+        ld_hotel_metadata_normal.append({
+            's_hotel_url': f'https://www.hotwire.com/hotels/details/{100000 + i_col_idx}',
+            'd_hotel_comparison_attributes': d_hotel_comparison_attributes,
+            'd_hotel_additional_attributes': {
+                's_hotel_name': f'Hotel {i_col_idx}', 'i_sale_price': d_hotel_comparison_attributes['i_list_price'], 'f_final_price': None,
+                'f_savings_pct': None, 's_hotel_address': f'{i_col_idx} Main St', 'f_geographic_distance': float(o_rng.uniform(0.1, 40.0)),
+                's_geographic_url': None,
+            },
+        })
+
+    # Generate hotrate hotels, most of which disguise a normal hotel
+    ld_hotel_metadata_hotrate = []
+    for i_row_idx in range(i_hotrate):
+        if (i_normal > 0) and (o_rng.random() < f_hotrate_from_normal_pct):
+            d_hotel_comparison_attributes = copy.copy(ld_hotel_metadata_normal[int(o_rng.integers(0, i_normal))]['d_hotel_comparison_attributes'])
+            for s_attribute in ls_attributes:
+                if o_rng.random() < f_none_rate:
+                    d_hotel_comparison_attributes[s_attribute] = None
+        else:
+            d_hotel_comparison_attributes = _get_random_comparison_attributes(o_rng, ls_attributes, ls_neighbourhoods, i_amenities, f_none_rate)
+        if not b_secondary:
+            d_hotel_comparison_attributes.update({s_attribute: None for s_attribute in ls_secondary_attributes})
+        i_list_price = d_hotel_comparison_attributes['i_list_price'] or int(o_rng.integers(60, 600))
+        ld_hotel_metadata_hotrate.append({
+            's_hotel_url': f'https://www.hotwire.com/hotels/details/hotrate-{i_row_idx}',
+            'd_hotel_comparison_attributes': d_hotel_comparison_attributes,
+            'd_hotel_additional_attributes': {
+                's_hotel_name': f'{d_hotel_comparison_attributes["f_hotel_class"]}-star hotel', 'i_sale_price': int(i_list_price * o_rng.uniform(0.5, 1.0)),
+                'f_final_price': None, 'f_savings_pct': None, 's_hotel_address': None, 'f_geographic_distance': None, 's_geographic_url': None,
+            },
+        })
+
+    # Return synthetic metadata
+    return ls_attributes, ld_hotel_metadata_hotrate, ld_hotel_metadata_normal
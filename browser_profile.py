@@ -0,0 +1,61 @@
+# Do imports
+from selenium import webdriver
+
+
+# Define default browser and driver locations
+S_BROWSER_BINARY_PATH = 'browser\Win_948375_chrome-win\chrome-win\chrome.exe'
+S_DRIVER_EXECUTABLE_PATH = 'browser\chromedriver_win32\chromedriver'
+
+
+# Define request patterns blocked by the lean profile, covering fonts, media, map tiles and third-party trackers
+LS_BLOCKED_URL_PATTERNS = [
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*.mp4', '*.webm',
+    '*khms*.google.com/kh/*', '*.googleapis.com/maps/vt*', '*google.com/maps/vt*', '*.gstatic.com/mapfiles/*',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googleadservices.com*', '*googlesyndication.com*',
+    '*facebook.net*', '*facebook.com/tr*', '*bing.com/bat*', '*bat.bing.com*', '*hotjar.com*', '*quantserve.com*',
+    '*criteo.com*', '*criteo.net*', '*adnxs.com*', '*taboola.com*', '*scorecardresearch.com*', '*newrelic.com*',
+    '*nr-data.net*', '*demdex.net*', '*omtrdc.net*', '*everesttech.net*', '*branch.io*', '*qualtrics.com*',
+]
+
+
+def create_driver(s_browser_profile='full', s_browser_binary_path=S_BROWSER_BINARY_PATH, s_driver_executable_path=S_DRIVER_EXECUTABLE_PATH, b_capture_network=False):
+
+    # Check that arguments are valid
+    assert s_browser_profile in ['full', 'lean'], \
+        '\nError:\ts_browser_profile expected to be in [\'full\', \'lean\']'
+
+    # Set webdriver parameters
+    o_option = webdriver.ChromeOptions()
+    o_option.binary_location = s_browser_binary_path
+    o_option.add_experimental_option('excludeSwitches', ['enable-automation'])
+    o_option.add_experimental_option('useAutomationExtension', False)
+    o_option.add_argument('--disable-blink-features=AutomationControlled')
+
+    # Log network events, so that API responses can be read back
+    if b_capture_network:
+        o_option.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+    # Run lean profile headless at a desktop window size, without images
+    if s_browser_profile == 'lean':
+        o_option.add_argument('--headless=new')
+        o_option.add_argument('--window-size=1920,1080')
+        o_option.add_argument('--blink-settings=imagesEnabled=false')
+        o_option.add_argument('--disable-extensions')
+        o_option.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+
+    # Initialize driver
+    o_driver = webdriver.Chrome(executable_path=s_driver_executable_path, options=o_option)
+    o_driver.implicitly_wait(10)
+    if s_browser_profile == 'full':
+        o_driver.maximize_window()
+
+    # Block unneeded requests, and keep headless user agent indistinguishable from a normal one
+    if s_browser_profile == 'lean':
+        o_driver.execute_cdp_cmd('Network.enable', {})
+        o_driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LS_BLOCKED_URL_PATTERNS})
+        s_user_agent = o_driver.execute_script('return navigator.userAgent;').replace('HeadlessChrome', 'Chrome')
+        o_driver.execute_cdp_cmd('Network.setUserAgentOverride', {'userAgent': s_user_agent})
+
+    # Return driver
+    return o_driver
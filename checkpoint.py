@@ -0,0 +1,107 @@
+# Do imports
+import os
+import copy
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+
+
+# Define how long a checkpoint can be resumed from, since sale prices and deals it holds go stale within hours
+F_CHECKPOINT_MAX_AGE_S = 2.0 * 3600.0
+
+
+def get_checkpoint_key(s_search_query_url, s_hack_mode, d_hotel_filter, s_geographic_goto_address, b_fetch_final_price):
+
+    # Key checkpoints by everything that changes what a run fetches, so that only a rerun of the same query resumes
+    s_run_description = json.dumps([s_search_query_url, s_hack_mode, None if d_hotel_filter is None else dict(sorted(d_hotel_filter.items())),
+                                    s_geographic_goto_address, b_fetch_final_price])
+    return hashlib.sha256(s_run_description.encode('utf-8')).hexdigest()[:16]
+
+
+class Checkpoint:
+
+
+    def __init__(self, s_checkpoint_dir, s_checkpoint_key, f_save_interval_s=5.0, f_max_age_s=F_CHECKPOINT_MAX_AGE_S):
+
+        # Define instance variables
+        self.s_checkpoint_file = os.path.join(s_checkpoint_dir, f'{s_checkpoint_key}.pkl')
+        self.f_save_interval_s = f_save_interval_s
+        self.f_saved_at = 0.0
+        self.o_lock = threading.Lock()
+
+        # Load state of an interrupted run, starting over if there is none, it cannot be read, or it was created too long ago
+        self.d_state = {'f_created_at': time.time(), 'd_stage_outputs': {}, 'd_stage_progress': {}}
+        if os.path.isfile(self.s_checkpoint_file):
+            try:
+                with open(self.s_checkpoint_file, 'rb') as o_file:
+                    d_state = pickle.load(o_file)
+                if time.time() - d_state['f_created_at'] <= f_max_age_s:
+                    self.d_state = d_state
+            except:
+                pass
+
+
+    def _save(self):
+
+        # Write state to a temporary file first and swap it in, so that a crash mid-write never leaves a broken checkpoint
+        s_checkpoint_dir = os.path.dirname(self.s_checkpoint_file)
+        if s_checkpoint_dir != '':
+            os.makedirs(s_checkpoint_dir, exist_ok=True)
+        i_file_descriptor, s_temp_file = tempfile.mkstemp(dir=s_checkpoint_dir if s_checkpoint_dir != '' else '.', suffix='.tmp')
+        try:
+            with os.fdopen(i_file_descriptor, 'wb') as o_file:
+                pickle.dump(self.d_state, o_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(s_temp_file, self.s_checkpoint_file)
+        except:
+            os.remove(s_temp_file)
+            raise
+        self.f_saved_at = time.monotonic()
+
+
+    def get_stage(self, s_stage):
+
+        # Return output of a stage completed before the run stopped, or None
+        with self.o_lock:
+            return self.d_state['d_stage_outputs'].get(s_stage)
+
+
+    def set_stage(self, s_stage, o_output):
+
+        # Store a snapshot of a completed stage's output, which later stages are free to modify, and save right away
+        with self.o_lock:
+            self.d_state['d_stage_outputs'][s_stage] = copy.deepcopy(o_output)
+            self._save()
+
+
+    def get_progress(self, s_stage, s_item_key):
+
+        # Return result of an item a stage finished before the run stopped, or None
+        with self.o_lock:
+            return self.d_state['d_stage_progress'].get(s_stage, {}).get(s_item_key)
+
+
+    def set_progress(self, s_stage, s_item_key, o_result):
+
+        # Store result of an item, saving at most once per interval since items finish every few seconds
+        with self.o_lock:
+            self.d_state['d_stage_progress'].setdefault(s_stage, {})[s_item_key] = o_result
+            if time.monotonic() - self.f_saved_at >= self.f_save_interval_s:
+                self._save()
+
+
+    def flush(self):
+
+        # Save any results stored since the last save
+        with self.o_lock:
+            self._save()
+
+
+    def remove(self):
+
+        # Delete checkpoint once the run has completed
+        with self.o_lock:
+            if os.path.isfile(self.s_checkpoint_file):
+                os.remove(self.s_checkpoint_file)
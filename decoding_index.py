@@ -0,0 +1,100 @@
+# Do imports
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+
+# Define hotrate card attributes that identify a disguised hotel across runs
+LS_FINGERPRINT_ATTRIBUTES = ['s_distance', 'f_hotel_class', 'f_guest_rating', 'i_reviews_total', 'ls_amenities']
+
+
+def get_hotrate_fingerprint(d_hotel_comparison_attributes):
+
+    # Fingerprint a hotrate card, unless it lacks the attributes needed to tell hotels apart
+    if (d_hotel_comparison_attributes['s_distance'] is None) or (d_hotel_comparison_attributes['f_hotel_class'] is None):
+        return None
+    s_fingerprint_data = json.dumps([d_hotel_comparison_attributes[s_attribute] for s_attribute in LS_FINGERPRINT_ATTRIBUTES])
+    return hashlib.sha1(s_fingerprint_data.encode('utf-8')).hexdigest()
+
+
+class DecodingIndex:
+
+
+    def __init__(self, s_cache_file, f_max_age_days=60.0, i_min_confirmations=1):
+
+        # Define instance variables
+        self.s_cache_file = s_cache_file
+        self.f_max_age_days = f_max_age_days
+        self.i_min_confirmations = i_min_confirmations
+        self.o_lock = threading.Lock()
+
+        # Open index database, dropping entries that have aged out
+        if os.path.dirname(s_cache_file) != '':
+            os.makedirs(os.path.dirname(s_cache_file), exist_ok=True)
+        self.o_connection = sqlite3.connect(s_cache_file, check_same_thread=False)
+        self.o_connection.execute('''
+            CREATE TABLE IF NOT EXISTS known_decodings (
+                s_fingerprint TEXT PRIMARY KEY,
+                s_hotel_url_normal TEXT NOT NULL,
+                i_attributes_matched INTEGER NOT NULL,
+                i_confirmations INTEGER NOT NULL,
+                f_first_seen REAL NOT NULL,
+                f_last_seen REAL NOT NULL
+            )''')
+        self.o_connection.commit()
+        self.prune()
+
+
+    def lookup(self, d_hotel_comparison_attributes):
+
+        # Return the normal hotel url previously decoded for a hotrate card, if fresh and confirmed enough
+        s_fingerprint = get_hotrate_fingerprint(d_hotel_comparison_attributes)
+        if s_fingerprint is None:
+            return None
+        with self.o_lock:
+            t_row = self.o_connection.execute(
+                'SELECT s_hotel_url_normal, i_confirmations, f_last_seen FROM known_decodings WHERE s_fingerprint = ?', (s_fingerprint,)).fetchone()
+        if t_row is None:
+            return None
+        s_hotel_url_normal, i_confirmations, f_last_seen = t_row
+        if (i_confirmations < self.i_min_confirmations) or (time.time() - f_last_seen > 86400.0 * self.f_max_age_days):
+            return None
+        return s_hotel_url_normal
+
+
+    def record(self, d_hotel_comparison_attributes, s_hotel_url_normal, i_attributes_matched):
+
+        # Store a decoding, confirming it if it agrees with the known one and replacing it otherwise
+        s_fingerprint = get_hotrate_fingerprint(d_hotel_comparison_attributes)
+        if s_fingerprint is None:
+            return
+        f_now = time.time()
+        with self.o_lock:
+            t_row = self.o_connection.execute(
+                'SELECT s_hotel_url_normal, i_confirmations, f_first_seen FROM known_decodings WHERE s_fingerprint = ?', (s_fingerprint,)).fetchone()
+            if (t_row is not None) and (t_row[0] == s_hotel_url_normal):
+                i_confirmations, f_first_seen = t_row[1] + 1, t_row[2]
+            else:
+                i_confirmations, f_first_seen = 1, f_now
+            self.o_connection.execute(
+                'INSERT OR REPLACE INTO known_decodings VALUES (?, ?, ?, ?, ?, ?)',
+                (s_fingerprint, s_hotel_url_normal, i_attributes_matched, i_confirmations, f_first_seen, f_now))
+            self.o_connection.commit()
+
+
+    def prune(self):
+
+        # Drop entries not seen within the maximum age
+        with self.o_lock:
+            self.o_connection.execute('DELETE FROM known_decodings WHERE f_last_seen < ?', (time.time() - 86400.0 * self.f_max_age_days,))
+            self.o_connection.commit()
+
+
+    def close(self):
+
+        # Close index database
+        with self.o_lock:
+            self.o_connection.close()
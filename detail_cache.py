@@ -0,0 +1,124 @@
+# Do imports
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+
+# Define default time to live, in days, of each cached hotel detail field
+D_FIELD_TTL_DAYS = {
+    's_condition_rating': 14.0,
+    's_service_rating': 14.0,
+    's_cleanliness_rating': 14.0,
+    's_hotel_address': 180.0,
+}
+
+
+# Define query parameters that carry a hotel's property id, and the path pattern that does, e.g. /go/hotel/info/12670/2024-06-29/2024-06-30
+LS_HOTEL_ID_QUERY_PARAMETERS = ['hotelId', 'propertyId']
+O_HOTEL_ID_PATH_PATTERN = re.compile(r'/info/(\d+)(?:/|$)')
+
+
+def get_hotel_cache_key(s_hotel_url):
+
+    # Key hotels by property id when the url carries one, as a query parameter, as the path segment after /info/, or as the only all-digit path segment,
+    # so that dates in the path are never taken for an id, otherwise by the full url, so that two hotels never share a key
+    o_url = urlsplit(s_hotel_url)
+    d_query = parse_qs(o_url.query)
+    for s_parameter in LS_HOTEL_ID_QUERY_PARAMETERS:
+        if s_parameter in d_query:
+            return f'hotel:{o_url.netloc}/{d_query[s_parameter][0]}'
+    o_match = O_HOTEL_ID_PATH_PATTERN.search(o_url.path)
+    if o_match is not None:
+        return f'hotel:{o_url.netloc}/{o_match.group(1)}'
+    ls_id_segments = [s_segment for s_segment in o_url.path.split('/') if s_segment.isdigit()]
+    if len(ls_id_segments) == 1:
+        return f'hotel:{o_url.netloc}/{ls_id_segments[0]}'
+    return f'url:{o_url.netloc}{o_url.path}?{o_url.query}'
+
+
+class DetailCache:
+
+
+    def __init__(self, s_cache_file, d_field_ttl_days=None, i_max_entries=100000):
+
+        # Define instance variables
+        self.s_cache_file = s_cache_file
+        self.d_field_ttl_days = D_FIELD_TTL_DAYS if d_field_ttl_days is None else d_field_ttl_days
+        self.i_max_entries = i_max_entries
+        self.o_lock = threading.Lock()
+
+        # Open cache database
+        if os.path.dirname(s_cache_file) != '':
+            os.makedirs(os.path.dirname(s_cache_file), exist_ok=True)
+        self.o_connection = sqlite3.connect(s_cache_file, check_same_thread=False)
+        self.o_connection.execute('''
+            CREATE TABLE IF NOT EXISTS hotel_details (
+                s_hotel_key TEXT NOT NULL,
+                s_field TEXT NOT NULL,
+                s_value TEXT NOT NULL,
+                f_stored_at REAL NOT NULL,
+                f_accessed_at REAL NOT NULL,
+                PRIMARY KEY (s_hotel_key, s_field)
+            )''')
+        self.o_connection.execute('CREATE INDEX IF NOT EXISTS hotel_details_accessed_at ON hotel_details (f_accessed_at)')
+
+        # Drop entries stored under keys of earlier versions, which could be shared by different hotels
+        self.o_connection.execute("DELETE FROM hotel_details WHERE (s_hotel_key NOT LIKE 'hotel:%') AND (s_hotel_key NOT LIKE 'url:%')")
+        self.o_connection.commit()
+
+
+    def get(self, s_hotel_url, ls_fields):
+
+        # Return fresh cached fields for a hotel, leaving out any that are missing or expired
+        s_hotel_key = get_hotel_cache_key(s_hotel_url)
+        f_now = time.time()
+        d_fields = {}
+        with self.o_lock:
+            for s_field, s_value, f_stored_at in self.o_connection.execute(
+                    f'SELECT s_field, s_value, f_stored_at FROM hotel_details WHERE s_hotel_key = ? AND s_field IN ({",".join("?" * len(ls_fields))})',
+                    [s_hotel_key] + list(ls_fields)):
+                if f_now - f_stored_at <= 86400.0 * self.d_field_ttl_days.get(s_field, 0.0):
+                    d_fields[s_field] = json.loads(s_value)
+            if len(d_fields) > 0:
+                self.o_connection.execute(
+                    f'UPDATE hotel_details SET f_accessed_at = ? WHERE s_hotel_key = ? AND s_field IN ({",".join("?" * len(d_fields))})',
+                    [f_now, s_hotel_key] + list(d_fields))
+                self.o_connection.commit()
+        return d_fields
+
+
+    def get_complete(self, s_hotel_url, ls_fields):
+
+        # Return cached fields only if every requested field is fresh
+        d_fields = self.get(s_hotel_url, ls_fields)
+        return d_fields if len(d_fields) == len(ls_fields) else None
+
+
+    def set(self, s_hotel_url, d_fields):
+
+        # Store fields for a hotel, skipping missing values
+        s_hotel_key = get_hotel_cache_key(s_hotel_url)
+        f_now = time.time()
+        with self.o_lock:
+            self.o_connection.executemany(
+                'INSERT OR REPLACE INTO hotel_details (s_hotel_key, s_field, s_value, f_stored_at, f_accessed_at) VALUES (?, ?, ?, ?, ?)',
+                [(s_hotel_key, s_field, json.dumps(o_value), f_now, f_now) for s_field, o_value in d_fields.items() if o_value is not None])
+
+            # Evict least recently used entries beyond the size bound
+            i_entries = self.o_connection.execute('SELECT COUNT(*) FROM hotel_details').fetchone()[0]
+            if i_entries > self.i_max_entries:
+                self.o_connection.execute(
+                    'DELETE FROM hotel_details WHERE rowid IN (SELECT rowid FROM hotel_details ORDER BY f_accessed_at LIMIT ?)',
+                    (i_entries - self.i_max_entries,))
+            self.o_connection.commit()
+
+
+    def close(self):
+
+        # Close cache database
+        with self.o_lock:
+            self.o_connection.close()
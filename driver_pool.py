@@ -0,0 +1,227 @@
+# Do imports
+import queue
+import threading
+import contextlib
+import collections as cl
+import concurrent.futures as cf
+from tqdm import tqdm
+
+
+class DriverPool:
+
+
+    def __init__(self, fo_create_driver, o_driver_main, i_workers=1):
+
+        # Check that arguments are valid
+        assert i_workers >= 1, \
+            '\nError:\ti_workers expected to be in [1, inf)'
+
+        # Define instance variables
+        self.fo_create_driver = fo_create_driver
+        self.o_driver_main = o_driver_main
+        self.i_workers = i_workers
+        self.lo_drivers_extra = []
+        self.o_thread_local = threading.local()
+        self.o_lock = threading.Lock()
+        self.o_idle_drivers = queue.Queue()
+        self.o_idle_drivers.put(o_driver_main)
+
+
+    def get_driver(self):
+
+        # Return the driver checked out by the calling thread, defaulting to the main driver
+        return getattr(self.o_thread_local, 'o_driver', self.o_driver_main)
+
+
+    def claim_prefetched_page(self, s_url):
+
+        # Pages are never prefetched by separate drivers
+        return False
+
+
+    def start_drivers(self, i_drivers):
+
+        # Start any additional drivers needed for the pool to hold the given number, in parallel
+        with self.o_lock:
+            i_drivers_missing = min(i_drivers, self.i_workers) - 1 - len(self.lo_drivers_extra)
+            if i_drivers_missing > 0:
+                with cf.ThreadPoolExecutor(max_workers=i_drivers_missing) as o_executor:
+                    lo_drivers_new = list(o_executor.map(lambda _: self.fo_create_driver(), range(i_drivers_missing)))
+                self.lo_drivers_extra.extend(lo_drivers_new)
+                for o_driver in lo_drivers_new:
+                    self.o_idle_drivers.put(o_driver)
+
+
+    @contextlib.contextmanager
+    def checkout(self):
+
+        # Check out an idle driver for the calling thread, waiting for one if all are busy
+        o_driver = self.o_idle_drivers.get()
+        self.o_thread_local.o_driver = o_driver
+        try:
+            yield o_driver
+        finally:
+            del self.o_thread_local.o_driver
+            self.o_idle_drivers.put(o_driver)
+
+
+    def _run_task(self, f_task, o_item):
+
+        # Check out a driver for the duration of the task
+        with self.checkout():
+            return f_task(o_item)
+
+
+    def map(self, f_task, l_items, s_description=None):
+
+        # Run serially on the main driver when there is nothing to parallelize
+        l_results = [None] * len(l_items)
+        o_tqdm = tqdm(total=len(l_items))
+        if s_description is not None:
+            o_tqdm.set_description(s_description)
+        i_workers = min(self.i_workers, len(l_items))
+        if i_workers <= 1:
+            for i_item_idx, o_item in enumerate(l_items):
+                l_results[i_item_idx] = f_task(o_item)
+                o_tqdm.update(1)
+            o_tqdm.close()
+            return l_results
+
+        # Fan tasks out over one thread per driver
+        self.start_drivers(i_workers)
+        with cf.ThreadPoolExecutor(max_workers=i_workers) as o_executor:
+            d_future_to_idx = {o_executor.submit(self._run_task, f_task, o_item): i_item_idx for i_item_idx, o_item in enumerate(l_items)}
+            for o_future in cf.as_completed(d_future_to_idx):
+                l_results[d_future_to_idx[o_future]] = o_future.result()
+                o_tqdm.update(1)
+        o_tqdm.close()
+
+        # Return results in input order
+        return l_results
+
+
+    def close(self):
+
+        # Quit additional drivers, the main driver is closed by its owner
+        for o_driver in self.lo_drivers_extra:
+            o_driver.quit()
+        self.lo_drivers_extra = []
+        self.o_idle_drivers = queue.Queue()
+        self.o_idle_drivers.put(self.o_driver_main)
+
+
+class TabPool:
+
+
+    def __init__(self, o_driver, i_tabs=2):
+
+        # Check that arguments are valid
+        assert i_tabs >= 1, \
+            '\nError:\ti_tabs expected to be in [1, inf)'
+
+        # Define instance variables
+        self.o_driver = o_driver
+        self.i_tabs = i_tabs
+        self.s_handle_main = None
+        self.d_tab_name_to_handle = {}
+        self.s_prefetched_url = None
+        self.o_lock = threading.Lock()
+
+
+    def get_driver(self):
+
+        # Return the single driver shared by all tabs
+        return self.o_driver
+
+
+    def claim_prefetched_page(self, s_url):
+
+        # Report, at most once, whether the current tab already loaded the url in the background
+        b_prefetched = self.s_prefetched_url == s_url
+        self.s_prefetched_url = None
+        return b_prefetched
+
+
+    def start_drivers(self, i_drivers):
+
+        # All tabs share one driver, which is already started
+        pass
+
+
+    @contextlib.contextmanager
+    def checkout(self):
+
+        # Give the calling thread sole use of the driver, on the main tab
+        with self.o_lock:
+            if self.s_handle_main is not None:
+                self.o_driver.switch_to.window(self.s_handle_main)
+            yield self.o_driver
+
+
+    def _open_tabs(self):
+
+        # Open named tabs from the main tab, which is then allowed to navigate them
+        if self.s_handle_main is None:
+            self.s_handle_main = self.o_driver.current_window_handle
+        while len(self.d_tab_name_to_handle) < self.i_tabs:
+            s_tab_name = f'hacking_hotwire_tab_{len(self.d_tab_name_to_handle)}'
+            self.o_driver.switch_to.window(self.s_handle_main)
+            ls_handles_before = set(self.o_driver.window_handles)
+            self.o_driver.execute_script('window.open("about:blank", arguments[0]);', s_tab_name)
+            self.d_tab_name_to_handle[s_tab_name] = (set(self.o_driver.window_handles) - ls_handles_before).pop()
+
+
+    def _start_loading(self, s_tab_name, s_url):
+
+        # Navigate a background tab without waiting for it, since the driver only blocks on the current tab
+        self.o_driver.switch_to.window(self.s_handle_main)
+        self.o_driver.execute_script('window.open(arguments[0], arguments[1]);', s_url, s_tab_name)
+
+
+    def map(self, f_task, ls_urls, s_description=None):
+
+        # Start loading the first pages, one per tab
+        l_results = [None] * len(ls_urls)
+        o_tqdm = tqdm(total=len(ls_urls))
+        if s_description is not None:
+            o_tqdm.set_description(s_description)
+        self._open_tabs()
+        o_pending = cl.deque(enumerate(ls_urls))
+        o_loading = cl.deque()
+        for s_tab_name in self.d_tab_name_to_handle:
+            if len(o_pending) == 0:
+                break
+            i_item_idx, s_url = o_pending.popleft()
+            self._start_loading(s_tab_name, s_url)
+            o_loading.append((s_tab_name, i_item_idx, s_url))
+
+        # Harvest tabs in the order they started loading, refilling each tab as soon as it is free
+        while len(o_loading) > 0:
+            s_tab_name, i_item_idx, s_url = o_loading.popleft()
+            self.o_driver.switch_to.window(self.d_tab_name_to_handle[s_tab_name])
+            self.s_prefetched_url = s_url
+            try:
+                l_results[i_item_idx] = f_task(s_url)
+            finally:
+                self.s_prefetched_url = None
+            o_tqdm.update(1)
+            if len(o_pending) > 0:
+                i_item_idx, s_url = o_pending.popleft()
+                self._start_loading(s_tab_name, s_url)
+                o_loading.append((s_tab_name, i_item_idx, s_url))
+        o_tqdm.close()
+
+        # Return to main tab, and return results in input order
+        self.o_driver.switch_to.window(self.s_handle_main)
+        return l_results
+
+
+    def close(self):
+
+        # Close pool tabs, the main tab is closed by its owner
+        for s_handle in self.d_tab_name_to_handle.values():
+            self.o_driver.switch_to.window(s_handle)
+            self.o_driver.close()
+        if self.s_handle_main is not None:
+            self.o_driver.switch_to.window(self.s_handle_main)
+        self.d_tab_name_to_handle = {}
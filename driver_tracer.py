@@ -0,0 +1,149 @@
+# Do imports
+import os
+import sys
+import json
+import time
+import threading
+import contextlib
+import collections as cl
+
+
+# Define which source files count as this project's own code, and which as selenium's
+S_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+S_SELENIUM_PATH_PART = f'{os.sep}selenium{os.sep}'
+
+
+class DriverTracer:
+
+
+    def __init__(self, s_class_name='HackingHotwire'):
+
+        # Define instance variables
+        self.s_class_name = s_class_name
+        self.o_lock = threading.Lock()
+        self.d_method_command_stats = cl.defaultdict(lambda: [0, 0.0])
+        self.d_card_stats = cl.defaultdict(lambda: [0, 0.0])
+        self.d_folded_stack_us = cl.defaultdict(int)
+        self.o_thread_state = threading.local()
+
+
+    def reset(self):
+
+        # Forget commands traced so far
+        with self.o_lock:
+            self.d_method_command_stats.clear()
+            self.d_card_stats.clear()
+            self.d_folded_stack_us.clear()
+
+
+    def attach(self, o_driver):
+
+        # Route every command of the driver through the tracer, element handles included, since they send their commands through the driver too
+        fo_execute = o_driver.execute
+        def fo_execute_traced(s_driver_command, d_params=None):
+            f_started_at = time.perf_counter()
+            try:
+                return fo_execute(s_driver_command, d_params)
+            finally:
+                self._record(s_driver_command, time.perf_counter() - f_started_at, sys._getframe(1))
+        o_driver.execute = fo_execute_traced
+        return o_driver
+
+
+    @contextlib.contextmanager
+    def card(self, i_card_idx):
+
+        # Count commands sent from this thread against a hotel card until the block exits
+        i_card_idx_outer = getattr(self.o_thread_state, 'i_card_idx', None)
+        self.o_thread_state.i_card_idx = i_card_idx
+        try:
+            yield
+        finally:
+            self.o_thread_state.i_card_idx = i_card_idx_outer
+
+
+    def _record(self, s_driver_command, f_elapsed_s, o_frame):
+
+        # Walk the calling frames, collecting project frames from the outermost in, the selenium call made by project code,
+        # and the calling method of the traced class
+        ls_stack = []
+        s_selenium_call = s_driver_command
+        s_method = None
+        b_in_project = False
+        while o_frame is not None:
+            o_code = o_frame.f_code
+            s_file_path = os.path.abspath(o_code.co_filename)
+            if S_SELENIUM_PATH_PART in s_file_path:
+                if not b_in_project:
+                    s_selenium_call = o_code.co_name
+            elif s_file_path.startswith(S_PROJECT_DIR) and (s_file_path != os.path.abspath(__file__)):
+                b_in_project = True
+                ls_stack.append(f'{os.path.splitext(os.path.basename(s_file_path))[0]}.{o_code.co_name}')
+                if s_method is None:
+                    o_self = o_frame.f_locals.get('self')
+                    if (o_self is not None) and (type(o_self).__name__ == self.s_class_name) and \
+                            (getattr(getattr(type(o_self), o_code.co_name, None), '__code__', None) is o_code):
+                        s_method = o_code.co_name
+            o_frame = o_frame.f_back
+
+        # Store command count and time by method and command, by the hotel card being read if there is one, and by folded stack
+        s_method = '<other>' if s_method is None else s_method
+        i_card_idx = getattr(self.o_thread_state, 'i_card_idx', None)
+        s_folded_stack = ';'.join(list(reversed(ls_stack)) + [s_selenium_call, s_driver_command])
+        with self.o_lock:
+            l_stats = self.d_method_command_stats[(s_method, s_selenium_call)]
+            l_stats[0] += 1
+            l_stats[1] += f_elapsed_s
+            if i_card_idx is not None:
+                l_stats = self.d_card_stats[i_card_idx]
+                l_stats[0] += 1
+                l_stats[1] += f_elapsed_s
+            self.d_folded_stack_us[s_folded_stack] += max(1, int(round(1e6 * f_elapsed_s)))
+
+
+    def get_summary(self):
+
+        # Summarize round trips by method, with a breakdown by command, and by hotel card
+        with self.o_lock:
+            d_methods = {}
+            for (s_method, s_selenium_call), (i_commands, f_seconds) in self.d_method_command_stats.items():
+                d_method = d_methods.setdefault(s_method, {'i_commands': 0, 'f_seconds': 0.0, 'd_commands': {}})
+                d_method['i_commands'] += i_commands
+                d_method['f_seconds'] += f_seconds
+                d_method['d_commands'][s_selenium_call] = {'i_commands': i_commands, 'f_seconds': round(f_seconds, 6)}
+            for d_method in d_methods.values():
+                d_method['f_seconds'] = round(d_method['f_seconds'], 6)
+            return {
+                'i_commands': sum(l_stats[0] for l_stats in self.d_method_command_stats.values()),
+                'f_seconds': round(sum(l_stats[1] for l_stats in self.d_method_command_stats.values()), 6),
+                'd_methods': dict(sorted(d_methods.items(), key=lambda t: -t[1]['f_seconds'])),
+                'd_cards': {str(i_card_idx): {'i_commands': l_stats[0], 'f_seconds': round(l_stats[1], 6)} for i_card_idx, l_stats in sorted(self.d_card_stats.items())},
+            }
+
+
+    def format_summary(self, i_top=15):
+
+        # Render the costliest methods as a table
+        d_summary = self.get_summary()
+        ls_lines = [f'WebDriver commands:  {d_summary["i_commands"]} in {d_summary["f_seconds"]:.2f} s', f'{"method":<40}{"commands":>10}{"seconds":>10}']
+        for s_method, d_method in list(d_summary['d_methods'].items())[:i_top]:
+            ls_lines.append(f'{s_method:<40}{d_method["i_commands"]:>10}{d_method["f_seconds"]:>10.2f}')
+        if len(d_summary['d_cards']) > 0:
+            ls_lines.append(f'Hotel cards read one command at a time:  {len(d_summary["d_cards"])}, '
+                            f'{sum(d["i_commands"] for d in d_summary["d_cards"].values()) / len(d_summary["d_cards"]):.1f} commands per card')
+        return '\n'.join(ls_lines)
+
+
+    def write(self, s_file_path_base):
+
+        # Write JSON summary, its table of costliest methods, and folded stacks weighted by microseconds for flame graph tools
+        if os.path.dirname(s_file_path_base) != '':
+            os.makedirs(os.path.dirname(s_file_path_base), exist_ok=True)
+        with open(f'{s_file_path_base}.json', 'w') as o_file:
+            json.dump(self.get_summary(), o_file, indent=2)
+        with open(f'{s_file_path_base}.txt', 'w') as o_file:
+            o_file.write(self.format_summary() + '\n')
+        with self.o_lock:
+            ls_folded_lines = [f'{s_folded_stack} {i_us}' for s_folded_stack, i_us in sorted(self.d_folded_stack_us.items())]
+        with open(f'{s_file_path_base}.folded', 'w') as o_file:
+            o_file.write('\n'.join(ls_folded_lines) + '\n')
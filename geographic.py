@@ -0,0 +1,243 @@
+# Do imports
+import os
+import json
+import time
+import sqlite3
+import queue
+import threading
+import http.client
+import numpy as np
+import urllib.parse
+import urllib.request
+
+
+# Define geographic constants
+F_EARTH_RADIUS_MILES = 3958.8
+S_NOMINATIM_URL = 'https://nominatim.openstreetmap.org/search'
+S_MAPS_DIRECTIONS_URL = 'https://www.google.com/maps/dir/'
+S_DISTANCE_MATRIX_URL = 'https://maps.googleapis.com/maps/api/distancematrix/json'
+F_METERS_PER_MILE = 1609.344
+
+
+def geocode_address_nominatim(s_address, f_timeout_s=10.0):
+
+    # Geocode an address with OpenStreetMap Nominatim, returning None if it cannot be found
+    s_url = f'{S_NOMINATIM_URL}?{urllib.parse.urlencode({"q": s_address, "format": "json", "limit": 1})}'
+    o_request = urllib.request.Request(s_url, headers={'User-Agent': 'HackingHotwire'})
+    with urllib.request.urlopen(o_request, timeout=f_timeout_s) as o_response:
+        ld_results = json.loads(o_response.read().decode('utf-8'))
+    if len(ld_results) == 0:
+        return None
+    return float(ld_results[0]['lat']), float(ld_results[0]['lon'])
+
+
+def get_haversine_distances(t_origin, na_lats, na_lons):
+
+    # Compute great-circle distances in miles from one origin to many destinations
+    f_lat_origin, f_lon_origin = np.radians(t_origin[0]), np.radians(t_origin[1])
+    na_lats, na_lons = np.radians(np.asarray(na_lats, dtype=float)), np.radians(np.asarray(na_lons, dtype=float))
+    na_a = np.sin((na_lats - f_lat_origin) / 2.0) ** 2 + np.cos(f_lat_origin) * np.cos(na_lats) * np.sin((na_lons - f_lon_origin) / 2.0) ** 2
+    return 2.0 * F_EARTH_RADIUS_MILES * np.arcsin(np.sqrt(na_a))
+
+
+def get_directions_url(s_origin_address, s_destination_address):
+
+    # Build a Google Maps directions url between two addresses
+    return f'{S_MAPS_DIRECTIONS_URL}{urllib.parse.quote(s_origin_address)}/{urllib.parse.quote(s_destination_address)}'
+
+
+class GeocodeCache:
+
+
+    def __init__(self, s_cache_file=None, fo_geocode=geocode_address_nominatim, f_min_interval_s=1.0):
+
+        # Define instance variables
+        self.fo_geocode = fo_geocode
+        self.f_min_interval_s = f_min_interval_s
+        self.f_last_request_at = 0.0
+        self.o_lock = threading.Lock()
+
+        # Open cache database, in memory if no file is given
+        if (s_cache_file is not None) and (os.path.dirname(s_cache_file) != ''):
+            os.makedirs(os.path.dirname(s_cache_file), exist_ok=True)
+        self.o_connection = sqlite3.connect(':memory:' if s_cache_file is None else s_cache_file, check_same_thread=False)
+        self.o_connection.execute('''
+            CREATE TABLE IF NOT EXISTS geocodes (
+                s_address TEXT PRIMARY KEY,
+                f_lat REAL,
+                f_lon REAL,
+                f_stored_at REAL NOT NULL
+            )''')
+        self.o_connection.commit()
+
+
+    def geocode(self, s_address):
+
+        # Return cached coordinates, including cached misses
+        with self.o_lock:
+            t_row = self.o_connection.execute('SELECT f_lat, f_lon FROM geocodes WHERE s_address = ?', (s_address,)).fetchone()
+            if t_row is not None:
+                return None if t_row[0] is None else (t_row[0], t_row[1])
+
+            # Geocode address, respecting the provider's request rate
+            time.sleep(max(0.0, self.f_last_request_at + self.f_min_interval_s - time.time()))
+            try:
+                t_coordinates = self.fo_geocode(s_address)
+            except:
+                return None
+            finally:
+                self.f_last_request_at = time.time()
+
+            # Store coordinates
+            self.o_connection.execute('INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?)',
+                                      (s_address, None if t_coordinates is None else t_coordinates[0], None if t_coordinates is None else t_coordinates[1], time.time()))
+            self.o_connection.commit()
+            return t_coordinates
+
+
+    def close(self):
+
+        # Close cache database
+        with self.o_lock:
+            self.o_connection.close()
+
+
+class HttpConnectionPool:
+
+
+    def __init__(self, s_base_url, i_pool_size=4, f_timeout_s=30.0):
+
+        # Define instance variables
+        o_url = urllib.parse.urlsplit(s_base_url)
+        self.co_connection = http.client.HTTPSConnection if o_url.scheme == 'https' else http.client.HTTPConnection
+        self.s_netloc = o_url.netloc
+        self.f_timeout_s = f_timeout_s
+        self.o_idle_connections = queue.LifoQueue(maxsize=i_pool_size)
+
+
+    def get(self, s_path):
+
+        # Reuse an idle keep-alive connection, retrying once on a fresh connection if the server dropped it or it stalled past the timeout
+        for i_attempt in range(2):
+            o_connection = None
+            if i_attempt == 0:
+                try:
+                    o_connection = self.o_idle_connections.get_nowait()
+                except queue.Empty:
+                    pass
+            if o_connection is None:
+                o_connection = self.co_connection(self.s_netloc, timeout=self.f_timeout_s)
+            try:
+                o_connection.request('GET', s_path, headers={'Connection': 'keep-alive'})
+                o_response = o_connection.getresponse()
+                s_body = o_response.read().decode('utf-8')
+            except (http.client.HTTPException, OSError):
+                o_connection.close()
+                if i_attempt == 1:
+                    raise
+                continue
+
+            # Return connection to the pool
+            try:
+                self.o_idle_connections.put_nowait(o_connection)
+            except queue.Full:
+                o_connection.close()
+            return o_response.status, s_body
+
+
+    def close(self):
+
+        # Close idle connections
+        while not self.o_idle_connections.empty():
+            self.o_idle_connections.get_nowait().close()
+
+
+class HaversineDistanceProvider:
+
+
+    def __init__(self, o_geocode_cache):
+
+        # Define instance variables
+        self.o_geocode_cache = o_geocode_cache
+        self.d_origin_coordinates = {}
+
+
+    def get_distances(self, s_origin_address, ls_destination_addresses):
+
+        # Geocode origin once per run
+        if s_origin_address not in self.d_origin_coordinates:
+            self.d_origin_coordinates[s_origin_address] = self.o_geocode_cache.geocode(s_origin_address)
+        t_origin_coordinates = self.d_origin_coordinates[s_origin_address]
+        if t_origin_coordinates is None:
+            return [None] * len(ls_destination_addresses)
+
+        # Geocode destinations and compute all great-circle distances at once
+        lt_coordinates = [self.o_geocode_cache.geocode(s_destination_address) for s_destination_address in ls_destination_addresses]
+        li_geocoded_idxs = [i_destination_idx for i_destination_idx, t_coordinates in enumerate(lt_coordinates) if t_coordinates is not None]
+        na_distances = get_haversine_distances(t_origin_coordinates,
+                                               [lt_coordinates[i_destination_idx][0] for i_destination_idx in li_geocoded_idxs],
+                                               [lt_coordinates[i_destination_idx][1] for i_destination_idx in li_geocoded_idxs])
+
+        # Return distances and directions urls, None where a destination could not be geocoded
+        lt_distances = [None] * len(ls_destination_addresses)
+        for i_destination_idx, f_distance in zip(li_geocoded_idxs, na_distances):
+            lt_distances[i_destination_idx] = (round(float(f_distance), 1), get_directions_url(s_origin_address, ls_destination_addresses[i_destination_idx]))
+        return lt_distances
+
+
+    def close(self):
+
+        # Nothing to release
+        pass
+
+
+class DistanceMatrixProvider:
+
+
+    def __init__(self, s_base_url=S_DISTANCE_MATRIX_URL, s_api_key=None, i_batch_size=25, i_pool_size=4, f_timeout_s=30.0):
+
+        # Define instance variables
+        self.s_path = urllib.parse.urlsplit(s_base_url).path
+        self.s_api_key = s_api_key
+        self.i_batch_size = i_batch_size
+        self.o_connection_pool = HttpConnectionPool(s_base_url, i_pool_size, f_timeout_s)
+
+
+    def _get_distances_batch(self, s_origin_address, ls_destination_addresses):
+
+        # Request one origin against a batch of destinations
+        d_query = {'origins': s_origin_address, 'destinations': '|'.join(ls_destination_addresses), 'units': 'imperial', 'mode': 'driving'}
+        if self.s_api_key is not None:
+            d_query['key'] = self.s_api_key
+        try:
+            i_status, s_body = self.o_connection_pool.get(f'{self.s_path}?{urllib.parse.urlencode(d_query)}')
+            d_response = json.loads(s_body)
+            ld_elements = d_response['rows'][0]['elements'] if (i_status == 200) and (d_response['status'] == 'OK') else None
+        except:
+            ld_elements = None
+        if (ld_elements is None) or (len(ld_elements) != len(ls_destination_addresses)):
+            return [None] * len(ls_destination_addresses)
+
+        # Return driving distances in miles, None where no route was found
+        return [(round(d_element['distance']['value'] / F_METERS_PER_MILE, 1), get_directions_url(s_origin_address, s_destination_address))
+                if d_element['status'] == 'OK' else None
+                for d_element, s_destination_address in zip(ld_elements, ls_destination_addresses)]
+
+
+    def get_distances(self, s_origin_address, ls_destination_addresses):
+
+        # Request distances for unique destinations, batch by batch
+        ls_destination_addresses_unique = list(dict.fromkeys(ls_destination_addresses))
+        d_address_to_distance = {}
+        for i_batch_start in range(0, len(ls_destination_addresses_unique), self.i_batch_size):
+            ls_batch = ls_destination_addresses_unique[i_batch_start:i_batch_start + self.i_batch_size]
+            d_address_to_distance.update(zip(ls_batch, self._get_distances_batch(s_origin_address, ls_batch)))
+
+        # Return distances in input order
+        return [d_address_to_distance[s_destination_address] for s_destination_address in ls_destination_addresses]
+
+
+    def close(self):
+
+        # Close pooled connections
+        self.o_connection_pool.close()
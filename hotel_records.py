@@ -0,0 +1,115 @@
+# Do imports
+from collections.abc import MutableMapping
+
+
+class SlottedRecord(MutableMapping):
+    __slots__ = ()
+    SS_FIELDS = frozenset()
+
+
+    def __init__(self, **kwargs):
+
+        # Set every field to None, then to the values given
+        for s_field in self.__slots__:
+            setattr(self, s_field, None)
+        for s_field, o_value in kwargs.items():
+            self[s_field] = o_value
+
+
+    def __getitem__(self, s_field):
+
+        # Read a field as a dict would, fields that were deleted or do not exist are missing keys
+        if s_field not in self.SS_FIELDS:
+            raise KeyError(s_field)
+        try:
+            return getattr(self, s_field)
+        except AttributeError:
+            raise KeyError(s_field) from None
+
+
+    def __setitem__(self, s_field, o_value):
+
+        # Write a field, the set of fields being fixed by the record type
+        if s_field not in self.SS_FIELDS:
+            raise KeyError(s_field)
+        setattr(self, s_field, o_value)
+
+
+    def __delitem__(self, s_field):
+
+        # Delete a field, leaving its slot empty
+        if s_field not in self.SS_FIELDS:
+            raise KeyError(s_field)
+        try:
+            delattr(self, s_field)
+        except AttributeError:
+            raise KeyError(s_field) from None
+
+
+    def __contains__(self, s_field):
+
+        # Check whether a field is present
+        return (s_field in self.SS_FIELDS) and hasattr(self, s_field)
+
+
+    def __iter__(self):
+
+        # Iterate over present fields in declaration order
+        for s_field in self.__slots__:
+            if hasattr(self, s_field):
+                yield s_field
+
+
+    def __len__(self):
+
+        # Count present fields
+        return sum(1 for _ in self)
+
+
+    def __copy__(self):
+
+        # Return a shallow copy, keeping the same fields present
+        o_record = self.__class__.__new__(self.__class__)
+        for s_field in self:
+            setattr(o_record, s_field, getattr(self, s_field))
+        return o_record
+
+
+    def __getstate__(self):
+
+        # Pickle present fields only
+        return {s_field: getattr(self, s_field) for s_field in self}
+
+
+    def __setstate__(self, d_state):
+
+        # Restore present fields
+        for s_field, o_value in d_state.items():
+            setattr(self, s_field, o_value)
+
+
+    def __repr__(self):
+
+        # Show record as the dict it stands in for
+        return f'{self.__class__.__name__}({dict(self.items())!r})'
+
+
+class HotelComparisonAttributes(SlottedRecord):
+    __slots__ = ('f_hotel_class', 's_distance', 'f_guest_rating', 'i_reviews_total', 'ls_amenities', 'i_list_price',
+                 's_condition_rating', 's_service_rating', 's_cleanliness_rating')
+    SS_FIELDS = frozenset(__slots__)
+
+
+class HotelAdditionalAttributes(SlottedRecord):
+    __slots__ = ('s_hotel_name', 'i_sale_price', 'f_final_price', 'f_savings_pct', 's_hotel_address', 'f_geographic_distance', 's_geographic_url')
+    SS_FIELDS = frozenset(__slots__)
+
+
+class HotelRecord(SlottedRecord):
+    __slots__ = ('s_hotel_url', 'd_hotel_comparison_attributes', 'd_hotel_additional_attributes')
+    SS_FIELDS = frozenset(__slots__)
+
+
+class DecodedHotelRecord(SlottedRecord):
+    __slots__ = ('d_hotel_metadata_hotrate', 'd_hotel_metadata_normal', 'd_attributes_matched')
+    SS_FIELDS = frozenset(__slots__)
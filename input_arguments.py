@@ -9,3 +9,20 @@ geographic_goto_address = '200 N Spring St, Los Angeles, CA 90012'
 search_query_url        = 'https://www.hotwire.com/hotels/search?destination=Los%20Angeles&startDate=06-29-2024&endDate=06-30-2024&rooms=1&adults=2&children=0'
 hack_mode               = 'basic'
 generate_report         = True
+fetch_final_price       = True
+browser_workers         = 1
+browser_tabs            = 1
+cache_file              = 'cache/hacking_hotwire.sqlite'
+distance_mode           = 'maps'
+maps_refine_top         = 0
+distance_matrix_url     = 'https://maps.googleapis.com/maps/api/distancematrix/json'
+distance_matrix_api_key = None
+browser_profile         = 'full'
+extraction_mode         = 'script'
+network_api_confirmed   = False
+overlap_stages          = True
+checkpoint_dir          = None
+metrics_dir             = 'metrics'
+trace_dir               = None
+batch_query_file        = None
+batch_date_ranges       = None
@@ -0,0 +1,171 @@
+# Do imports
+import os
+import json
+import time
+import bisect
+import threading
+import contextlib
+import collections as cl
+
+
+# Define upper bounds, in seconds, of latency histogram buckets
+LF_LATENCY_BUCKETS_S = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+
+# Define help text of each exported metric
+D_METRIC_HELP = {
+    'stage_seconds': ('gauge', 'Wall time spent in each pipeline stage'),
+    'page_load_seconds': ('histogram', 'Time to open a page and wait for it to load, by host'),
+    'wait_seconds': ('histogram', 'Time spent in each waiting stage until it succeeded or timed out'),
+    'retries_total': ('counter', 'Attempts beyond the first, by waiting stage'),
+    'wait_timeouts_total': ('counter', 'Waiting stages that gave up at their deadline'),
+    'deals_gone_total': ('counter', 'Hotrate pages whose deal had disappeared'),
+    'runs_failed_total': ('counter', 'Runs that stopped with an error before finishing'),
+    'cards_processed_total': ('counter', 'Hotel cards turned into primary metadata'),
+    'cards_per_second': ('gauge', 'Hotel cards processed per second of the primary stage'),
+}
+
+
+class Metrics:
+
+
+    def __init__(self, lf_buckets_s=LF_LATENCY_BUCKETS_S):
+
+        # Define instance variables
+        self.lf_buckets_s = list(lf_buckets_s)
+        self.o_lock = threading.Lock()
+        self.d_stage_seconds = cl.defaultdict(float)
+        self.d_histograms = {}
+        self.d_counters = cl.defaultdict(int)
+
+
+    @contextlib.contextmanager
+    def time_stage(self, s_stage):
+
+        # Add wall time of the block to the stage, even if it raises
+        f_started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_seconds(s_stage, time.perf_counter() - f_started_at)
+
+
+    def add_stage_seconds(self, s_stage, f_seconds):
+
+        # Add wall time to a stage
+        with self.o_lock:
+            self.d_stage_seconds[s_stage] += f_seconds
+
+
+    def observe(self, s_metric, s_label, f_value_s):
+
+        # Add a latency to its histogram bucket, values beyond the last bound only count towards the total
+        with self.o_lock:
+            d_histogram = self.d_histograms.setdefault((s_metric, s_label), {'li_bucket_counts': [0] * len(self.lf_buckets_s), 'f_sum': 0.0, 'i_count': 0, 'f_max': 0.0})
+            i_bucket_idx = bisect.bisect_left(self.lf_buckets_s, f_value_s)
+            if i_bucket_idx < len(self.lf_buckets_s):
+                d_histogram['li_bucket_counts'][i_bucket_idx] += 1
+            d_histogram['f_sum'] += f_value_s
+            d_histogram['i_count'] += 1
+            d_histogram['f_max'] = max(d_histogram['f_max'], f_value_s)
+
+
+    def increment(self, s_metric, s_label=None, i_amount=1):
+
+        # Add to a counter
+        with self.o_lock:
+            self.d_counters[(s_metric, s_label)] += i_amount
+
+
+    def observe_wait(self, s_stage, i_attempts, f_elapsed_s, b_succeeded):
+
+        # Record outcome of a waiting stage, as reported by retry_until
+        self.observe('wait_seconds', s_stage, f_elapsed_s)
+        if i_attempts > 1:
+            self.increment('retries_total', s_stage, i_attempts - 1)
+        if not b_succeeded:
+            self.increment('wait_timeouts_total', s_stage)
+
+
+    def get_summary(self):
+
+        # Summarize stage times, histograms with cumulative bucket counts, counters and throughput
+        with self.o_lock:
+            f_primary_s = self.d_stage_seconds.get('primary', 0.0)
+            i_cards_processed = self.d_counters.get(('cards_processed_total', None), 0)
+            d_histograms = {}
+            for (s_metric, s_label), d_histogram in sorted(self.d_histograms.items()):
+                li_bucket_counts_cumulative = [sum(d_histogram['li_bucket_counts'][:i_bucket_idx + 1]) for i_bucket_idx in range(len(self.lf_buckets_s))]
+                d_histograms.setdefault(s_metric, {})[s_label] = {
+                    'i_count': d_histogram['i_count'],
+                    'f_sum_s': round(d_histogram['f_sum'], 6),
+                    'f_mean_s': round(d_histogram['f_sum'] / d_histogram['i_count'], 6),
+                    'f_max_s': round(d_histogram['f_max'], 6),
+                    'd_buckets_le_s': dict(zip([str(f_bound_s) for f_bound_s in self.lf_buckets_s] + ['+Inf'], li_bucket_counts_cumulative + [d_histogram['i_count']])),
+                }
+            d_counters = {}
+            for (s_metric, s_label), i_count in sorted(self.d_counters.items(), key=lambda t: (t[0][0], str(t[0][1]))):
+                if s_label is None:
+                    d_counters[s_metric] = i_count
+                else:
+                    d_counters.setdefault(s_metric, {})[s_label] = i_count
+            return {
+                'd_stage_seconds': {s_stage: round(f_seconds, 6) for s_stage, f_seconds in self.d_stage_seconds.items()},
+                'd_histograms': d_histograms,
+                'd_counters': d_counters,
+                'f_cards_per_second': round(i_cards_processed / f_primary_s, 6) if f_primary_s > 0.0 else None,
+            }
+
+
+    def to_prometheus_text(self, s_prefix='hacking_hotwire'):
+
+        # Render summary in the Prometheus text exposition format
+        d_summary = self.get_summary()
+        ls_lines = []
+        def fo_add_header(s_metric):
+            s_type, s_help = D_METRIC_HELP[s_metric]
+            ls_lines.extend([f'# HELP {s_prefix}_{s_metric} {s_help}', f'# TYPE {s_prefix}_{s_metric} {s_type}'])
+        def fo_get_label(s_key, s_value):
+            return '{' + f'{s_key}="{s_value}"' + '}'
+
+        # Add stage times
+        if len(d_summary['d_stage_seconds']) > 0:
+            fo_add_header('stage_seconds')
+            for s_stage, f_seconds in d_summary['d_stage_seconds'].items():
+                ls_lines.append(f'{s_prefix}_stage_seconds{fo_get_label("stage", s_stage)} {f_seconds}')
+
+        # Add histograms
+        for s_metric, d_label_to_histogram in d_summary['d_histograms'].items():
+            fo_add_header(s_metric)
+            s_label_key = 'host' if s_metric == 'page_load_seconds' else 'stage'
+            for s_label, d_histogram in d_label_to_histogram.items():
+                for s_bound_s, i_count in d_histogram['d_buckets_le_s'].items():
+                    ls_lines.append(f'{s_prefix}_{s_metric}_bucket{{{s_label_key}="{s_label}",le="{s_bound_s}"}} {i_count}')
+                ls_lines.append(f'{s_prefix}_{s_metric}_sum{fo_get_label(s_label_key, s_label)} {d_histogram["f_sum_s"]}')
+                ls_lines.append(f'{s_prefix}_{s_metric}_count{fo_get_label(s_label_key, s_label)} {d_histogram["i_count"]}')
+
+        # Add counters
+        for s_metric, o_counts in d_summary['d_counters'].items():
+            fo_add_header(s_metric)
+            if isinstance(o_counts, dict):
+                for s_label, i_count in o_counts.items():
+                    ls_lines.append(f'{s_prefix}_{s_metric}{fo_get_label("stage", s_label)} {i_count}')
+            else:
+                ls_lines.append(f'{s_prefix}_{s_metric} {o_counts}')
+
+        # Add throughput
+        if d_summary['f_cards_per_second'] is not None:
+            fo_add_header('cards_per_second')
+            ls_lines.append(f'{s_prefix}_cards_per_second {d_summary["f_cards_per_second"]}')
+        return '\n'.join(ls_lines) + '\n'
+
+
+    def write(self, s_file_path_base):
+
+        # Write JSON summary and Prometheus text next to each other
+        if os.path.dirname(s_file_path_base) != '':
+            os.makedirs(os.path.dirname(s_file_path_base), exist_ok=True)
+        with open(f'{s_file_path_base}.json', 'w') as o_file:
+            json.dump(self.get_summary(), o_file, indent=2)
+        with open(f'{s_file_path_base}.prom', 'w') as o_file:
+            o_file.write(self.to_prometheus_text())
@@ -0,0 +1,166 @@
+# Do imports
+import re
+import json
+import base64
+
+
+# Define which captured responses are search results payloads
+O_SEARCH_API_URL_PATTERN = re.compile(r'^https://www\.hotwire\.com/api/hotel/search/results(\?|$)')
+
+
+# Define where the list of hotel results lives in a search results payload, and where each hotel card field lives in a result
+S_API_RESULTS_PATH = 'data.hotels'
+D_API_FIELD_PATHS = {
+    's_hotel_name': 'hotelName',
+    's_hotel_url': 'detailsUrl',
+    'b_hotrate': 'isHotRate',
+    'f_hotel_class': 'starRating',
+    's_distance': 'neighborhoodName',
+    'f_guest_rating': 'guestRating',
+    'i_reviews_total': 'reviewCount',
+    'ls_amenities': 'amenityCodes',
+    'f_price': 'price.displayPrice',
+    'f_strikethrough_price': 'price.strikethroughPrice',
+}
+
+
+# Define fields every hotel result must carry, with their types, for a payload to be read at all
+D_API_REQUIRED_FIELD_TYPES = {
+    's_hotel_name': str,
+    's_hotel_url': str,
+    'b_hotrate': bool,
+    'f_hotel_class': (int, float),
+    'f_price': (int, float),
+}
+
+
+def _get_path_value(d_result, s_path):
+
+    # Follow a dotted path through nested dicts, returning None where it stops
+    o_value = d_result
+    for s_key in s_path.split('.'):
+        if not isinstance(o_value, dict):
+            return None
+        o_value = o_value.get(s_key)
+    return o_value
+
+
+def _get_field_value(d_result, s_field):
+
+    # Return value of a field at its path
+    return _get_path_value(d_result, D_API_FIELD_PATHS[s_field])
+
+
+def _get_number(o_value):
+
+    # Read a number, anything else counting as missing
+    if isinstance(o_value, bool) or (not isinstance(o_value, (int, float))):
+        return None
+    return float(o_value)
+
+
+def get_api_responses(o_driver, o_url_pattern=O_SEARCH_API_URL_PATTERN):
+
+    # Read JSON responses logged since the last call, from the driver's performance log
+    ld_payloads = []
+    for d_entry in o_driver.get_log('performance'):
+        d_message = json.loads(d_entry['message'])['message']
+        if d_message['method'] != 'Network.responseReceived':
+            continue
+        d_response = d_message['params']['response']
+        if ('json' not in d_response.get('mimeType', '')) or (o_url_pattern.search(d_response['url']) is None):
+            continue
+
+        # Fetch response body, which is gone if the page that made the request has been left
+        try:
+            d_body = o_driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': d_message['params']['requestId']})
+            s_body = base64.b64decode(d_body['body']).decode('utf-8') if d_body['base64Encoded'] else d_body['body']
+            ld_payloads.append(json.loads(s_body))
+        except:
+            continue
+
+    # Return decoded payloads in arrival order
+    return ld_payloads
+
+
+def _get_hotel_results(o_payload):
+
+    # Return hotel results of a payload, or None if the payload or any of its results does not have the expected shape
+    l_results = _get_path_value(o_payload, S_API_RESULTS_PATH)
+    if not isinstance(l_results, list):
+        return None
+    for d_result in l_results:
+        if not isinstance(d_result, dict):
+            return None
+        for s_field, t_types in D_API_REQUIRED_FIELD_TYPES.items():
+            o_value = _get_field_value(d_result, s_field)
+            if (not isinstance(o_value, t_types)) or ((t_types is not bool) and isinstance(o_value, bool)):
+                return None
+    return l_results
+
+
+def parse_api_hotel_result(d_result):
+
+    # Determine whether result is for a hotrate or normal hotel
+    s_hotel_name = _get_field_value(d_result, 's_hotel_name')
+    b_hotrate = _get_field_value(d_result, 'b_hotrate')
+
+    # Parse hotel comparison attributes, keeping the same conventions as parsed hotel cards
+    f_hotel_class = _get_number(_get_field_value(d_result, 'f_hotel_class'))
+    s_distance = _get_field_value(d_result, 's_distance')
+    s_distance = s_distance if isinstance(s_distance, str) else None
+    f_guest_rating = _get_number(_get_field_value(d_result, 'f_guest_rating'))
+    f_reviews_total = _get_number(_get_field_value(d_result, 'i_reviews_total'))
+    i_reviews_total = None if f_reviews_total is None else int(f_reviews_total)
+    l_amenities = _get_field_value(d_result, 'ls_amenities')
+    ls_amenities = sorted(l_amenities) if isinstance(l_amenities, list) and all(isinstance(o_amenity, str) for o_amenity in l_amenities) else None
+    f_price = _get_number(_get_field_value(d_result, 'f_price'))
+    f_strikethrough_price = _get_number(_get_field_value(d_result, 'f_strikethrough_price'))
+    if b_hotrate:
+        i_list_price = None if f_strikethrough_price is None else int(f_strikethrough_price) + 1
+    else:
+        i_list_price = None if f_price is None else int(f_price)
+
+    # Return parsed hotel result
+    d_hotel_comparison_attributes = {
+        'f_hotel_class': f_hotel_class,
+        's_distance': s_distance,
+        'f_guest_rating': f_guest_rating,
+        'i_reviews_total': i_reviews_total,
+        'ls_amenities': ls_amenities,
+        'i_list_price': i_list_price,
+    }
+    d_hotel_additional_attributes = {
+        's_hotel_name': s_hotel_name,
+        'i_sale_price': None if f_price is None else int(f_price),
+    }
+    return b_hotrate, _get_field_value(d_result, 's_hotel_url'), d_hotel_comparison_attributes, d_hotel_additional_attributes
+
+
+def parse_api_hotel_results(ld_payloads, s_base_url=None):
+
+    # Collect hotel results of every payload, giving up on all of them if any payload has an unexpected shape,
+    # so that the caller falls back to reading the cards rather than trusting a partly understood response
+    ld_results = []
+    for o_payload in ld_payloads:
+        l_results = _get_hotel_results(o_payload)
+        if l_results is None:
+            return []
+        ld_results.extend(l_results)
+
+    # Parse hotel results, keeping the first occurrence of each hotel
+    lt_hotel_results_parsed = []
+    ss_hotel_urls = set()
+    for d_result in ld_results:
+        t_hotel_result_parsed = parse_api_hotel_result(d_result)
+        s_hotel_url = t_hotel_result_parsed[1]
+        if (s_base_url is not None) and s_hotel_url.startswith('/'):
+            s_hotel_url = re.match(r'https?://[^/]+', s_base_url).group(0) + s_hotel_url
+            t_hotel_result_parsed = (t_hotel_result_parsed[0], s_hotel_url) + t_hotel_result_parsed[2:]
+        if s_hotel_url in ss_hotel_urls:
+            continue
+        ss_hotel_urls.add(s_hotel_url)
+        lt_hotel_results_parsed.append(t_hotel_result_parsed)
+
+    # Return parsed hotel results, in the same form as parsed hotel cards
+    return lt_hotel_results_parsed
@@ -0,0 +1,216 @@
+# Do imports
+import lxml.html
+from lxml import etree
+
+
+def _get_class_xpath(s_class_name):
+
+    # Build an XPath that matches elements carrying a css class, like By.CLASS_NAME
+    return etree.XPath(f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {s_class_name} ')]")
+
+
+# Define compiled XPaths for search results pages
+O_XPATH_HOTEL_CARDS = _get_class_xpath('result-list-components')
+O_XPATH_HOTEL_NAME = _get_class_xpath('HotelCardLayout__hotel-name')
+O_XPATH_HOTEL_URL = etree.XPath(".//a[@target='_blank']/@href")
+O_XPATH_STAR_SEGMENTS_FILLED = etree.XPath(".//*[name()='svg']//*[@fill='url(#star-gradient)']")
+O_XPATH_STAR_SEGMENTS_UNFILLED = etree.XPath(".//*[name()='svg']//*[@fill='#DEE1E7']")
+O_XPATH_DISTANCE = _get_class_xpath('HotelCardLayout__distance')
+O_XPATH_GUEST_RATING = _get_class_xpath('RatingTag')
+O_XPATH_REVIEWS = _get_class_xpath('Reviews')
+O_XPATH_AMENITY_ICONS = _get_class_xpath('AmenityIcon__icon')
+O_XPATH_AMENITY_SVG = etree.XPath('.//svg')
+O_XPATH_STRIKETHROUGH_PRICE = _get_class_xpath('price-blocks__strikethrough')
+O_XPATH_PRICE = _get_class_xpath('price-blocks__price')
+
+
+# Define compiled XPaths for hotel detail pages
+O_XPATH_HOTRATE_GUEST_RATINGS = _get_class_xpath('GuestRatingProgressBar__counter')
+O_XPATH_TOTAL_CHARGE_AMOUNT = _get_class_xpath('review-policy-book__total-charge-amount')
+O_XPATH_NORMAL_GUEST_RATINGS = _get_class_xpath('uitk-progress-bar-value')
+O_XPATH_HOTEL_ADDRESS = etree.XPath(".//div[@data-stid='content-hotel-address']")
+
+
+# Define script that collects the raw fields of every hotel card in a single WebDriver round trip
+S_HOTEL_CARDS_SCRIPT = '''
+    function getText(oCard, sClass) {
+        var oElement = oCard.getElementsByClassName(sClass)[0];
+        return oElement === undefined ? null : oElement.innerText.trim();
+    }
+    function getTextContent(oCard, sClass) {
+        var oElement = oCard.getElementsByClassName(sClass)[0];
+        return oElement === undefined ? null : oElement.textContent;
+    }
+    var ldHotelCardFields = [];
+    var loHotelCards = document.getElementsByClassName('result-list-components');
+    var iEndIdx = arguments[1] == null ? loHotelCards.length : Math.min(arguments[1], loHotelCards.length);
+    for (var i = arguments[0] || 0; i < iEndIdx; i++) {
+        var oCard = loHotelCards[i];
+        var oLink = oCard.querySelector('a[target="_blank"]');
+        var lsAmenityIds = [];
+        var bAmenitiesComplete = true;
+        var loAmenityIcons = oCard.getElementsByClassName('AmenityIcon__icon');
+        for (var j = 0; j < loAmenityIcons.length; j++) {
+            var oSvg = loAmenityIcons[j].getElementsByTagName('svg')[0];
+            if (oSvg === undefined) {
+                bAmenitiesComplete = false;
+            } else {
+                lsAmenityIds.push(oSvg.getAttribute('data-id'));
+            }
+        }
+        ldHotelCardFields.push({
+            's_hotel_name': getText(oCard, 'HotelCardLayout__hotel-name'),
+            's_hotel_url': oLink === null ? null : oLink.href,
+            'i_star_segments_filled': oCard.querySelectorAll('svg [fill="url(#star-gradient)"]').length,
+            'i_star_segments_unfilled': oCard.querySelectorAll('svg [fill="#DEE1E7"]').length,
+            's_distance': getText(oCard, 'HotelCardLayout__distance'),
+            's_guest_rating': getText(oCard, 'RatingTag'),
+            's_reviews': getText(oCard, 'Reviews'),
+            'ls_amenity_ids': bAmenitiesComplete ? lsAmenityIds : null,
+            's_strikethrough_price': getTextContent(oCard, 'price-blocks__strikethrough'),
+            's_price': getTextContent(oCard, 'price-blocks__price'),
+        });
+    }
+    return ldHotelCardFields;
+'''
+
+
+def parse_hotel_card_fields(d_hotel_card_fields):
+
+    # Determine whether card is for a hotrate or normal hotel
+    b_hotrate = '-star' in d_hotel_card_fields['s_hotel_name']
+
+    # Parse hotel comparison attributes
+    i_star_segments_filled = d_hotel_card_fields['i_star_segments_filled']
+    i_star_segments_unfilled = d_hotel_card_fields['i_star_segments_unfilled']
+    f_hotel_class = float(i_star_segments_filled) if i_star_segments_filled + i_star_segments_unfilled == 5 else i_star_segments_filled - 0.5
+    s_distance = d_hotel_card_fields['s_distance']
+    try:
+        f_guest_rating = float(d_hotel_card_fields['s_guest_rating'][:-2])
+    except:
+        f_guest_rating = None
+    try:
+        i_reviews_total = int(d_hotel_card_fields['s_reviews'].replace('(', '').replace(')', '').replace('reviews', ''))
+    except:
+        i_reviews_total = None
+    try:
+        ls_amenities = sorted(d_hotel_card_fields['ls_amenity_ids'])
+    except:
+        ls_amenities = None
+    try:
+        if b_hotrate:
+            i_list_price = int(d_hotel_card_fields['s_strikethrough_price'][1:]) + 1
+        else:
+            i_list_price = int(d_hotel_card_fields['s_price'][1:])
+    except:
+        i_list_price = None
+
+    # Parse hotel additional attributes
+    s_hotel_name = d_hotel_card_fields['s_hotel_name']
+    try:
+        i_sale_price = int(d_hotel_card_fields['s_price'][1:])
+    except:
+        i_sale_price = None
+
+    # Return parsed hotel card
+    d_hotel_comparison_attributes = {
+        'f_hotel_class': f_hotel_class,
+        's_distance': s_distance,
+        'f_guest_rating': f_guest_rating,
+        'i_reviews_total': i_reviews_total,
+        'ls_amenities': ls_amenities,
+        'i_list_price': i_list_price,
+    }
+    d_hotel_additional_attributes = {
+        's_hotel_name': s_hotel_name,
+        'i_sale_price': i_sale_price,
+    }
+    return b_hotrate, d_hotel_card_fields['s_hotel_url'], d_hotel_comparison_attributes, d_hotel_additional_attributes
+
+
+def _get_text(o_element):
+
+    # Approximate WebDriver element text by collapsing whitespace within each line
+    return '\n'.join(' '.join(s_line.split()) for s_line in o_element.text_content().strip().splitlines() if s_line.strip())
+
+
+def _get_first_text(o_xpath, o_root, b_text_content=False):
+
+    # Return text of the first matching element, or None if there is none
+    lo_elements = o_xpath(o_root)
+    if len(lo_elements) == 0:
+        return None
+    return lo_elements[0].text_content() if b_text_content else _get_text(lo_elements[0])
+
+
+def _get_page_root(s_page_source, s_base_url=None):
+
+    # Parse page source, resolving relative links if a base url is given
+    o_root = lxml.html.fromstring(s_page_source)
+    if s_base_url is not None:
+        o_root.make_links_absolute(s_base_url)
+    return o_root
+
+
+def parse_search_results_page(s_page_source, s_base_url=None, i_start_idx=0, i_end_idx=None):
+
+    # Collect the same raw fields as S_HOTEL_CARDS_SCRIPT from a page source snapshot
+    ld_hotel_card_fields = []
+    for o_card in O_XPATH_HOTEL_CARDS(_get_page_root(s_page_source, s_base_url))[i_start_idx:i_end_idx]:
+        ls_hotel_urls = O_XPATH_HOTEL_URL(o_card)
+        lo_amenity_svgs = [O_XPATH_AMENITY_SVG(o_icon) for o_icon in O_XPATH_AMENITY_ICONS(o_card)]
+        ld_hotel_card_fields.append({
+            's_hotel_name': _get_first_text(O_XPATH_HOTEL_NAME, o_card),
+            's_hotel_url': ls_hotel_urls[0] if len(ls_hotel_urls) > 0 else None,
+            'i_star_segments_filled': len(O_XPATH_STAR_SEGMENTS_FILLED(o_card)),
+            'i_star_segments_unfilled': len(O_XPATH_STAR_SEGMENTS_UNFILLED(o_card)),
+            's_distance': _get_first_text(O_XPATH_DISTANCE, o_card),
+            's_guest_rating': _get_first_text(O_XPATH_GUEST_RATING, o_card),
+            's_reviews': _get_first_text(O_XPATH_REVIEWS, o_card),
+            'ls_amenity_ids': [lo_svgs[0].get('data-id') for lo_svgs in lo_amenity_svgs] if all(len(lo_svgs) > 0 for lo_svgs in lo_amenity_svgs) else None,
+            's_strikethrough_price': _get_first_text(O_XPATH_STRIKETHROUGH_PRICE, o_card, b_text_content=True),
+            's_price': _get_first_text(O_XPATH_PRICE, o_card, b_text_content=True),
+        })
+
+    # Return raw hotel card fields
+    return ld_hotel_card_fields
+
+
+def parse_hotrate_detail_page(s_page_source):
+
+    # Parse hotrate hotel ratings, which are None if not yet rendered
+    o_root = _get_page_root(s_page_source)
+    ls_guest_ratings = [_get_text(o_element) for o_element in O_XPATH_HOTRATE_GUEST_RATINGS(o_root)]
+    b_ratings_loaded = len(ls_guest_ratings) > 3
+    return {
+        's_condition_rating': ls_guest_ratings[0] if b_ratings_loaded else None,
+        's_service_rating': ls_guest_ratings[1] if b_ratings_loaded else None,
+        's_cleanliness_rating': ls_guest_ratings[3] if b_ratings_loaded else None,
+    }
+
+
+def parse_hotrate_checkout_page(s_page_source):
+
+    # Parse hotrate hotel final price
+    s_total_charge_amount = _get_first_text(O_XPATH_TOTAL_CHARGE_AMOUNT, _get_page_root(s_page_source))
+    try:
+        f_final_price = float(s_total_charge_amount[1:-4].replace(',', ''))
+    except:
+        f_final_price = None
+    return {
+        'f_final_price': f_final_price,
+    }
+
+
+def parse_normal_detail_page(s_page_source):
+
+    # Parse normal hotel ratings and address, which are None if not yet rendered
+    o_root = _get_page_root(s_page_source)
+    ls_guest_ratings = [_get_text(o_element)[:-2] for o_element in O_XPATH_NORMAL_GUEST_RATINGS(o_root)]
+    b_ratings_loaded = len(ls_guest_ratings) > 3
+    return {
+        's_condition_rating': ls_guest_ratings[3] if b_ratings_loaded else None,
+        's_service_rating': ls_guest_ratings[1] if b_ratings_loaded else None,
+        's_cleanliness_rating': ls_guest_ratings[0] if b_ratings_loaded else None,
+        's_hotel_address': _get_first_text(O_XPATH_HOTEL_ADDRESS, o_root),
+    }
@@ -0,0 +1,83 @@
+# Do imports
+import queue
+import threading
+from tqdm import tqdm
+
+
+# Define marker closing a stage's input queue
+O_END_OF_ITEMS = object()
+
+
+def _run_stage_worker(fo_process, i_batch_size, o_queue_in, o_queue_out, b_last_stage, o_tqdm, lo_errors):
+
+    # Process items until the end marker arrives, gathering whatever else is already waiting into one batch
+    while True:
+        lt_batch = [o_queue_in.get()]
+        while (len(lt_batch) < i_batch_size) and (lt_batch[-1] is not O_END_OF_ITEMS):
+            try:
+                lt_batch.append(o_queue_in.get_nowait())
+            except queue.Empty:
+                break
+        b_end = lt_batch[-1] is O_END_OF_ITEMS
+        if b_end:
+            lt_batch.pop()
+
+        # Pass processed items on, dropping those a stage returns None for, and only drain the queue once a stage has failed
+        if (len(lt_batch) > 0) and (len(lo_errors) == 0):
+            try:
+                l_items_out = fo_process([o_item for _, o_item in lt_batch])
+                for (i_item_idx, _), o_item_out in zip(lt_batch, l_items_out):
+                    if o_item_out is not None:
+                        o_queue_out.put((i_item_idx, o_item_out))
+                    if (o_item_out is None) or b_last_stage:
+                        o_tqdm.update(1)
+            except Exception as o_error:
+                lo_errors.append(o_error)
+        if b_end:
+            return
+
+
+def _feed_items(l_items, o_queue_in, i_workers):
+
+    # Put items on the first queue, followed by one end marker per worker
+    for i_item_idx, o_item in enumerate(l_items):
+        o_queue_in.put((i_item_idx, o_item))
+    for _ in range(i_workers):
+        o_queue_in.put(O_END_OF_ITEMS)
+
+
+def run_pipeline(l_items, lt_stages, i_queue_size=4, s_description=None):
+
+    # Connect stages, given as (process function, workers, batch size), with bounded queues, the last queue collecting outputs
+    lo_queues = [queue.Queue(maxsize=i_queue_size) for _ in lt_stages] + [queue.Queue()]
+    lo_errors = []
+    o_tqdm = tqdm(total=len(l_items))
+    if s_description is not None:
+        o_tqdm.set_description(s_description)
+
+    # Start one thread per stage worker
+    llo_threads = []
+    for i_stage_idx, (fo_process, i_workers, i_batch_size) in enumerate(lt_stages):
+        llo_threads.append([threading.Thread(target=_run_stage_worker, daemon=True,
+                                             args=(fo_process, i_batch_size, lo_queues[i_stage_idx], lo_queues[i_stage_idx + 1], i_stage_idx == len(lt_stages) - 1, o_tqdm, lo_errors))
+                            for _ in range(i_workers)])
+        for o_thread in llo_threads[-1]:
+            o_thread.start()
+    threading.Thread(target=_feed_items, args=(l_items, lo_queues[0], lt_stages[0][1]), daemon=True).start()
+
+    # Close each stage's output once all of its workers are done
+    for i_stage_idx, lo_threads in enumerate(llo_threads):
+        for o_thread in lo_threads:
+            o_thread.join()
+        if i_stage_idx + 1 < len(lt_stages):
+            for _ in range(lt_stages[i_stage_idx + 1][1]):
+                lo_queues[i_stage_idx + 1].put(O_END_OF_ITEMS)
+    o_tqdm.close()
+    if len(lo_errors) > 0:
+        raise lo_errors[0]
+
+    # Return items that made it through every stage, in input order
+    lt_items_out = []
+    while not lo_queues[-1].empty():
+        lt_items_out.append(lo_queues[-1].get_nowait())
+    return [o_item for _, o_item in sorted(lt_items_out, key=lambda t: t[0])]
@@ -0,0 +1,114 @@
+# Do imports
+import time
+import random
+
+
+# Define deadline, in seconds, of each waiting stage
+F_DEADLINE_DEFAULT_S = 60.0
+D_STAGE_DEADLINES_S = {
+    'open_page': 60.0,
+    'dom_ready': 30.0,
+    'network_idle': 20.0,
+    'hotel_filter': 30.0,
+    'load_hotel_batch': 60.0,
+    'hotrate_page': 60.0,
+    'hotrate_ratings': 30.0,
+    'normal_ratings': 45.0,
+    'hotrate_final_price': 60.0,
+    'maps_directions': 60.0,
+}
+
+
+# Define functions called with the outcome of every waiting stage, such as a metrics recorder
+LFO_WAIT_OBSERVERS = []
+
+
+class PageNotReadyError(Exception):
+    pass
+
+
+class WaitTimeoutError(Exception):
+
+
+    def __init__(self, s_stage, i_attempts, f_elapsed_s, o_last_error):
+
+        # Define instance variables
+        super().__init__(f'{s_stage} did not succeed after {i_attempts} attempts in {f_elapsed_s:.1f}s, last error: {o_last_error!r}')
+        self.s_stage = s_stage
+        self.i_attempts = i_attempts
+        self.f_elapsed_s = f_elapsed_s
+        self.o_last_error = o_last_error
+
+
+def add_wait_observer(fo_observer):
+
+    # Register a function called as fo_observer(s_stage, i_attempts, f_elapsed_s, b_succeeded) once each waiting stage ends
+    LFO_WAIT_OBSERVERS.append(fo_observer)
+
+
+def remove_wait_observer(fo_observer):
+
+    # Unregister a function, if it is registered
+    if fo_observer in LFO_WAIT_OBSERVERS:
+        LFO_WAIT_OBSERVERS.remove(fo_observer)
+
+
+def _notify_wait_observers(s_stage, i_attempts, f_elapsed_s, b_succeeded):
+
+    # Report outcome of a waiting stage, never letting an observer break the wait itself
+    for fo_observer in list(LFO_WAIT_OBSERVERS):
+        try:
+            fo_observer(s_stage, i_attempts, f_elapsed_s, b_succeeded)
+        except:
+            pass
+
+
+def retry_until(fo_attempt, s_stage, f_deadline_s=None, f_delay_initial_s=0.1, f_delay_max_s=2.0, f_jitter=0.5):
+
+    # Call attempt until it returns without raising, backing off exponentially with jitter between attempts
+    f_deadline_s = D_STAGE_DEADLINES_S.get(s_stage, F_DEADLINE_DEFAULT_S) if f_deadline_s is None else f_deadline_s
+    f_started_at = time.monotonic()
+    f_delay_s = f_delay_initial_s
+    i_attempts = 0
+    while True:
+        i_attempts += 1
+        try:
+            o_result = fo_attempt()
+            _notify_wait_observers(s_stage, i_attempts, time.monotonic() - f_started_at, True)
+            return o_result
+        except Exception as o_error:
+            o_last_error = o_error
+
+        # Fail once the stage deadline has passed, otherwise sleep no later than the deadline
+        f_elapsed_s = time.monotonic() - f_started_at
+        if f_elapsed_s >= f_deadline_s:
+            _notify_wait_observers(s_stage, i_attempts, f_elapsed_s, False)
+            raise WaitTimeoutError(s_stage, i_attempts, f_elapsed_s, o_last_error)
+        time.sleep(min(f_delay_s * random.uniform(1.0 - f_jitter, 1.0 + f_jitter), f_deadline_s - f_elapsed_s))
+        f_delay_s = min(2.0 * f_delay_s, f_delay_max_s)
+
+
+def wait_for_dom_ready(o_driver, f_deadline_s=None):
+
+    # Wait until the document has finished parsing and loading subresources
+    def fo_check_dom_ready():
+        if o_driver.execute_script('return document.readyState;') != 'complete':
+            raise PageNotReadyError('document not ready')
+    retry_until(fo_check_dom_ready, 'dom_ready', f_deadline_s)
+
+
+def wait_for_network_idle(o_driver, f_idle_s=0.5, f_deadline_s=None):
+
+    # Wait until no new network requests have started for a while, returning False if the page never settles
+    d_state = {'i_requests': -1, 'f_changed_at': time.monotonic()}
+    def fo_check_network_idle():
+        i_requests = o_driver.execute_script("return performance.getEntriesByType('resource').length;")
+        if i_requests != d_state['i_requests']:
+            d_state.update({'i_requests': i_requests, 'f_changed_at': time.monotonic()})
+        if time.monotonic() - d_state['f_changed_at'] < f_idle_s:
+            raise PageNotReadyError('network busy')
+    try:
+        retry_until(fo_check_network_idle, 'network_idle', f_deadline_s, f_delay_max_s=f_idle_s)
+        return True
+    except WaitTimeoutError:
+        return False